@@ -1 +1,6 @@
+from .analysis import *
+from .autofocus import *
 from .dispatcher import *
+from .focus import *
+from .planner import *
+from .timeline import *
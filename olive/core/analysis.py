@@ -0,0 +1,229 @@
+"""
+Ahead-of-time analysis of compiled timelines.
+"""
+from collections import deque
+from dataclasses import dataclass
+import logging
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+from .timeline import Timeline
+
+__all__ = ["OverlapAnalyzer", "OverlapReport", "TimingModel"]
+
+logger = logging.getLogger(__name__)
+
+
+class TimingModel(object):
+    """
+    Expected durations of device actions, measured in prior runs.
+
+    Only the latest MAX_SAMPLES durations of each (device, action) are kept, so the
+    model follows devices that drift over time.
+
+    Args:
+        q (float, optional): percentile of the measured durations to expect, in
+            [0, 100]
+    """
+
+    MAX_SAMPLES = 256
+
+    def __init__(self, q: float = 50):
+        self._q = q
+        # (device, action) -> durations
+        self._samples: Dict[Tuple[str, str], deque] = dict()
+
+    def __contains__(self, key: Tuple[str, str]):
+        return key in self._samples
+
+    def __len__(self):
+        return len(self._samples)
+
+    ##
+
+    @property
+    def durations(self) -> Dict[Tuple[str, str], float]:
+        """Expected duration of each measured (device, action) in seconds."""
+        return {key: self._estimate(samples) for key, samples in self._samples.items()}
+
+    ##
+
+    def record(self, device: str, action: str, duration: float):
+        try:
+            samples = self._samples[(device, action)]
+        except KeyError:
+            samples = self._samples[(device, action)] = deque(maxlen=self.MAX_SAMPLES)
+        samples.append(duration)
+
+    def update(self, timings: Iterable):
+        """
+        Learn from step timings of a run.
+
+        Args:
+            timings (list of StepTiming): timings reported by the dispatcher
+        """
+        for timing in timings:
+            for action in timing.actions:
+                self.record(action.device, action.action, action.elapsed)
+
+    def estimate(self, device: str, action: str, default: float = 0.0) -> float:
+        """
+        Expected duration of an action in seconds.
+
+        Args:
+            device (str): device alias
+            action (str): action name
+            default (float, optional): duration to use if it is never measured
+        """
+        try:
+            return self._estimate(self._samples[(device, action)])
+        except KeyError:
+            return default
+
+    ##
+
+    def _estimate(self, samples) -> float:
+        return float(np.percentile(np.fromiter(samples, dtype=np.float64), self._q))
+
+
+@dataclass(frozen=True)
+class OverlapReport:
+    timeline: Timeline  # the overlapped timeline
+    naive: float  # s, total time if every action runs back-to-back
+    predicted: float  # s, total time of the overlapped timeline
+
+    @property
+    def n_steps(self) -> int:
+        return self.timeline.n_steps
+
+    @property
+    def naive_cycle(self) -> float:
+        """Time per cycle in seconds, if every action runs back-to-back."""
+        return self.naive / max(self.n_steps, 1)
+
+    @property
+    def predicted_cycle(self) -> float:
+        return self.predicted / max(self.n_steps, 1)
+
+    @property
+    def speedup(self) -> float:
+        return self.naive / self.predicted if self.predicted > 0 else 1.0
+
+    def __str__(self):
+        return (
+            f"{self.n_steps} cycle(s), "
+            f"{self.predicted_cycle * 1000:.1f} ms/cycle predicted, "
+            f"{self.naive_cycle * 1000:.1f} ms/cycle serial ({self.speedup:.2f}x)"
+        )
+
+
+class OverlapAnalyzer(object):
+    """
+    Overlap device actions of a timeline, across acquisition cycles.
+
+    Besides declared dependencies, the following constraints are derived,
+    - a device runs one action at a time, in their original order
+    - a device keeps its state until actions of other devices that depend on it are
+        finished, e.g. the stage does not move to the next position before the camera
+        finishes its exposure, but it does not wait for the readout
+
+    Every constraint becomes an explicit dependency, actions are then rescheduled as
+    soon as possible by the expected durations, and the timeline is pipelined.
+
+    Args:
+        model (TimingModel, optional): measured durations, otherwise, durations in the
+            timeline are expected
+    """
+
+    def __init__(self, model: Optional[TimingModel] = None):
+        self._model = TimingModel() if model is None else model
+
+    ##
+
+    def analyze(self, timeline: Timeline) -> OverlapReport:
+        durations = self._get_durations(timeline)
+        naive = self._schedule_serial(timeline, durations)
+
+        n = len(timeline)
+        start = np.zeros(n)
+        dependencies = [()] * n
+        # device -> latest row, and rows that rely on the state it left
+        last: Dict[int, int] = dict()
+        readers: Dict[int, list] = dict()
+        held: Dict[int, Set[int]] = dict()
+
+        table = timeline.table
+        for step, instructions in timeline.steps():
+            for instruction in instructions:
+                row, device = instruction.row, int(table["device"][instruction.row])
+
+                after = set(instruction.after)
+                if device in last:
+                    after.add(last[device])
+                    after.update(readers.pop(device, ()))
+                after.discard(row)
+
+                # devices whose state this row relies on, a dependency on the same
+                # device only orders the actions, e.g. readout after exposure
+                held[row] = set()
+                for dependency in instruction.after:
+                    other = int(table["device"][dependency])
+                    if other != device:
+                        held[row].add(other)
+                        held[row].update(held[dependency])
+                held[row].discard(device)
+                for other in held[row]:
+                    readers.setdefault(other, []).append(row)
+                last[device] = row
+
+                start[row] = max(
+                    [timeline.releases[step]] + [start[r] + durations[r] for r in after]
+                )
+                dependencies[row] = tuple(sorted(after))
+
+        # reorder by the new start time
+        result = table.copy()
+        result["time"], result["duration"] = start, durations
+        order = np.argsort(start, kind="stable")
+        mapping = np.empty_like(order)
+        mapping[order] = np.arange(n)
+        dependencies = tuple(
+            tuple(int(mapping[r]) for r in dependencies[i]) for i in order
+        )
+        timeline = Timeline(
+            result[order],
+            timeline.devices,
+            timeline.actions,
+            timeline.args,
+            dependencies,
+            releases=timeline.releases,
+            is_pipelined=True,
+        )
+
+        report = OverlapReport(timeline, naive, timeline.duration)
+        logger.info(str(report))
+        return report
+
+    ##
+
+    def _get_durations(self, timeline: Timeline) -> np.ndarray:
+        """Expected duration of each row, measured ones take precedence."""
+        table = timeline.table
+        durations = table["duration"].copy()
+        pairs = table["device"].astype(np.uint32) << 16 | table["action"]
+        for pair in np.unique(pairs):
+            device = timeline.devices[pair >> 16]
+            action = timeline.actions[pair & 0xFFFF]
+            if (device, action) in self._model:
+                durations[pairs == pair] = self._model.estimate(device, action)
+        return durations
+
+    @staticmethod
+    def _schedule_serial(timeline: Timeline, durations: np.ndarray) -> float:
+        """Total time if every action of the timeline runs back-to-back."""
+        t = 0.0
+        for step, instructions in timeline.steps():
+            t = max(t, timeline.releases[step])
+            t += sum(durations[instruction.row] for instruction in instructions)
+        return float(t)
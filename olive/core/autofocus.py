@@ -0,0 +1,236 @@
+"""
+Image-based autofocus, by searching the sharpest image along a focus axis.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from enum import auto, Enum
+import logging
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from olive.devices.camera import Camera
+from olive.devices.motion import LinearAxis
+from olive.metrics import Metrics
+from olive.utils import maybe_await
+
+__all__ = [
+    "Autofocus",
+    "AutofocusIteration",
+    "AutofocusResult",
+    "FocusMetric",
+    "focus_score",
+]
+
+logger = logging.getLogger(__name__)
+
+
+class FocusMetric(Enum):
+    VarianceOfLaplacian = auto()
+    Brenner = auto()
+    NormalizedVariance = auto()
+
+
+def focus_score(
+    image: np.ndarray,
+    metric: FocusMetric = FocusMetric.VarianceOfLaplacian,
+    roi: Optional[Tuple[int, int, int, int]] = None,
+    decimation: int = 1,
+) -> float:
+    """
+    Sharpness of an image, higher is sharper.
+
+    Args:
+        image (np.ndarray): 2-D image
+        metric (FocusMetric, optional): the metric
+        roi (tuple of int, optional): (y, x, height, width) to evaluate
+        decimation (int, optional): only evaluate every n-th pixel along each axis
+    """
+    if roi is not None:
+        y, x, h, w = roi
+        image = image[y : y + h, x : x + w]
+    image = image[::decimation, ::decimation].astype(np.float32)
+
+    if metric == FocusMetric.VarianceOfLaplacian:
+        laplacian = (
+            image[1:-1, :-2]
+            + image[1:-1, 2:]
+            + image[:-2, 1:-1]
+            + image[2:, 1:-1]
+            - 4 * image[1:-1, 1:-1]
+        )
+        return float(laplacian.var())
+    elif metric == FocusMetric.Brenner:
+        dx = image[:, 2:] - image[:, :-2]
+        dy = image[2:, :] - image[:-2, :]
+        return float((dx * dx).mean() + (dy * dy).mean())
+    elif metric == FocusMetric.NormalizedVariance:
+        mean = image.mean()
+        return float(image.var() / mean) if mean > 0 else 0.0
+    else:
+        raise ValueError(f'unknown focus metric "{metric}"')
+
+
+@dataclass(frozen=True)
+class AutofocusIteration:
+    level: int  # 0 for the coarsest search
+    z: float
+    score: float
+    move: float  # s, waiting for the axis, after the overlapped computation
+    snap: float  # s
+    metric: float  # s
+
+
+@dataclass
+class AutofocusResult:
+    z: float
+    score: float
+    elapsed: float = 0.0  # s
+    iterations: List[AutofocusIteration] = field(default_factory=list)
+
+
+class Autofocus(object):
+    """
+    Coarse-to-fine focus search.
+
+    Each level samples the search range evenly, the next level narrows down around
+    the sharpest sample so far, positions sampled by earlier levels are not sampled
+    again. Sharpness of an image is computed in background, while the axis moves to
+    the next sample. The focus is refined by a parabola through the sharpest sample
+    and its nearest neighbors.
+
+    Args:
+        axis (LinearAxis): focus axis, e.g. objective piezo
+        camera (Camera): camera to evaluate sharpness with
+        metric (FocusMetric, optional): sharpness metric
+        roi (tuple of int, optional): (y, x, height, width) to evaluate
+        decimation (int, optional): only evaluate every n-th pixel along each axis
+    """
+
+    def __init__(
+        self,
+        axis: LinearAxis,
+        camera: Camera,
+        metric: FocusMetric = FocusMetric.VarianceOfLaplacian,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+        decimation: int = 2,
+    ):
+        self._axis, self._camera = axis, camera
+        self._metric, self._roi, self._decimation = metric, roi, decimation
+
+    ##
+
+    async def run(
+        self, span: float, center=None, steps=7, levels=3, tolerance=0.0
+    ) -> AutofocusResult:
+        """
+        Search for the focus and move there.
+
+        Args:
+            span (float): search range around the center
+            center (float, optional): center of the search, current position if None
+            steps (int, optional): samples per level
+            levels (int, optional): maximum levels of the search
+            tolerance (float, optional): stop when the sample step is finer than this
+
+        Returns:
+            (AutofocusResult): refined focus, score of the sharpest sample, and
+                timings of each iteration
+        """
+        if steps < 3:
+            raise ValueError("requires at least 3 steps per level")
+        t0 = time.perf_counter()
+        if center is None:
+            center = await maybe_await(self._axis.get_position())
+
+        result = AutofocusResult(center, -np.inf)
+        # samples of all levels
+        samples, scores = np.empty(0), np.empty(0)
+        for level in range(levels):
+            z = np.linspace(center - span / 2, center + span / 2, steps)
+            # e.g. the center is sampled by the previous level
+            is_sampled = np.isclose(
+                z[:, np.newaxis], samples[np.newaxis], rtol=0, atol=span * 1e-9
+            ).any(axis=1)
+            z = z[~is_sampled]
+            if len(z) > 0:
+                samples = np.concatenate((samples, z))
+                scores = np.concatenate(
+                    (scores, await self._sweep(level, z, result.iterations))
+                )
+
+            best = int(np.argmax(scores))
+            result.z, result.score = float(samples[best]), float(scores[best])
+            center = result.z
+
+            step = span / (steps - 1)
+            if step <= tolerance:
+                break
+            # neighbors of the best sample bound the next level
+            span = 2 * step
+        result.z = self._refine(samples, scores)
+
+        await self._axis.move_absolute(result.z)
+        result.elapsed = time.perf_counter() - t0
+        logger.info(
+            f"focus at {result.z:.4f} after {len(result.iterations)} image(s), "
+            f"{result.elapsed * 1000:.1f} ms"
+        )
+        return result
+
+    ##
+
+    async def _sweep(self, level, z, iterations) -> np.ndarray:
+        """Sample sharpness along z, compute the score while moving to the next."""
+        loop = asyncio.get_running_loop()
+        metrics = Metrics()
+
+        scores = np.empty(len(z))
+        await self._axis.move_absolute(z[0])
+        for i in range(len(z)):
+            t_snap = time.perf_counter()
+            image = await self._camera.snap()
+            t_snap = time.perf_counter() - t_snap
+
+            # overlap the computation with the next move
+            if i + 1 < len(z):
+                await self._axis.move_absolute(z[i + 1], blocking=False)
+            t_metric = time.perf_counter()
+            scores[i] = await loop.run_in_executor(
+                None, focus_score, image, self._metric, self._roi, self._decimation
+            )
+            t_metric = time.perf_counter() - t_metric
+            t_move = time.perf_counter()
+            await self._axis.wait()
+            t_move = time.perf_counter() - t_move
+
+            iterations.append(
+                AutofocusIteration(
+                    level, float(z[i]), float(scores[i]), t_move, t_snap, t_metric
+                )
+            )
+            for stage, t in (("move", t_move), ("snap", t_snap), ("metric", t_metric)):
+                metrics.record("autofocus", int(t * 1e9), stage=stage)
+        return scores
+
+    @staticmethod
+    def _refine(z, scores) -> float:
+        """
+        Vertex of the parabola through the best sample and its nearest neighbors.
+
+        Neighbors are not evenly spaced if they are sampled by different levels. The
+        best sample is not below its neighbors, so the vertex stays between them.
+        """
+        order = np.argsort(z)
+        z, scores = z[order], scores[order]
+        best = int(np.argmax(scores))
+        if best == 0 or best == len(z) - 1:
+            return float(z[best])
+        (z0, z1, z2), (y0, y1, y2) = z[best - 1 : best + 2], scores[best - 1 : best + 2]
+        numerator = (z1 - z0) ** 2 * (y1 - y2) - (z1 - z2) ** 2 * (y1 - y0)
+        denominator = (z1 - z0) * (y1 - y2) - (z1 - z2) * (y1 - y0)
+        if denominator == 0:
+            # flat, not a peak
+            return float(z1)
+        return float(z1 - 0.5 * numerator / denominator)
@@ -1,47 +1,192 @@
+import asyncio
+from dataclasses import dataclass, field
+import inspect
 import logging
+from typing import List
 
-from .managers import DeviceManager
+from .analysis import OverlapAnalyzer, OverlapReport, TimingModel
+from .managers import DeviceManager, HotplugMonitor
+from .timeline import Instruction, Timeline, TimelineCompiler
 
-__all__ = ["Dispatcher"]
+__all__ = ["ActionTiming", "Dispatcher", "StepTiming"]
 
 logger = logging.getLogger(__name__)
 
+# returned by a script function that requests to stop
+_STOP = object()
+
+
+@dataclass(frozen=True)
+class ActionTiming:
+    device: str
+    action: str
+    start: float  # s, since the beginning of the run
+    end: float  # s, since the beginning of the run
+
+    @property
+    def elapsed(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class StepTiming:
+    step: int
+    scheduled: float  # s, since the beginning of the run
+    start: float = 0.0
+    end: float = 0.0
+    actions: List[ActionTiming] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return self.end - self.start
+
+    @property
+    def lag(self) -> float:
+        """How late the step started in seconds."""
+        return self.start - self.scheduled
+
 
 class Dispatcher(object):
     """
     Dispatch device confiugrations and formulate the sequence to execute on a sequencer.
+
+    Actions in an acquisition step run concurrently, only those depend on each other
+    are serialized. Pause and abort are cooperative, they take effect before the next
+    action starts, actions in flight are not interrupted.
+
+    Durations of executed actions are kept in a timing model, later runs can overlap
+    actions across steps by them.
     """
 
     def __init__(self, script):
         self._script = script
         self._device_manager = DeviceManager()
 
+        self._resumed, self._aborted = asyncio.Event(), asyncio.Event()
+        self._resumed.set()
+        # loop time when the run starts, shifted by time spent in pause
+        self._t0, self._paused_at = 0.0, 0.0
+        self._timings: List[StepTiming] = []
+        self._model = TimingModel()
+
     ##
 
-    def initialize(self):
-        """Initialize all the devices."""
-        # TODO
+    async def initialize(self, timeout=None):
+        """Initialize all the devices, and watch for hot-plug changes."""
+        HotplugMonitor().start()
+        # reopen devices that are closed by a previous shutdown
+        for device in self.device_manager.devices:
+            self.device_manager.register(device)
+        await self.device_manager.ready(timeout)
 
-    def shutdown(self):
-        """Shutdown all the devices."""
-        pass
+    async def shutdown(self):
+        """Shutdown all the devices, including idle ones in the warm pool."""
+        await HotplugMonitor().stop()
+        await self.device_manager.close_all()
 
-    def run(self):
-        self.script.setup()
+    async def run(self, overlap=False):
+        """
+        Run the script, compiled ahead of time if possible.
+
+        Args:
+            overlap (bool, optional): overlap actions across steps, by durations
+                measured in prior runs
+        """
+        self._reset()
+        if self.script.is_compilable:
+            timeline = self.analyze().timeline if overlap else self.compile()
+            await self.execute(timeline)
+        else:
+            await self._interpret()
+
+    def compile(self, durations=None) -> Timeline:
+        """
+        Compile the script into a timeline.
+
+        Args:
+            durations (dict, optional): expected duration of (device, action)
+        """
+        return TimelineCompiler(durations).compile(self.script)
+
+    def analyze(self) -> OverlapReport:
+        """
+        Overlap actions of the compiled script, by durations measured in prior runs.
+
+        Returns:
+            (OverlapReport): the overlapped timeline and its predicted time per cycle
+        """
+        return OverlapAnalyzer(self.timing_model).analyze(self.compile())
+
+    async def execute(self, timeline: Timeline) -> List[StepTiming]:
+        """
+        Execute a compiled timeline.
+
+        A step does not start before its scheduled time, but it is not skipped if it
+        is late. Time spent in pause shifts the rest of the timeline. Steps of a
+        pipelined timeline do not wait for previous steps to finish, their actions
+        only wait on their dependencies.
+
+        Args:
+            timeline (Timeline): the timeline
+
+        Returns:
+            (list of StepTiming): timings of executed steps
+        """
+        requirements = self.device_manager.requirements
+        devices = {alias: requirements[alias] for alias in timeline.devices}
+
+        loop = asyncio.get_running_loop()
+        self._t0 = loop.time()
+        # row -> task, dependencies of a pipelined timeline span across steps
+        tasks, steps = dict(), []
         try:
-            while True:
-                self.script.loop()
-        except StopIteration:
-            pass
+            for step, instructions in timeline.steps():
+                if steps and not timeline.is_pipelined:
+                    await steps[-1]
+                scheduled = instructions[0].time
+                if not await self._wait_until(scheduled):
+                    break
+                timing = StepTiming(step, scheduled, start=self._now())
+                for instruction in instructions:
+                    tasks[instruction.row] = asyncio.ensure_future(
+                        self._execute_instruction(devices, instruction, tasks, timing)
+                    )
+                rows = [instruction.row for instruction in instructions]
+                steps.append(
+                    asyncio.ensure_future(
+                        self._finish_step(timing, [tasks[row] for row in rows])
+                    )
+                )
+            await asyncio.gather(*steps)
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
         finally:
-            # TODO cleanup
-            pass
+            self._timings.sort(key=lambda timing: timing.step)
+            self._model.update(self._timings)
+
+        if self.is_aborted:
+            logger.info(f"aborted after {len(self._timings)} step(s)")
+        return self.timings
 
     def pause(self):
-        pass
+        """Hold before the next action starts."""
+        if not self.is_paused:
+            self._paused_at = asyncio.get_event_loop().time()
+        self._resumed.clear()
+
+    def resume(self):
+        if self.is_paused:
+            # the rest of the timeline is postponed
+            self._t0 += asyncio.get_event_loop().time() - self._paused_at
+        self._resumed.set()
 
     def abort(self):
-        pass
+        """Stop before the next action starts."""
+        self._aborted.set()
+        # release those that are paused
+        self._resumed.set()
 
     ##
 
@@ -49,6 +194,117 @@ class Dispatcher(object):
     def device_manager(self):
         return self._device_manager
 
+    @property
+    def is_aborted(self) -> bool:
+        return self._aborted.is_set()
+
+    @property
+    def is_paused(self) -> bool:
+        return not self._resumed.is_set()
+
     @property
     def script(self):
         return self._script
+
+    @property
+    def timing_model(self) -> TimingModel:
+        return self._model
+
+    @property
+    def timings(self) -> List[StepTiming]:
+        return list(self._timings)
+
+    ##
+
+    def _reset(self):
+        self._aborted.clear()
+        self._resumed.set()
+        self._timings.clear()
+
+    def _now(self) -> float:
+        return asyncio.get_running_loop().time() - self._t0
+
+    async def _checkpoint(self) -> bool:
+        """
+        Wait while paused.
+
+        Returns:
+            (bool): False if aborted
+        """
+        await self._resumed.wait()
+        return not self.is_aborted
+
+    async def _wait_until(self, scheduled: float) -> bool:
+        """
+        Sleep until the scheduled time since the start, returns early if aborted.
+
+        The deadline is postponed by pauses, including those that begin during the
+        sleep.
+
+        Returns:
+            (bool): False if aborted
+        """
+        while True:
+            if not await self._checkpoint():
+                return False
+            delay = self._t0 + scheduled - asyncio.get_running_loop().time()
+            if delay <= 0:
+                return True
+            try:
+                await asyncio.wait_for(self._aborted.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute_instruction(
+        self, devices, instruction: Instruction, tasks, timing: StepTiming
+    ):
+        if instruction.after:
+            # dependencies are resolved when the task starts, all of them exist by then
+            await asyncio.gather(*(tasks[row] for row in instruction.after))
+        if not await self._checkpoint():
+            return
+        func = getattr(devices[instruction.device], instruction.action)
+        start = self._now()
+        await func(*instruction.args)
+        timing.actions.append(
+            ActionTiming(instruction.device, instruction.action, start, self._now())
+        )
+
+    async def _finish_step(self, timing: StepTiming, tasks):
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            timing.end = self._now()
+            self._timings.append(timing)
+        logger.debug(
+            f"step {timing.step} finished in {timing.elapsed * 1000:.1f} ms, "
+            f"{timing.lag * 1000:.1f} ms late"
+        )
+
+    async def _interpret(self):
+        """
+        Run a script that is not compilable, through setup() and loop().
+
+        The script ends when loop() raises StopIteration. A coroutine cannot propagate
+        StopIteration, an async loop() raises StopAsyncIteration instead.
+        """
+        self._t0 = asyncio.get_running_loop().time()
+        if await self._call(self.script.setup) is _STOP:
+            return
+        while await self._checkpoint():
+            if await self._call(self.script.loop) is _STOP:
+                break
+
+    @staticmethod
+    async def _call(func):
+        """Call a script function, returns _STOP if it requests to stop."""
+        try:
+            result = func()
+        except StopIteration:
+            return _STOP
+        if inspect.isawaitable(result):
+            try:
+                result = await result
+            except StopAsyncIteration:
+                return _STOP
+        return result
@@ -0,0 +1,266 @@
+"""
+Focus surface interpolated from sparse focus measurements.
+"""
+import logging
+from typing import Tuple
+
+import numpy as np
+
+from olive.devices.motion import LinearAxis
+from olive.utils import maybe_await
+
+__all__ = ["FocusGrid", "FocusMap"]
+
+logger = logging.getLogger(__name__)
+
+
+class FocusGrid(object):
+    """
+    Focus surface tabulated over a regular grid, bilinear interpolated.
+
+    Args:
+        x (np.ndarray): x of the nodes, ascending
+        y (np.ndarray): y of the nodes, ascending
+        z (np.ndarray): (len(y), len(x)) focus at the nodes
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, z: np.ndarray):
+        self._x, self._y, self._z = x, y, z
+
+    def __call__(self, x, y) -> np.ndarray:
+        """Focus at (x, y), clamped to the grid."""
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        i, u = self._locate(self._x, x)
+        j, v = self._locate(self._y, y)
+        z = self._z
+        return (
+            z[j, i] * (1 - u) * (1 - v)
+            + z[j, i + 1] * u * (1 - v)
+            + z[j + 1, i] * (1 - u) * v
+            + z[j + 1, i + 1] * u * v
+        )
+
+    ##
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._x
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._y
+
+    @property
+    def z(self) -> np.ndarray:
+        return self._z
+
+    ##
+
+    @staticmethod
+    def _locate(nodes: np.ndarray, t: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Cell of each value, and its fractional position in the cell."""
+        if len(nodes) < 2:
+            return np.zeros(t.shape, dtype=np.intp), np.zeros(t.shape)
+        i = np.clip(np.searchsorted(nodes, t, side="right") - 1, 0, len(nodes) - 2)
+        u = (t - nodes[i]) / (nodes[i + 1] - nodes[i])
+        return i, np.clip(u, 0.0, 1.0)
+
+
+class FocusMap(object):
+    """
+    Focus surface over the sample, fitted by a thin-plate spline.
+
+    Measurements are added incrementally, the kernel matrix grows by a row and a
+    column for each new point, and the spline is solved again on the next query. With
+    less than 3 points, the surface is a least-squares plane, or a constant.
+
+    Args:
+        smoothing (float, optional): regularization, 0 to pass through every point
+        tolerance (float, optional): measurements closer than this replace each other
+    """
+
+    BLOCK_SIZE = 4096  # queries evaluated at once
+
+    def __init__(self, smoothing=0.0, tolerance=1e-6):
+        self._smoothing, self._tolerance = smoothing, tolerance
+
+        self._points = np.empty((0, 2))
+        self._z = np.empty(0)
+        self._kernel = np.empty((0, 0))
+        # weights and affine coefficients, solved on demand
+        self._weights, self._affine = None, None
+        self._version = 0
+
+    def __len__(self):
+        return len(self._z)
+
+    def __call__(self, x, y) -> np.ndarray:
+        """
+        Focus at (x, y).
+
+        Args:
+            x (array-like): x of the queries
+            y (array-like): y of the queries, same shape as x
+        """
+        x, y = np.broadcast_arrays(
+            np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        )
+        queries = np.stack((x.ravel(), y.ravel()), axis=1)
+        return self.evaluate(queries).reshape(x.shape)
+
+    ##
+
+    @property
+    def points(self) -> np.ndarray:
+        """(n, 3) measured (x, y, z)."""
+        return np.column_stack((self._points, self._z))
+
+    @property
+    def version(self) -> int:
+        """Incremented on each update, plans that depend on the map can be redone."""
+        return self._version
+
+    ##
+
+    def add(self, x: float, y: float, z: float):
+        """Add a focus measurement, it replaces an earlier one at the same spot."""
+        p = np.array([x, y], dtype=np.float64)
+        if len(self) > 0:
+            d = np.linalg.norm(self._points - p, axis=1)
+            i = int(np.argmin(d))
+            if d[i] <= self._tolerance:
+                self._z[i] = z
+                self._invalidate()
+                return
+
+        # grow the kernel by the new row and column
+        k = self._phi(np.linalg.norm(self._points - p, axis=1))
+        n = len(self)
+        kernel = np.empty((n + 1, n + 1))
+        kernel[:n, :n] = self._kernel
+        kernel[n, :n] = kernel[:n, n] = k
+        kernel[n, n] = 0.0
+        self._kernel = kernel
+
+        self._points = np.vstack((self._points, p))
+        self._z = np.append(self._z, z)
+        self._invalidate()
+
+    def clear(self):
+        self.__init__(self._smoothing, self._tolerance)
+
+    def evaluate(self, positions) -> np.ndarray:
+        """
+        Focus at each position.
+
+        Args:
+            positions (array-like): (n, 2) positions
+
+        Returns:
+            (np.ndarray): (n,) focus
+        """
+        positions = np.asarray(positions, dtype=np.float64)[:, :2]
+        if len(self) == 0:
+            raise ValueError("focus map has no measurement")
+        self._solve()
+
+        z = positions @ self._affine[1:] + self._affine[0]
+        if self._weights is not None:
+            for i in range(0, len(positions), self.BLOCK_SIZE):
+                block = positions[i : i + self.BLOCK_SIZE]
+                d = np.linalg.norm(
+                    block[:, np.newaxis] - self._points[np.newaxis], axis=-1
+                )
+                z[i : i + len(block)] += self._phi(d) @ self._weights
+        return z
+
+    def tabulate(self, x, y) -> FocusGrid:
+        """
+        Tabulate the surface over a grid, for cheap lookups over large mosaics.
+
+        Args:
+            x (array-like): x of the nodes, ascending
+            y (array-like): y of the nodes, ascending
+        """
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        xx, yy = np.meshgrid(x, y)
+        return FocusGrid(x, y, self(xx, yy))
+
+    def stack(self, positions, layers) -> np.ndarray:
+        """
+        Z positions of a stack at each position, relative to its focus.
+
+        Args:
+            positions (array-like): (n, 2) positions
+            layers (array-like): offsets of the layers from the focus
+
+        Returns:
+            (np.ndarray): (n, layers) z positions
+        """
+        layers = np.asarray(layers, dtype=np.float64)
+        return self.evaluate(positions)[:, np.newaxis] + layers[np.newaxis]
+
+    ##
+
+    async def measure(self, axis: LinearAxis, x: float, y: float):
+        """Add current position of the focus axis as the focus at (x, y)."""
+        self.add(x, y, await maybe_await(axis.get_position()))
+
+    async def move(self, axis: LinearAxis, x: float, y: float):
+        """Move the focus axis to the focus at (x, y)."""
+        await axis.move_absolute(float(self(x, y)))
+
+    async def follow(self, axis: LinearAxis, positions, layers=None):
+        """
+        Queue focus of each position as a trajectory of the focus axis.
+
+        Args:
+            axis (LinearAxis): focus axis
+            positions (array-like): (n, 2) positions, in visiting order
+            layers (array-like, optional): offsets of a stack at each position
+
+        Returns:
+            (TrajectoryProgress): progress of the trajectory
+        """
+        z = self.stack(positions, [0.0] if layers is None else layers)
+        return await axis.move_trajectory(z.ravel())
+
+    ##
+
+    def _invalidate(self):
+        self._weights, self._affine = None, None
+        self._version += 1
+
+    def _solve(self):
+        if self._affine is not None:
+            return
+
+        n = len(self)
+        if n < 3:
+            # least-squares plane, the minimum-norm solution is a constant for 1 point
+            P = np.column_stack((np.ones(n), self._points))
+            centered = P.copy()
+            centered[:, 1:] -= self._points.mean(axis=0)
+            coeffs = np.linalg.lstsq(centered, self._z, rcond=None)[0]
+            coeffs[0] -= coeffs[1:] @ self._points.mean(axis=0)
+            self._weights, self._affine = None, coeffs
+            return
+
+        P = np.column_stack((np.ones(n), self._points))
+        A = np.zeros((n + 3, n + 3))
+        A[:n, :n] = self._kernel + self._smoothing * np.eye(n)
+        A[:n, n:], A[n:, :n] = P, P.T
+        b = np.concatenate((self._z, np.zeros(3)))
+        try:
+            solution = np.linalg.solve(A, b)
+        except np.linalg.LinAlgError:
+            # e.g. collinear points
+            solution = np.linalg.lstsq(A, b, rcond=None)[0]
+        self._weights, self._affine = solution[:n], solution[n:]
+        logger.debug(f"focus map fitted to {n} point(s)")
+
+    @staticmethod
+    def _phi(r: np.ndarray) -> np.ndarray:
+        """Thin-plate kernel, r^2 log(r)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(r > 0, r * r * np.log(r), 0.0)
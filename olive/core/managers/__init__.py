@@ -1,2 +1,3 @@
 from .devices import *
-from .drivers import *
\ No newline at end of file
+from .drivers import *
+from .hotplug import *
@@ -1,13 +1,14 @@
 import asyncio
 import logging
+import time
 from collections.abc import MutableMapping
 from dataclasses import dataclass
 from typing import Dict, Optional, Tuple, Type, Iterable
 
-from olive.devices.base import Device
-from olive.utils import Graph, Singleton
+from olive.devices.base import Device, DeviceRegistry
+from olive.utils import Singleton
 
-from .error import DeviceTimeoutException
+from .error import DeviceManagerException, DeviceTimeoutException
 
 __all__ = ["DeviceManager", "Requirements", "query_device_hierarchy"]
 
@@ -54,7 +55,9 @@ class Requirements(MutableMapping):
 
         # ensure device is correct
         dtype = self._requirements[alias].dtype
-        assert isinstance(device, dtype), f'"{device}" does not belong to "{dtype}"'
+        assert DeviceRegistry().is_subclass(
+            type(device), dtype
+        ), f'"{device}" does not belong to "{dtype}"'
 
         # save it
         self._requirements[alias].instance = device
@@ -71,6 +74,11 @@ class Requirements(MutableMapping):
 
     ##
 
+    @property
+    def dtypes(self) -> Dict[str, Type[Device]]:
+        """Required device type of each alias."""
+        return {alias: entry.dtype for alias, entry in self._requirements.items()}
+
     @property
     def is_satisfied(self):
         return all(device is not None for device in self.values())
@@ -124,25 +132,38 @@ class DeviceManager(metaclass=Singleton):
     """
     Device book-keeping.
 
-    # FIXME
+    Registered devices are opened in background. Devices and their parents form a
+    DAG, a device waits for its parent before opening itself, while independent
+    subtrees are opened concurrently. A parent shared by multiple devices is only
+    requested once. Requests of the same device are executed in order.
+
     >> registration flow
     1) instantiate new device
-    2) register device
-    --
-    2.1) open device
-    2.2) save device to internal list
-    --
-    5) update requirements
-    --
-    5.1) try to assign device
-    5.2) cleanup unused devices
+    2) register device, it is monitored immediately
+    3) open its parent, then the device itself, in background
+    4) await ready() to collect the results
+
+    Unregistered devices are kept opened in a warm pool, they are closed after being
+    idle for IDLE_TIMEOUT seconds. Registering a pooled device reuses its connection.
 
+    Attributes:
+        devices (tuple): monitored devices
+        pool (tuple): opened devices that are not monitored
+        timings (dict): time in seconds to open each device, parents included
     """
 
+    IDLE_TIMEOUT = 60  # s
+
     def __init__(self):
         self._requirements = Requirements()
         self._devices = []
-        self._tasks = []
+        # device -> (kind, task), latest (un)registration request of the device
+        self._tasks = dict()
+        self._timings = dict()
+        # device -> timer to close the idle device
+        self._pool = dict()
+        # alias -> device that was unplugged
+        self._detached = dict()
 
     ##
 
@@ -151,51 +172,100 @@ class DeviceManager(metaclass=Singleton):
         """Monitored devices."""
         return tuple(self._devices)
 
+    @property
+    def requirements(self) -> Requirements:
+        return self._requirements
+
+    @property
+    def pool(self) -> Tuple[Device]:
+        return tuple(self._pool.keys())
+
     @property
     def is_satisfied(self) -> bool:
         """Is the shopping list satisfied?"""
-        return not any(device for device in self._devices if device.device is None)
+        return self._requirements.is_satisfied
+
+    @property
+    def timings(self) -> Dict[Device, float]:
+        return dict(self._timings)
 
     ##
 
-    def register(self, device: Device):
+    def register(self, device: Device) -> asyncio.Task:
         """
         Register and open a device.
 
         Args:
             device (Device): new device
+
+        Returns:
+            (Task): the open request
         """
         logger.debug(f'[REG] "{device}"')
-
-        async def _register():
-            # 1) open
-            await device.open()
-            # 2) register
+        self._unpark(device)
+        if device not in self._devices:
             self._devices.append(device)
+        return self._request_open(device)
 
-        # kick start
-        task = asyncio.create_task(_register())
-        self._tasks.append(task)
-
-    def unregister(self, device: str):
+    def unregister(self, device: Device, keep_alive=True) -> Optional[asyncio.Task]:
         """
-        Unregister and close a device.
+        Unregister a device, and close it when idle for too long.
 
         Args:
             device (Device): device to unregister
+            keep_alive (bool, optional): keep the device in the warm pool, otherwise,
+                close it immediately
+
+        Returns:
+            (Task): the close request, None if the device is kept alive
         """
         logger.debug(f'[UNREG] "{device}"')
         assert device in self._devices, f'"{device}" is not registered'
+        self._devices.remove(device)
+        if keep_alive:
+            self._park(device)
+        else:
+            return self._schedule(device, "close", self._close_device)
+
+    def warm_up(self, device: Device) -> asyncio.Task:
+        """
+        Open a device in background and keep it in the warm pool.
 
-        async def _unregister():
-            # 1) close
-            await device.close()
-            # 2) unregister
-            self._devices.remove(Device)
+        Args:
+            device (Device): device to open, typically just enumerated
+
+        Returns:
+            (Task): the open request
+        """
+        if device in self._devices:
+            return self._request_open(device)
+        self._park(device)
+        return self._request_open(device)
+
+    async def drain(self):
+        """Close all the idle devices in the pool now."""
+        devices = list(self._pool.keys())
+        for device in devices:
+            self._unpark(device)
+        tasks = [
+            self._schedule(device, "close", self._close_device) for device in devices
+        ]
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def close_all(self):
+        """
+        Close all the devices, both monitored and idle ones in the pool.
 
-        # kick start
-        task = asyncio.create_task(_unregister())
-        self._tasks.append(task)
+        Monitored devices stay registered, register them again to reopen.
+        """
+        tasks = [
+            self._schedule(device, "close", self._close_device)
+            for device in self._devices
+        ]
+        await self.drain()
+        if tasks:
+            await asyncio.wait(tasks)
 
     ##
 
@@ -236,8 +306,96 @@ class DeviceManager(metaclass=Singleton):
         device = self._requirements.pop(alias)
         self.unregister(device)
 
+    async def update_inventory(self, added: Iterable[Device], removed: Iterable[Device]):
+        """
+        Apply hot-plug changes.
+
+        Removed devices are detached from their aliases. An added device re-links to
+        the alias it was detached from, if it is the same physical device.
+
+        Args:
+            added (list of Device): new devices, not active
+            removed (list of Device): devices that are unplugged
+        """
+        for device in removed:
+            if device in self._pool:
+                self._unpark(device)
+            elif device in self._devices:
+                self._devices.remove(device)
+            else:
+                continue
+            logger.info(f'"{device}" is unplugged')
+            for alias, instance in list(self._requirements.items()):
+                if instance is device:
+                    del self._requirements[alias]
+                    self._detached[alias] = (type(device), device.info)
+            try:
+                # release what is left, the device itself is no longer reachable
+                await device.close(force=True)
+            except Exception as err:
+                logger.debug(f'unable to close "{device}", due to "{str(err)}"')
+
+        for device in added:
+            aliases = [
+                alias
+                for alias, (klass, _) in self._detached.items()
+                if isinstance(device, klass)
+            ]
+            if aliases:
+                await self._reattach(device, aliases)
+
+    async def _reattach(self, device: Device, aliases: Iterable[str]):
+        """Re-link a replugged device to the alias that it was detached from."""
+        await self._request_open(device)
+        for alias in aliases:
+            _, info = self._detached[alias]
+            if info is not None and info.serial_number and info == device.info:
+                logger.info(f'"{device}" is replugged, re-link to "{alias}"')
+                del self._detached[alias]
+                self._requirements[alias] = device
+                self._devices.append(device)
+                return
+        # not the one we are looking for, but it may be linked later
+        self._park(device)
+
     ##
 
+    async def ready(self, timeout=None) -> Dict[Device, float]:
+        """
+        Wait until (un)registration requests are finished.
+
+        Args:
+            timeout (float, optional): timeout in seconds, wait indefinitely if None
+
+        Returns:
+            (dict of Device: float): time in seconds to open each device
+
+        Raises:
+            DeviceTimeoutException: requests are not finished in time
+            DeviceManagerException: some requests failed
+        """
+        requests = {task: device for device, (_, task) in self._tasks.items()}
+        if requests:
+            _, pending = await asyncio.wait(requests.keys(), timeout=timeout)
+            if pending:
+                devices = [requests[task] for task in pending]
+                raise DeviceTimeoutException(f"timeout occurs for {devices}")
+
+            # finished requests are no longer tracked
+            for device, (_, task) in list(self._tasks.items()):
+                if task in requests:
+                    del self._tasks[device]
+
+            failed = []
+            for task, device in requests.items():
+                if not task.cancelled() and task.exception() is not None:
+                    logger.error(f'"{device}" failed, due to "{str(task.exception())}"')
+                    failed.append(device)
+            if failed:
+                raise DeviceManagerException(f"{len(failed)} request(s) failed")
+
+        return self.timings
+
     async def wait_ready(self, timeout=5):
         """
         Wait until (un)registration requests are finished.
@@ -245,11 +403,67 @@ class DeviceManager(metaclass=Singleton):
         Args:
             timeout (int, optional): timeout in seconds
         """
+        await self.ready(timeout)
+
+    ##
+
+    def _schedule(self, device: Device, kind: str, func) -> asyncio.Task:
+        """Queue a request after the latest request of the device."""
+        _, previous = self._tasks.get(device, (None, None))
+
+        async def request():
+            if previous is not None:
+                # result of the previous request is reported by itself
+                await asyncio.wait([previous])
+            return await func(device)
+
+        task = asyncio.ensure_future(request())
+        self._tasks[device] = (kind, task)
+        return task
+
+    def _request_open(self, device: Device) -> asyncio.Task:
+        """Request to open a device, pending and fulfilled requests are shared."""
+        kind, task = self._tasks.get(device, (None, None))
+        if kind == "open":
+            if not task.done():
+                return task
+            elif (
+                not task.cancelled() and task.exception() is None and device.is_opened
+            ):
+                return task
+        return self._schedule(device, "open", self._open_device)
+
+    async def _open_device(self, device: Device):
+        # parent first, siblings wait for the same request
+        if device.parent is not None:
+            await self._request_open(device.parent)
+
+        t0 = time.perf_counter()
+        await device.open()
+        self._timings[device] = time.perf_counter() - t0
+        logger.debug(f'"{device}" opened in {self._timings[device]*1000:.1f} ms')
+
+    def _park(self, device: Device):
+        """Put a device in the warm pool, restart its idle timer."""
+        self._unpark(device)
         loop = asyncio.get_event_loop()
-        future = asyncio.wait(*self._tasks, timeout=timeout)
-        done, pending = loop.run_until_complete(future)
-        if len(pending) > 0:
-            raise DeviceTimeoutException(f"timeout occurs for {pending}")
+        self._pool[device] = loop.call_later(self.IDLE_TIMEOUT, self._expire, device)
+        logger.debug(f'"{device}" is kept warm for {self.IDLE_TIMEOUT} s')
+
+    def _unpark(self, device: Device):
+        try:
+            self._pool.pop(device).cancel()
+        except KeyError:
+            pass
+
+    def _expire(self, device: Device):
+        logger.debug(f'"{device}" is idle for too long, closing')
+        del self._pool[device]
+        self._schedule(device, "close", self._close_device)
+
+    async def _close_device(self, device: Device):
+        await device.close()
+        self._timings.pop(device, None)
 
 
 def query_device_hierarchy():
@@ -259,14 +473,4 @@ def query_device_hierarchy():
     Returns:
         (func): a function that can find the shortest inheritance path
     """
-    # build graph
-    g = Graph((Device,) + Device.__subclasses__())
-    for device_klass in g.nodes:
-        g.add_edges(device_klass, device_klass.__subclasses__())
-
-    def query_func(device):
-        """Find the shortest path but drop the root."""
-        path = g.find_path(Device, device)
-        return tuple(path[1:])
-
-    return query_func
+    return DeviceRegistry().get_path
@@ -1,40 +1,88 @@
+import asyncio
+from dataclasses import dataclass
 import importlib
-import itertools
+import importlib.util
+import json
 import logging
-from typing import List, Optional, Tuple
+import os
+import pkgutil
+import time
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
 
+import olive.devices
 import olive.drivers  # preload
 from olive.devices.base import Device, DeviceType
 from olive.drivers.base import Driver
 from olive.drivers.error import InitializeError, ShutdownError
 from olive.utils import Singleton, enumerate_namespace_classes
 
+from .devices import DeviceManager
+
 __all__ = ["DriverManager"]
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class DriverEntry:
+    name: str
+    module: str
+    device_klasses: Tuple[DeviceType]
+    instance: Optional[Driver] = None
+    init_time: Optional[float] = None  # s
+    error: Optional[str] = None  # reason of quarantine
+
+    @property
+    def is_loaded(self):
+        return self.instance is not None
+
+    @property
+    def is_quarantined(self):
+        return self.error is not None
+
+
 class DriverManager(metaclass=Singleton):
     """
     Driver bookkeeping.
 
+    Drivers are discovered through the manifest of each driver package, a driver
+    module is not imported until a device category it supports is queried. Drivers
+    are initialized concurrently, those failed or timed out are quarantined until
+    next refresh.
+
     Todo:
         - blacklist
         - driver reload
 
     Attributes:
         drivers (tuple): a list of known drivers
-            This will return everything.
+            This will return everything, loaded or not.
+        inventory (tuple): devices found by loaded drivers in last enumeration
     """
 
+    MANIFEST = "manifest.json"
+    INIT_TIMEOUT = 10  # s
+
     def __init__(self):
-        # list device categories
-        self._drivers = {klass: [] for klass in Device.__subclasses__()}
-        self.refresh()
+        self._entries = self._discover_drivers()
 
     ##
 
-    def refresh(self, force_reload=False):
+    @property
+    def drivers(self) -> Tuple[DriverEntry]:
+        return tuple(self._entries)
+
+    @property
+    def inventory(self) -> Tuple[Device]:
+        devices = []
+        for entry in self._entries:
+            if entry.is_loaded:
+                devices.extend(entry.instance.devices)
+        return tuple(devices)
+
+    ##
+
+    async def refresh(self, force_reload=False):
         """
         Refresh known driver list.
 
@@ -42,66 +90,263 @@ class DriverManager(metaclass=Singleton):
             force_reload (bool, optional): force active drivers being reload
         """
         # shutdown active drivers
-        active_drivers = self._shutdown_all_drivers(force_reload)
-        active_driver_classes = [type(driver) for driver in active_drivers]
+        active_drivers = await self._shutdown_all_drivers(force_reload)
+        active_driver_classes = {type(driver): driver for driver in active_drivers}
 
-        # reload the namespace module
-        importlib.reload(olive.drivers)
+        entries = self._discover_drivers()
 
-        # enumerate direct descendents of Driver, and ignore itself
-        driver_klasses = enumerate_namespace_classes(
-            olive.drivers, lambda x: issubclass(x, Driver) and x != Driver
-        )
-        logger.info(f"found {len(driver_klasses)} driver(s)")
+        # keep drivers that are still active
+        for entry in entries:
+            for klass, driver in active_driver_classes.items():
+                if klass.__name__ == entry.name and klass.__module__ == entry.module:
+                    logger.debug(f'"{entry.name}" is already initialized')
+                    entry.instance = driver
 
-        logger.info("categorizing drivers by their supported devices")
-        for driver_klass in driver_klasses:
-            driver_name = driver_klass.__name__
+        self._entries = entries
 
-            if driver_klass not in active_driver_classes:
-                try:
-                    driver = driver_klass()
-                    driver.initialize()
-                except InitializeError as err:
-                    logger.error(
-                        f'unable to initialize {driver_name}, due to "{str(err)}"'
-                    )
-                    continue
-            else:
-                logger.debug(f'"{driver_name}" is already initialized')
+    async def initialize(self, device_klass: Optional[DeviceType] = None, timeout=None):
+        """
+        Load and initialize drivers of a device category concurrently.
+
+        Args:
+            device_klass (Device, optional): category of interest, if None, load all
+            timeout (float, optional): timeout in seconds for each driver
+
+        Note:
+            Timeout only isolates initializers that yield to the loop, see
+            `_load_driver`.
+        """
+        if timeout is None:
+            timeout = self.INIT_TIMEOUT
+
+        entries = [
+            entry
+            for entry in self._query_entries(device_klass)
+            if not (entry.is_loaded or entry.is_quarantined)
+        ]
+        if not entries:
+            return
+
+        tasks = [self._load_driver(entry, timeout) for entry in entries]
+        await asyncio.gather(*tasks)
+
+        self._report(entries)
 
-            self._add_driver(driver)
+    async def query_drivers(
+        self, device_klass: Optional[DeviceType] = None
+    ) -> Tuple[Driver]:
+        """
+        Return drivers of a device category, drivers are loaded on demand.
+
+        Args:
+            device_klass (Device, optional): category of interest, if None, return all
+        """
+        await self.initialize(device_klass)
+        return tuple(
+            entry.instance
+            for entry in self._query_entries(device_klass)
+            if entry.is_loaded
+        )
 
-    def query_drivers(self, device_klass: Optional[DeviceType] = None) -> Tuple[Driver]:
+    async def enumerate_all(
+        self,
+        device_klass: Optional[DeviceType] = None,
+        ports: Optional[Iterable[str]] = None,
+        keep_warm=False,
+        loaded_only=False,
+    ) -> AsyncIterator[Device]:
         """
-        Return drivers of a device category.
+        Enumerate devices of all drivers concurrently, devices are yielded as soon as
+        they are found.
+
+        Serial ports are shared by all drivers through the SerialPortManager, therefore,
+        a physical port is only probed by one driver at a time, while slower buses do
+        not hold back the others.
 
         Args:
             device_klass (Device, optional): category of interest, if None, return all
+            ports (list of str, optional): only probe these ports, if None, probe all
+            keep_warm (bool, optional): open found devices in background, and keep
+                them in the warm pool of the DeviceManager
+            loaded_only (bool, optional): only use drivers that are already loaded,
+                e.g. to probe new ports without loading every driver
+
+        Note:
+            Yielded devices are NOT active yet, unless they are kept warm.
         """
-        if device_klass is None:
-            return tuple(set(itertools.chain.from_iterable(self._drivers.values())))
+        if loaded_only:
+            drivers = tuple(
+                entry.instance
+                for entry in self._query_entries(device_klass)
+                if entry.is_loaded
+            )
         else:
-            return tuple(self._drivers[device_klass])
+            drivers = await self.query_drivers(device_klass)
+        if not drivers:
+            return
+
+        queue = asyncio.Queue()
+
+        async def enumerate_devices(driver):
+            try:
+                async for device in driver.iter_devices(ports):
+                    await queue.put(device)
+            except Exception as err:
+                # a broken driver should not abort the entire enumeration
+                logger.error(f'{driver} failed to enumerate, due to "{str(err)}"')
+            finally:
+                await queue.put(driver)
+
+        tasks = [asyncio.ensure_future(enumerate_devices(driver)) for driver in drivers]
+        try:
+            n_pending = len(tasks)
+            while n_pending > 0:
+                item = await queue.get()
+                if isinstance(item, Driver):
+                    # the driver has finished its enumeration
+                    n_pending -= 1
+                elif device_klass is None or isinstance(item, device_klass):
+                    if keep_warm:
+                        DeviceManager().warm_up(item)
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
 
     ##
 
-    def _add_driver(self, driver: Driver):
+    def _discover_drivers(self) -> List[DriverEntry]:
+        """Discover drivers in the namespace."""
+        entries = []
+        for _, name, is_pkg in pkgutil.iter_modules(
+            olive.drivers.__path__, olive.drivers.__name__ + "."
+        ):
+            if not is_pkg:
+                # helper modules of the namespace
+                continue
+            try:
+                entries.extend(self._read_manifest(name))
+            except FileNotFoundError:
+                logger.debug(f'"{name}" has no manifest, import it now')
+                entries.extend(self._import_package(name))
+        logger.info(f"found {len(entries)} driver(s)")
+        return entries
+
+    def _query_entries(self, device_klass: Optional[DeviceType]) -> List[DriverEntry]:
+        return [
+            entry
+            for entry in self._entries
+            if device_klass is None or device_klass in entry.device_klasses
+        ]
+
+    def _read_manifest(self, pkg_name) -> List[DriverEntry]:
+        """
+        Read driver manifest of a driver package without importing it.
+
+        Args:
+            pkg_name (str): fully qualified name of the driver package
+        """
+        spec = importlib.util.find_spec(pkg_name)
+        path = os.path.join(spec.submodule_search_locations[0], self.MANIFEST)
+        with open(path, "r") as fd:
+            manifest = json.load(fd)
+
+        entries = []
+        for driver in manifest.get("drivers", []):
+            device_klasses = []
+            for device_name in driver["devices"]:
+                try:
+                    device_klasses.append(getattr(olive.devices, device_name))
+                except AttributeError:
+                    logger.warning(
+                        f'"{driver["name"]}" claims unknown device "{device_name}"'
+                    )
+            entry = DriverEntry(driver["name"], driver["module"], tuple(device_klasses))
+            logger.debug(f"{entry.name} -> {len(entry.device_klasses)} device type(s)")
+            entries.append(entry)
+        return entries
+
+    def _import_package(self, pkg_name) -> List[DriverEntry]:
+        """
+        Import a driver package and categorize its drivers immediately.
+
+        Args:
+            pkg_name (str): fully qualified name of the driver package
+        """
+        pkg = importlib.import_module(pkg_name)
+        # enumerate direct descendents of Driver, and ignore itself
+        driver_klasses = enumerate_namespace_classes(
+            pkg, lambda x: issubclass(x, Driver) and x != Driver
+        )
+        return [
+            DriverEntry(
+                klass.__name__,
+                klass.__module__,
+                klass.enumerate_supported_device_types(),
+            )
+            for klass in driver_klasses
+        ]
+
+    async def _load_driver(self, entry: DriverEntry, timeout):
         """
-        Add new driver to book-keep.
+        Import, instantiate and initialize a driver.
+
+        Failed driver is quarantined, instead of raising the exception.
+
+        Import and instantiation run in the default executor. `Driver.initialize` runs
+        on the loop, therefore, a driver that hangs in a blocking call there freezes
+        every other driver, and the timeout only fires after the call returns. Such
+        drivers should wrap their blocking SDK calls in `loop.run_in_executor`.
 
         Args:
-            driver (Driver): the driver
+            entry (DriverEntry): the driver to load
+            timeout (float): timeout in seconds
         """
-        device_klasses = driver.enumerate_supported_device_types()
-        logger.debug(f"{type(driver).__name__} -> {len(device_klasses)} device type(s)")
-        for device_klass in device_klasses:
-            logger.debug(f".. {device_klass.__name__}")
-            self._drivers[device_klass].append(driver)
+        logger.debug(f'loading "{entry.name}" from "{entry.module}"')
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._initialize_driver(entry), timeout)
+        except asyncio.TimeoutError:
+            entry.error = f"timeout after {timeout} s"
+        except (ImportError, AttributeError) as err:
+            entry.error = f'unable to import, due to "{str(err)}"'
+        except InitializeError as err:
+            entry.error = f'unable to initialize, due to "{str(err)}"'
+        except Exception as err:
+            entry.error = f'unexpected "{type(err).__name__}: {str(err)}"'
+        entry.init_time = time.perf_counter() - t0
+
+        if entry.is_quarantined:
+            logger.error(f"{entry.name} quarantined, {entry.error}")
 
-    def _shutdown_all_drivers(self, force_shutdown=False) -> List[Driver]:
+    async def _initialize_driver(self, entry: DriverEntry):
+        # vendor SDKs may take a while to import, do not block the loop
+        loop = asyncio.get_running_loop()
+        module = await loop.run_in_executor(
+            None, importlib.import_module, entry.module
+        )
+        driver_klass = getattr(module, entry.name)
+
+        device_klasses = set(driver_klass.enumerate_supported_device_types())
+        if device_klasses != set(entry.device_klasses):
+            logger.warning(f"manifest of {entry.name} does not match its implementation")
+
+        # constructors may load vendor libraries as well
+        driver = await loop.run_in_executor(None, driver_klass)
+        await driver.initialize()
+        entry.instance = driver
+
+    def _report(self, entries: List[DriverEntry]):
+        """Summarize initialization results."""
+        lines = []
+        for entry in sorted(entries, key=lambda x: x.init_time, reverse=True):
+            status = "QUARANTINED" if entry.is_quarantined else "OK"
+            lines.append(f"{entry.name:<32} {status:<12} {entry.init_time*1000:8.1f} ms")
+        logger.info("driver initialization report\n" + "\n".join(lines))
+
+    async def _shutdown_all_drivers(self, force_shutdown=False) -> List[Driver]:
         """
-        Shutdown all enlisted drivers.
+        Shutdown all loaded drivers.
 
         Args:
             force_shutdown (bool, optional): force active drivers being shutdown
@@ -109,21 +354,23 @@ class DriverManager(metaclass=Singleton):
         Returns:
             (list of Driver) drivers that are still active
         """
-        drivers = self.query_drivers()
+        drivers = [entry.instance for entry in self._entries if entry.is_loaded]
 
-        # shutdown all drivers
-        active_drivers = []
-        for driver in drivers:
-            if driver.is_active:
-                logger.warning(f"{driver} is still active")
-            else:
-                try:
-                    driver.shudown()
-                    continue
-                except ShutdownError as err:
-                    logger.error(f'{driver} failed to shutdown, due to "{str(err)}"')
-            # if we are here, the driver does _not_ shutdown completely
-            active_drivers.append(driver)
+        # shutdown all inactive drivers
+        active_drivers = [driver for driver in drivers if driver.is_active]
+        for driver in active_drivers:
+            logger.warning(f"{driver} is still active")
+
+        inactive_drivers = [driver for driver in drivers if not driver.is_active]
+        tasks = [driver.shutdown() for driver in inactive_drivers]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for driver, result in zip(inactive_drivers, results):
+            if isinstance(result, ShutdownError):
+                logger.error(f'{driver} failed to shutdown, due to "{str(result)}"')
+                # the driver does _not_ shutdown completely
+                active_drivers.append(driver)
+            elif isinstance(result, Exception):
+                raise result
 
         if len(active_drivers) > 0:
             if force_shutdown:
@@ -134,7 +381,7 @@ class DriverManager(metaclass=Singleton):
                 logger.debug(f"{len(active_drivers)} driver(s) are still active")
 
         # clear all enlisted drivers
-        for drivers in self._drivers.values():
-            del drivers[:]
+        for entry in self._entries:
+            entry.instance = None
 
         return active_drivers
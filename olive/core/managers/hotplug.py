@@ -0,0 +1,177 @@
+import asyncio
+from dataclasses import dataclass
+import logging
+from typing import Callable, Optional, Tuple
+
+from olive.devices.base import Device
+from olive.drivers.utils import SerialPortManager
+from olive.utils import Singleton
+
+from .devices import DeviceManager
+from .drivers import DriverManager
+
+try:
+    import pyudev
+except ImportError:
+    pyudev = None
+
+__all__ = ["HotplugMonitor", "InventoryDiff"]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class InventoryDiff:
+    added_ports: Tuple[str]
+    removed_ports: Tuple[str]
+    added: Tuple[Device]
+    removed: Tuple[Device]
+
+    def __bool__(self):
+        return bool(self.added or self.removed)
+
+
+class HotplugMonitor(metaclass=Singleton):
+    """
+    Watch serial ports and update the inventory incrementally.
+
+    Port changes are delivered by udev if pyudev is available, otherwise, ports are
+    polled. Only the affected ports are probed, devices on other ports are left
+    untouched. Ports are probed by drivers that are loaded, or asked for by the
+    requirements, other drivers stay unloaded. Changes are applied to the
+    DeviceManager before subscribers are notified.
+    """
+
+    POLL_INTERVAL = 2  # s
+    SETTLE_TIME = 0.5  # s, udev events come in bursts
+
+    def __init__(self):
+        self._callbacks = []
+        self._task = None
+
+    ##
+
+    @property
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    ##
+
+    def subscribe(self, callback: Callable[[InventoryDiff], None]):
+        """
+        Get notified when the inventory changes.
+
+        Args:
+            callback (callable): called with an InventoryDiff, coroutine functions are
+                awaited
+        """
+        if callback not in self._callbacks:
+            self._callbacks.append(callback)
+
+    def unsubscribe(self, callback: Callable[[InventoryDiff], None]):
+        self._callbacks.remove(callback)
+
+    ##
+
+    def start(self):
+        """Start watching in background."""
+        if self.is_running:
+            return
+        if pyudev is None:
+            logger.info("pyudev is not available, fallback to polling")
+            watch = self._watch_ports
+        else:
+            watch = self._watch_udev
+        self._task = asyncio.ensure_future(watch())
+
+    async def stop(self):
+        if not self.is_running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def update(self) -> Optional[InventoryDiff]:
+        """
+        Rescan the ports, and probe those that changed.
+
+        Returns:
+            (InventoryDiff): changes of the inventory, None if no port has changed
+        """
+        added_ports, removed_ports = SerialPortManager().refresh()
+        if not (added_ports or removed_ports):
+            return None
+        logger.info(f"port(s) added {added_ports}, removed {removed_ports}")
+
+        drv_mgr = DriverManager()
+
+        # devices on removed ports are gone
+        removed = []
+        for entry in drv_mgr.drivers:
+            if entry.is_loaded:
+                removed.extend(entry.instance.forget_ports(removed_ports))
+
+        added = []
+        if added_ports:
+            for dtype in set(DeviceManager().requirements.dtypes.values()):
+                await drv_mgr.initialize(dtype)
+            async for device in drv_mgr.enumerate_all(
+                ports=added_ports, loaded_only=True
+            ):
+                added.append(device)
+
+        diff = InventoryDiff(added_ports, removed_ports, tuple(added), tuple(removed))
+        if diff:
+            await DeviceManager().update_inventory(diff.added, diff.removed)
+            await self._publish(diff)
+        return diff
+
+    ##
+
+    async def _publish(self, diff: InventoryDiff):
+        for callback in self._callbacks:
+            try:
+                result = callback(diff)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                logger.exception(f"{callback} failed to process inventory changes")
+
+    async def _update(self):
+        """Update without terminating the watcher."""
+        try:
+            await self.update()
+        except Exception:
+            logger.exception("unable to update the inventory")
+
+    async def _watch_ports(self):
+        while True:
+            await asyncio.sleep(self.POLL_INTERVAL)
+            await self._update()
+
+    async def _watch_udev(self):
+        monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+        monitor.filter_by(subsystem="tty")
+        monitor.start()
+
+        event = asyncio.Event()
+
+        def drain_events():
+            while monitor.poll(timeout=0) is not None:
+                pass
+            event.set()
+
+        loop = asyncio.get_running_loop()
+        loop.add_reader(monitor.fileno(), drain_events)
+        try:
+            while True:
+                await event.wait()
+                # coalesce the burst
+                await asyncio.sleep(self.SETTLE_TIME)
+                event.clear()
+                await self._update()
+        finally:
+            loop.remove_reader(monitor.fileno())
@@ -0,0 +1,245 @@
+"""
+Visiting order of stage positions, e.g. tiles of a mosaic or wells of a plate.
+"""
+from dataclasses import dataclass
+from enum import auto, Enum
+import logging
+from typing import Optional, Sequence
+
+import numpy as np
+
+from olive.devices.motion import Axis, MotionController, estimate_move_time
+from olive.utils import maybe_await
+
+__all__ = ["PathOrder", "TilePath", "TilePlanner", "grid_positions"]
+
+logger = logging.getLogger(__name__)
+
+
+class PathOrder(Enum):
+    Serpentine = auto()  # row by row, alternating direction
+    NearestNeighbor = auto()
+    TwoOpt = auto()  # nearest neighbor, refined by 2-opt
+
+
+def grid_positions(origin, size, fov, overlap=0.1) -> np.ndarray:
+    """
+    Tile centers that cover a rectangular region.
+
+    Args:
+        origin (tuple of float): (x, y) corner of the region
+        size (tuple of float): (width, height) of the region
+        fov (tuple of float): (width, height) of a tile
+        overlap (float, optional): overlap between adjacent tiles, as a fraction
+
+    Returns:
+        (np.ndarray): (tiles, 2) positions, row by row
+    """
+    origin, size, fov = (np.asarray(v, dtype=np.float64) for v in (origin, size, fov))
+    pitch = fov * (1 - overlap)
+    n = np.maximum(np.ceil((size - fov) / pitch).astype(int) + 1, 1)
+    x = origin[0] + fov[0] / 2 + np.arange(n[0]) * pitch[0]
+    y = origin[1] + fov[1] / 2 + np.arange(n[1]) * pitch[1]
+    xx, yy = np.meshgrid(x, y)
+    return np.stack((xx.ravel(), yy.ravel()), axis=1)
+
+
+@dataclass(frozen=True)
+class TilePath:
+    positions: np.ndarray  # (points, axes), in visiting order
+    order: np.ndarray  # index of each visited point in the original positions
+    move_times: np.ndarray  # s, time to reach each point from the previous one
+
+    @property
+    def total_time(self) -> float:
+        return float(self.move_times.sum())
+
+    async def move(
+        self,
+        axes: Sequence[Axis],
+        controller: Optional[MotionController] = None,
+        triggers=None,
+    ):
+        """
+        Queue the path as a trajectory.
+
+        Args:
+            axes (list of Axis): axes to move, in the order of position columns
+            controller (MotionController, optional): controller of the axes, required
+                by multiple axes
+            triggers (array-like of bool, optional): output a trigger on each point
+
+        Returns:
+            (TrajectoryProgress): progress of the trajectory
+        """
+        if controller is None:
+            if len(axes) > 1:
+                raise ValueError("multiple axes require their controller")
+            return await axes[0].move_trajectory(
+                self.positions[:, 0], triggers=triggers
+            )
+        return await controller.move_trajectory(
+            axes, self.positions, triggers=triggers
+        )
+
+
+class TilePlanner(object):
+    """
+    Plan the visiting order of positions to minimize stage travel time.
+
+    Axes move concurrently, a move takes as long as the slowest axis, by a
+    trapezoidal velocity profile plus the settle time.
+
+    Args:
+        velocity (array-like): maximum velocity of each axis
+        acceleration (array-like): acceleration of each axis
+        settle (float, optional): time to settle after each move in seconds
+    """
+
+    BLOCK_SIZE = 1024  # rows of a block of pairwise costs
+
+    def __init__(self, velocity, acceleration, settle=0.0):
+        self._velocity = np.atleast_1d(np.asarray(velocity, dtype=np.float64))
+        self._acceleration = np.atleast_1d(np.asarray(acceleration, dtype=np.float64))
+        self._settle = settle
+
+    @classmethod
+    async def from_axes(cls, axes: Sequence[Axis], settle=0.0) -> "TilePlanner":
+        """Use velocity and acceleration currently set on the axes."""
+        velocity, acceleration = [], []
+        for axis in axes:
+            velocity.append(await maybe_await(axis.get_velocity()))
+            acceleration.append(await maybe_await(axis.get_acceleration()))
+        return cls(velocity, acceleration, settle)
+
+    ##
+
+    def cost(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Time to move from a to b.
+
+        Args:
+            a (np.ndarray): (..., axes) start positions
+            b (np.ndarray): (..., axes) end positions, broadcastable with a
+        """
+        t = estimate_move_time(b - a, self._velocity, self._acceleration).max(axis=-1)
+        return np.where(t > 0, t + self._settle, 0.0)
+
+    def plan(
+        self,
+        positions,
+        order: PathOrder = PathOrder.TwoOpt,
+        start=None,
+        max_passes=10,
+    ) -> TilePath:
+        """
+        Plan the visiting order.
+
+        Args:
+            positions (array-like): (points, axes) positions
+            order (PathOrder, optional): ordering strategy
+            start (array-like, optional): current position, first position if None
+            max_passes (int, optional): maximum 2-opt passes over the path
+
+        Returns:
+            (TilePath): positions in visiting order
+
+        Raises:
+            ValueError: no positions to visit
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        if positions.ndim == 1:
+            positions = positions[:, np.newaxis]
+        if positions.ndim != 2 or len(positions) == 0:
+            raise ValueError("positions have to be a non-empty (points, axes) array")
+        start = (
+            positions[0] if start is None else np.asarray(start, dtype=np.float64)
+        )
+
+        if len(positions) < 2:
+            path = np.arange(len(positions))
+        elif order == PathOrder.Serpentine:
+            path = self._serpentine(positions)
+        else:
+            path = self._nearest_neighbor(positions, start)
+            if order == PathOrder.TwoOpt:
+                path = self._two_opt(positions, path, start, max_passes)
+
+        ordered = positions[path]
+        previous = np.concatenate((start[np.newaxis], ordered[:-1]))
+        result = TilePath(ordered, path, self.cost(previous, ordered))
+        logger.info(
+            f"{len(path)} position(s) in {order.name} order, "
+            f"{result.total_time:.2f} s estimated travel"
+        )
+        return result
+
+    ##
+
+    def _serpentine(self, positions: np.ndarray) -> np.ndarray:
+        """Group positions into rows by their y, alternate direction of each row."""
+        y = positions[:, 1] if positions.shape[1] > 1 else np.zeros(len(positions))
+        by_y = np.argsort(y, kind="stable")
+        # rows break where y jumps more than half of the typical spacing
+        gaps = np.diff(y[by_y])
+        breaks = np.flatnonzero(gaps > self._median_spacing(positions) / 2) + 1
+
+        path = []
+        for i, row in enumerate(np.split(by_y, breaks)):
+            row = row[np.argsort(positions[row, 0], kind="stable")]
+            path.append(row[::-1] if i % 2 else row)
+        return np.concatenate(path)
+
+    def _median_spacing(self, positions: np.ndarray) -> float:
+        """Median distance to the nearest neighbor."""
+        nearest = np.empty(len(positions))
+        for i in range(0, len(positions), self.BLOCK_SIZE):
+            block = positions[i : i + self.BLOCK_SIZE]
+            d = np.linalg.norm(block[:, np.newaxis] - positions[np.newaxis], axis=-1)
+            d[np.arange(len(block)), np.arange(i, i + len(block))] = np.inf
+            nearest[i : i + len(block)] = d.min(axis=1)
+        return float(np.median(nearest))
+
+    def _nearest_neighbor(self, positions: np.ndarray, start) -> np.ndarray:
+        n = len(positions)
+        visited = np.zeros(n, dtype=bool)
+        path = np.empty(n, dtype=np.intp)
+        current = start
+        for i in range(n):
+            cost = self.cost(current, positions)
+            cost[visited] = np.inf
+            path[i] = j = int(np.argmin(cost))
+            visited[j] = True
+            current = positions[j]
+        return path
+
+    def _two_opt(self, positions, path, start, max_passes) -> np.ndarray:
+        """
+        Reverse segments of an open path while it shortens the path.
+
+        The path starts from a fixed point, so a segment can also be reversed until the
+        end of the path.
+        """
+        # the fixed start is the 0-th point of the tour
+        points = np.concatenate((start[np.newaxis], positions[path]))
+        tour = np.concatenate(([-1], path))
+        n = len(tour)
+
+        for _ in range(max_passes):
+            improved = False
+            for i in range(n - 2):
+                a, b = points[i], points[i + 1]
+                # swap edges (i, i+1) and (j, j+1) for all j at once
+                c, d = points[i + 2 :], np.concatenate((points[i + 3 :], [points[-1]]))
+                delta = self.cost(a, c) - self.cost(a, b)
+                # edge (j, j+1) does not exist beyond the end
+                delta[:-1] += self.cost(b, d[:-1]) - self.cost(c[:-1], d[:-1])
+                j = int(np.argmin(delta))
+                if delta[j] < -1e-12:
+                    j += i + 2
+                    points[i + 1 : j + 1] = points[i + 1 : j + 1][::-1].copy()
+                    tour[i + 1 : j + 1] = tour[i + 1 : j + 1][::-1].copy()
+                    improved = True
+            if not improved:
+                break
+        return tour[1:]
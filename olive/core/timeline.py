@@ -0,0 +1,278 @@
+import logging
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from olive.scripts.base import ChannelsFeature, Script, TimeSeriesFeature
+
+__all__ = ["Instruction", "Timeline", "TimelineCompiler"]
+
+logger = logging.getLogger(__name__)
+
+INSTRUCTION_DTYPE = np.dtype(
+    [
+        ("time", np.float64),  # s, scheduled start since the beginning
+        ("step", np.uint32),  # acquisition cycle the instruction belongs to
+        ("device", np.uint16),  # index in Timeline.devices
+        ("action", np.uint16),  # index in Timeline.actions
+        ("args", np.uint32),  # index in Timeline.args
+        ("duration", np.float64),  # s, expected
+    ]
+)
+
+
+class Instruction(NamedTuple):
+    row: int
+    time: float
+    step: int
+    device: str
+    action: str
+    args: Tuple[Any]
+    duration: float
+    after: Tuple[int]  # rows that have to finish first
+
+
+class Timeline(object):
+    """
+    Flat, time-sorted instruction table of a compiled script.
+
+    Device aliases, action names and arguments are interned, so the table itself only
+    holds numbers. Dependencies are listed per row. Steps are separated by barriers,
+    dependencies only refer to rows in the same step, unless the timeline is
+    pipelined, where steps may overlap and every constraint is an explicit dependency.
+
+    Args:
+        table (np.ndarray): instructions, INSTRUCTION_DTYPE
+        devices (tuple of str): device aliases
+        actions (tuple of str): action names
+        args (tuple of tuple): arguments
+        dependencies (tuple of tuple of int): rows that each row depends on
+        releases (np.ndarray, optional): earliest start of each step in seconds
+        is_pipelined (bool, optional): steps are not separated by barriers
+    """
+
+    def __init__(
+        self,
+        table: np.ndarray,
+        devices,
+        actions,
+        args,
+        dependencies,
+        releases: Optional[np.ndarray] = None,
+        is_pipelined=False,
+    ):
+        self._table = table
+        self._devices, self._actions, self._args = devices, actions, args
+        self._dependencies = dependencies
+        if releases is None:
+            releases = np.zeros(self.n_steps)
+        self._releases = releases
+        self._is_pipelined = is_pipelined
+
+    def __len__(self):
+        return len(self._table)
+
+    def __iter__(self) -> Iterator[Instruction]:
+        for row in range(len(self._table)):
+            yield self[row]
+
+    def __getitem__(self, row) -> Instruction:
+        time, step, device, action, args, duration = self._table[row].item()
+        return Instruction(
+            row,
+            time,
+            step,
+            self._devices[device],
+            self._actions[action],
+            self._args[args],
+            duration,
+            self._dependencies[row],
+        )
+
+    ##
+
+    @property
+    def actions(self) -> Tuple[str]:
+        return self._actions
+
+    @property
+    def args(self) -> Tuple[Tuple[Any]]:
+        return self._args
+
+    @property
+    def dependencies(self) -> Tuple[Tuple[int]]:
+        return self._dependencies
+
+    @property
+    def devices(self) -> Tuple[str]:
+        return self._devices
+
+    @property
+    def duration(self) -> float:
+        """Expected duration of the entire timeline in seconds."""
+        if len(self._table) == 0:
+            return 0.0
+        end = self._table["time"] + self._table["duration"]
+        return float(end.max())
+
+    @property
+    def is_pipelined(self) -> bool:
+        return self._is_pipelined
+
+    @property
+    def n_steps(self) -> int:
+        if len(self._table) == 0:
+            return 0
+        return int(self._table["step"].max()) + 1
+
+    @property
+    def releases(self) -> np.ndarray:
+        """Earliest start of each step in seconds, e.g. imposed by the interval."""
+        return self._releases
+
+    @property
+    def table(self) -> np.ndarray:
+        return self._table
+
+    ##
+
+    def steps(self) -> Iterator[Tuple[int, Tuple[Instruction]]]:
+        """Iterate over acquisition cycles in order, and their instructions in time."""
+        # steps of a pipelined timeline are interleaved
+        order = np.argsort(self._table["step"], kind="stable")
+        steps = self._table["step"][order]
+        boundaries = np.flatnonzero(np.diff(steps)) + 1
+        for rows in np.split(order, boundaries):
+            if len(rows) > 0:
+                step = int(self._table["step"][rows[0]])
+                yield step, tuple(self[int(row)] for row in rows)
+
+
+class TimelineCompiler(object):
+    """
+    Compile a script into a timeline ahead of time.
+
+    The script is unrolled over its timepoints and channels, each (timepoint, channel)
+    pair is an acquisition cycle, i.e. a step. Actions in a step start as soon as their
+    dependencies finish, by their expected durations. Steps run back-to-back, and a
+    timepoint does not start before its interval.
+
+    Args:
+        durations (dict, optional): expected duration of (device, action) in seconds,
+            overrides those declared by the actions
+    """
+
+    def __init__(self, durations: Optional[Dict[Tuple[str, str], float]] = None):
+        self._durations = dict() if durations is None else dict(durations)
+
+    ##
+
+    def compile(self, script: Script) -> Timeline:
+        if not script.is_compilable:
+            raise TypeError(f'"{type(script).__name__}" does not define its cycle')
+
+        timepoints, interval = 1, 0.0
+        if isinstance(script, TimeSeriesFeature):
+            timepoints, interval = script.timepoints, script.interval
+        channels = (None,)
+        if isinstance(script, ChannelsFeature) and script.channels:
+            channels = script.channels
+
+        devices, actions, args = _Interned(), _Interned(), []
+        rows, dependencies = [], []
+
+        t, step = 0.0, 0
+        releases = []
+        for timepoint in range(timepoints):
+            t = t0 = max(t, timepoint * interval)
+            for channel in channels:
+                releases.append(timepoint * interval)
+                # name -> row
+                names = dict()
+                t_end = t
+                for action in script.cycle(timepoint=timepoint, channel=channel):
+                    try:
+                        after = tuple(names[name] for name in action.after)
+                    except KeyError as err:
+                        raise ValueError(
+                            f'"{action.action}" depends on unknown action {err}'
+                        )
+                    # as soon as possible
+                    start = max(
+                        (rows[row][0] + rows[row][5] for row in after), default=t
+                    )
+                    duration = self._get_duration(action)
+
+                    if action.name is not None:
+                        names[action.name] = len(rows)
+                    args.append(tuple(action.args))
+                    rows.append(
+                        (
+                            start,
+                            step,
+                            devices.index(action.device),
+                            actions.index(action.action),
+                            len(args) - 1,
+                            duration,
+                        )
+                    )
+                    dependencies.append(after)
+                    t_end = max(t_end, start + duration)
+                t = t_end
+                step += 1
+            if interval > 0 and t - t0 > interval:
+                logger.warning(
+                    f"timepoint {timepoint} takes {t - t0:.3f} s, "
+                    f"longer than the interval ({interval:.3f} s)"
+                )
+
+        table = np.array(rows, dtype=INSTRUCTION_DTYPE)
+        order = np.argsort(table["time"], kind="stable")
+        table = table[order]
+        # remap dependencies to sorted rows
+        mapping = np.empty_like(order)
+        mapping[order] = np.arange(len(order))
+        dependencies = tuple(
+            tuple(int(mapping[row]) for row in dependencies[i]) for i in order
+        )
+
+        logger.info(
+            f"{len(table)} instruction(s) in {step} step(s), "
+            f"{len(devices)} device(s) involved"
+        )
+        return Timeline(
+            table,
+            devices.values,
+            actions.values,
+            tuple(args),
+            dependencies,
+            releases=np.array(releases, dtype=np.float64),
+        )
+
+    ##
+
+    def _get_duration(self, action) -> float:
+        return self._durations.get((action.device, action.action), action.duration)
+
+
+class _Interned(object):
+    """Map values to consecutive indices."""
+
+    def __init__(self):
+        self._index: Dict[Any, int] = dict()
+        self._values: List[Any] = []
+
+    def __len__(self):
+        return len(self._values)
+
+    def index(self, value) -> int:
+        try:
+            return self._index[value]
+        except KeyError:
+            self._index[value] = len(self._values)
+            self._values.append(value)
+            return self._index[value]
+
+    @property
+    def values(self) -> Tuple[Any]:
+        return tuple(self._values)
@@ -4,3 +4,4 @@ from .modulator import *
 from .motion import *
 from .sensor import *
 from .sequencer import *
+from .waveform import *
@@ -1,10 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
 import logging
+import math
+import time
 from abc import ABCMeta, abstractmethod
-from typing import NamedTuple, Tuple
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, FrozenSet, Iterable, NamedTuple, Optional, Tuple
 
-__all__ = ["Device", "DeviceInfo", "DeviceType"]
+from olive.metrics import instrumented
+from olive.utils import Singleton
+
+from .poller import PropertyPoller, PropertySubscription
+from .store import DeviceStore
+
+__all__ = [
+    "CachePolicy",
+    "Device",
+    "DeviceInfo",
+    "DeviceRegistry",
+    "DeviceType",
+    "property_cache",
+]
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +45,156 @@ class DeviceInfo(NamedTuple):
         return f"<{', '.join(tokens)}>"
 
 
+class CachePolicy(Enum):
+    NONE = "none"  # always query the device
+    STATIC = "static"  # never changes until the device is closed, even if it is set
+    TTL = "ttl"  # expires after a period of time
+    INVALIDATE_ON_SET = "invalidate_on_set"  # only changes when it is set
+
+
+def property_cache(policy: CachePolicy, ttl: Optional[float] = None):
+    """
+    Decorate a property getter with its cache policy.
+
+    Args:
+        policy (CachePolicy): the policy
+        ttl (float, optional): time-to-live in seconds, required by TTL policy
+    """
+    if policy == CachePolicy.TTL and ttl is None:
+        raise ValueError("TTL policy requires a time-to-live")
+
+    def decorator(func):
+        func.__property_cache__ = (policy, ttl)
+        return func
+
+    return decorator
+
+
+@dataclass(frozen=True)
+class PropertyAccessor:
+    name: str
+    getter: Optional[Callable] = None
+    setter: Optional[Callable] = None
+    policy: CachePolicy = CachePolicy.NONE
+    ttl: Optional[float] = None  # s
+
+    @classmethod
+    def build_table(cls, klass) -> Dict[str, PropertyAccessor]:
+        """
+        Collect property accessors of a class, accessors are named `_get_<name>` and
+        `_set_<name>`.
+
+        Helpers that follow the same naming are collected as well, accessors are
+        filtered by enumerate_properties() of each device.
+        """
+        getters, setters = dict(), dict()
+        for base in reversed(klass.__mro__):
+            for attr, func in vars(base).items():
+                if not inspect.isfunction(func):
+                    continue
+                if attr.startswith("_get_"):
+                    getters[attr[5:]] = func
+                elif attr.startswith("_set_"):
+                    setters[attr[5:]] = func
+
+        table = dict()
+        for name in set(getters.keys()) | set(setters.keys()):
+            getter = getters.get(name)
+            policy, ttl = getattr(
+                getter, "__property_cache__", (CachePolicy.NONE, None)
+            )
+            table[name] = cls(name, getter, setters.get(name), policy, ttl)
+        return table
+
+
+class DeviceRegistry(metaclass=Singleton):
+    """
+    Index of device classes.
+
+    Classes are registered by DeviceType upon creation, their ancestors, primitives and
+    shortest inheritance paths are derived from the bases that are already indexed,
+    therefore, queries are simple lookups.
+
+    Primitive device types are classes that directly inherit from the root, e.g.
+    `PowerSensor(Sensor, Device)`.
+    """
+
+    def __init__(self):
+        self._root = None
+        self._ancestors, self._descendants = dict(), dict()
+        self._primitives, self._paths = dict(), dict()
+
+    ##
+
+    @property
+    def klasses(self) -> Tuple[DeviceType]:
+        return tuple(self._ancestors.keys())
+
+    ##
+
+    def register(self, klass: DeviceType):
+        """
+        Index a new device class.
+
+        Args:
+            klass (DeviceType): the class
+        """
+        bases = [base for base in klass.__bases__ if base in self._ancestors]
+        if not bases:
+            if self._root is not None:
+                raise TypeError(f'"{klass.__name__}" does not derive from the root')
+            self._root = klass
+            ancestors, primitives, path = frozenset(), frozenset(), tuple()
+        else:
+            ancestors = frozenset().union(
+                *(self._ancestors[base] | {base} for base in bases)
+            )
+            if self._root in bases:
+                primitives = frozenset([klass])
+            else:
+                primitives = frozenset().union(
+                    *(self._primitives[base] for base in bases)
+                )
+            path = min((self._paths[base] for base in bases), key=len) + (klass,)
+
+        self._ancestors[klass], self._descendants[klass] = ancestors, set()
+        self._primitives[klass], self._paths[klass] = primitives, path
+        for ancestor in ancestors:
+            self._descendants[ancestor].add(klass)
+
+    def get_ancestors(self, klass: DeviceType) -> FrozenSet[DeviceType]:
+        """All the device classes that the class derives from, excluding itself."""
+        return self._ancestors[klass]
+
+    def get_descendants(self, klass: DeviceType) -> FrozenSet[DeviceType]:
+        """All the device classes that derive from the class, excluding itself."""
+        return frozenset(self._descendants[klass])
+
+    def get_primitives(self, klass: DeviceType) -> FrozenSet[DeviceType]:
+        """Nearest primitive device types of the class."""
+        return self._primitives[klass]
+
+    def get_path(self, klass: DeviceType) -> Tuple[DeviceType]:
+        """Shortest inheritance path from the root to the class, root excluded."""
+        return self._paths[klass]
+
+    def is_primitive(self, klass: DeviceType) -> bool:
+        return self._primitives.get(klass) == frozenset([klass])
+
+    def is_subclass(self, klass: DeviceType, base: DeviceType) -> bool:
+        """Same as issubclass(), but only consider device classes."""
+        return klass is base or base in self._ancestors.get(klass, frozenset())
+
+
 class DeviceType(ABCMeta):
     """All devices belong to this type."""
 
+    def __init__(cls, name, bases, namespace, **kwargs):
+        super().__init__(name, bases, namespace, **kwargs)
+        DeviceRegistry().register(cls)
+        # accessors are resolved once per class
+        cls._property_accessors = PropertyAccessor.build_table(cls)
+
 
 class Device(metaclass=DeviceType):
     """
@@ -44,7 +210,18 @@ class Device(metaclass=DeviceType):
         self._driver = driver
         self._parent, self._children = parent, []
 
-        self._info = None
+        self._info, self._record = None, dict()
+        # record changes are written to disk in background
+        self._record_dirty, self._record_task = False, None
+        # accessors of documented properties, resolved on demand
+        self._accessors = None
+        # name -> (value, expiry)
+        self._property_cache = dict()
+        # shared by all the subscribers, created on demand
+        self._poller = None
+
+        # serialize open/close requests
+        self._open_lock = asyncio.Lock()
 
     ##
 
@@ -56,6 +233,11 @@ class Device(metaclass=DeviceType):
     def driver(self):
         return self._driver
 
+    @property
+    def info(self) -> DeviceInfo:
+        """Device info retrieved during open."""
+        return self._info
+
     @property
     def parent(self) -> Device:
         return self._parent
@@ -70,57 +252,80 @@ class Device(metaclass=DeviceType):
         Test open is used during enumeration, if mocking is supported, this can avoid full-scale device initialization.
         """
 
+    @instrumented("open")
     async def open(self):
-        """Open the device and register with parent."""
-        if not self.is_opened:
-            # 1) open parent if it has one
-            try:
-                await self.parent.open()
-            except AttributeError:
-                pass
-            try:
-                # 2) open this device
-                await self._open()
-            except NotImplementedError:
-                pass
-            # 3) cleanup children list
-            self._children = []
-        # 4) register ourself with parent
-        try:
-            self.parent.register(self)
-        except AttributeError:
-            pass
-        # 5) get device info
+        """
+        Open the device and register with parent.
+
+        Concurrent requests are serialized, therefore, a device shared by multiple
+        children is only opened once.
+        """
+        async with self._open_lock:
+            if not self.is_opened:
+                # 1) open parent if it has one
+                try:
+                    await self.parent.open()
+                except AttributeError:
+                    pass
+                try:
+                    # 2) open this device
+                    await self._open()
+                except NotImplementedError:
+                    pass
+                # 3) cleanup children list
+                self._children = []
+            # 4) register ourself with parent
+            if self.parent is not None and self not in self.parent.children:
+                self.parent.register(self)
+            # 5) get device info, and restore its record
+            if self._info is None:
+                self._info = await self.get_device_info()
+                self._record = DeviceStore().load(self._info)
+                # 6) restore states that depend on the record
+                await self._post_open()
 
     async def _open(self):
         """Concrete open operation."""
         raise NotImplementedError
 
+    async def _post_open(self):
+        """
+        Concrete operations after device info and its record are available, e.g.
+        restore capabilities from the record.
+        """
+
+    @instrumented("close")
     async def close(self, force=False):
         """Close the device and unregister with parent."""
-        if not self.is_opened:
-            return
-
-        if self.children:
-            logger.warning("there are still children active")
-            if not force:
+        async with self._open_lock:
+            if not self.is_opened:
                 return
-        # 4) unregister ourself
-        try:
-            self.parent.unregister(self)
-        except AttributeError:
-            pass
-        # 3) cleanup children list, ignored
-        # 2) close ourself
-        try:
-            await self._close()
-        except NotImplementedError:
-            pass
-        # 1) close parent
-        try:
-            await self.parent.close()
-        except AttributeError:
-            pass
+
+            if self.children:
+                logger.warning("there are still children active")
+                if not force:
+                    return
+            # 4) unregister ourself
+            try:
+                self.parent.unregister(self)
+            except AttributeError:
+                pass
+            # 3) cleanup children list, ignored
+            # 2) close ourself
+            try:
+                await self._close()
+            except NotImplementedError:
+                pass
+            # 1) close parent
+            try:
+                await self.parent.close()
+            except AttributeError:
+                pass
+            # 0) the device may be swapped before next open
+            await self.flush_record()
+            self._info, self._record = None, dict()
+            self._accessors = None
+            self._property_cache.clear()
 
     async def _close(self):
         """Concrete close operation."""
@@ -132,6 +337,40 @@ class Device(metaclass=DeviceType):
     async def get_device_info(self) -> DeviceInfo:
         """Get device info after a successful init."""
 
+    def get_record(self, key, default=None) -> Any:
+        """
+        Get an entry from the persistent record of this device.
+
+        Args:
+            key (str): name of the entry
+            default (optional): value to return if the entry does not exist
+
+        Note:
+            Entries are restored from JSON, therefore, tuples are returned as lists.
+        """
+        return self._record.get(key, default)
+
+    def set_record(self, key, value):
+        """
+        Set an entry in the persistent record of this device.
+
+        Changes are written to disk in background, consecutive changes are batched
+        into a single write. Pending changes are flushed on close.
+
+        Args:
+            key (str): name of the entry
+            value : JSON serializable value
+        """
+        self._record[key] = value
+        self._record_dirty = True
+        if self._record_task is None or self._record_task.done():
+            self._record_task = asyncio.ensure_future(self._write_record())
+
+    async def flush_record(self):
+        """Wait until pending changes of the record are written to disk."""
+        if self._record_task is not None:
+            await self._record_task
+
     ##
 
     def register(self, child: Device):
@@ -168,13 +407,9 @@ class Device(metaclass=DeviceType):
 
         Args:
             name (str): documented property name
-            value : new value of the specified property
         """
-        try:
-            func = self._get_accessor("_get", name)
-            return await func()
-        except AttributeError:
-            return self.parent.get_property(name)
+        values = await self.get_properties([name])
+        return values[name]
 
     async def set_property(self, name, value):
         """
@@ -182,15 +417,152 @@ class Device(metaclass=DeviceType):
 
         Args:
             name (str): documented property name
+            value : new value of the specified property
+        """
+        await self.set_properties({name: value})
+
+    @instrumented("get_properties")
+    async def get_properties(self, names: Iterable[str]) -> Dict[str, Any]:
         """
-        try:
-            func = self._get_accessor("_set", name)
-            await func(value)
-        except AttributeError:
-            self.parent.set_property(name, value)
-
-    def _get_accessor(self, prefix, name):
-        try:
-            return getattr(self, f"{prefix}_{name}")
-        except AttributeError:
-            raise AttributeError(f'unknown property "{name}"')
+        Get the values of multiple device properties.
+
+        Cached values are returned directly, the rest are queried at once. Properties
+        unknown to this device are relayed to its parent.
+
+        Args:
+            names (list of str): documented property names
+
+        Returns:
+            (dict of str: any): values of the properties
+        """
+        names = list(names)
+        accessors = await self._resolve_accessors()
+
+        values, local, remote = dict(), [], []
+        now = time.monotonic()
+        for name in names:
+            try:
+                value, expiry = self._property_cache[name]
+                if now < expiry:
+                    values[name] = value
+                    continue
+            except KeyError:
+                pass
+            try:
+                if accessors[name].getter is None:
+                    raise KeyError
+                local.append(name)
+            except KeyError:
+                remote.append(name)
+
+        if remote:
+            values.update(await self._relay_to_parent("get_properties", remote))
+        if local:
+            fetched = await self._query_properties(local)
+            for name in local:
+                self._cache_property(accessors[name], fetched[name], now)
+            values.update(fetched)
+
+        return {name: values[name] for name in names}
+
+    @instrumented("set_properties")
+    async def set_properties(self, values: Dict[str, Any]):
+        """
+        Set the values of multiple device properties.
+
+        Args:
+            values (dict of str: any): new values of the properties
+        """
+        accessors = await self._resolve_accessors()
+
+        local, remote = dict(), dict()
+        for name, value in values.items():
+            accessor = accessors.get(name)
+            if accessor is None or accessor.setter is None:
+                remote[name] = value
+            else:
+                local[name] = value
+
+        if remote:
+            await self._relay_to_parent("set_properties", remote)
+        if local:
+            for name in local.keys():
+                if accessors[name].policy != CachePolicy.STATIC:
+                    self._property_cache.pop(name, None)
+            try:
+                await self._write_properties(local)
+            finally:
+                if self._poller is not None:
+                    self._poller.invalidate(local.keys())
+
+    def subscribe(self, names: Iterable[str], interval=1.0) -> PropertySubscription:
+        """
+        Subscribe to changes of device properties.
+
+        All the subscriptions of a device share a single poller, a property is polled
+        at the shortest interval among its subscribers, and properties that are due at
+        the same time are queried by a single get_properties().
+
+        Args:
+            names (list of str): documented property names
+            interval (float, optional): polling interval in seconds
+
+        Returns:
+            (PropertySubscription): async iterator of PropertyChange, close it to
+                unsubscribe
+        """
+        if self._poller is None:
+            self._poller = PropertyPoller(self)
+        return self._poller.subscribe(names, interval)
+
+    async def _resolve_accessors(self) -> Dict[str, PropertyAccessor]:
+        """Accessors of the properties this device documents."""
+        if self._accessors is None:
+            names = await self.enumerate_properties() or tuple()
+            table = self._property_accessors
+            self._accessors = {name: table[name] for name in names if name in table}
+        return self._accessors
+
+    async def _query_properties(self, names: Iterable[str]) -> Dict[str, Any]:
+        """
+        Query properties from the device one by one.
+
+        Override this to coalesce the queries.
+        """
+        accessors = self._property_accessors
+        return {name: await accessors[name].getter(self) for name in names}
+
+    async def _write_properties(self, values: Dict[str, Any]):
+        """
+        Write properties to the device one by one.
+
+        Override this to coalesce the writes.
+        """
+        accessors = self._property_accessors
+        for name, value in values.items():
+            await accessors[name].setter(self, value)
+
+    async def _relay_to_parent(self, method, args):
+        if self.parent is None:
+            names = ", ".join(f'"{name}"' for name in args)
+            raise AttributeError(f"unknown property {names}")
+        return await getattr(self.parent, method)(args)
+
+    async def _write_record(self):
+        loop = asyncio.get_running_loop()
+        while self._record_dirty:
+            self._record_dirty = False
+            info, record = self._info, dict(self._record)
+            try:
+                await loop.run_in_executor(None, DeviceStore().save, info, record)
+            except OSError as err:
+                logger.error(f'unable to save record of {info}, due to "{str(err)}"')
+
+    def _cache_property(self, accessor: PropertyAccessor, value, now):
+        if accessor.policy == CachePolicy.NONE:
+            return
+        elif accessor.policy == CachePolicy.TTL:
+            expiry = now + accessor.ttl
+        else:
+            expiry = math.inf
+        self._property_cache[accessor.name] = (value, expiry)
@@ -9,6 +9,8 @@ from typing import Optional, Union
 import numpy as np
 from psutil import virtual_memory
 
+from olive.metrics import Metrics
+
 from .base import Device
 from .error import HostOutOfMemoryError
 
@@ -82,7 +84,9 @@ class FrameBuffer(object):
         """
         if self.full():
             raise IndexError("not enough internal buffer")
-        self.frames[self._write_index][:] = frame
+        with Metrics().measure("frame_buffer", op="put") as extra:
+            self.frames[self._write_index][:] = frame
+            extra["nbytes"] = len(self.frames[self._write_index])
 
         self._write_index = (self._write_index + 1) % self.capacity()
         self._is_full = self._read_index == self._write_index
@@ -101,6 +105,7 @@ class FrameBuffer(object):
         if self.empty():
             return None
         frame = self.frames[self._read_index]
+        Metrics().record("frame_buffer", nbytes=len(frame), op="get")
 
         self._read_index = (self._read_index + 1) % self.capacity()
         self._is_full = False
@@ -4,5 +4,6 @@ from .lightsource import *
 from .modulator import *
 from .motion import *
 from .sensor import *
+from .sequencer import *
 
 from ._deprecate import *
@@ -0,0 +1,9 @@
+from .base import DeviceError
+
+
+class SequencerError(DeviceError):
+    """Generic sequencer error."""
+
+
+class PatternError(SequencerError):
+    """Pattern does not fit the sequencer."""
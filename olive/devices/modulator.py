@@ -24,6 +24,14 @@ class Modulator(Device):
     def create_channel(self, alias):
         """Create new channel and book-keeping it internally."""
 
+    def enumerate_channels(self):
+        """List aliases of created channels."""
+        return tuple(self._channels.keys())
+
+    def get_channel_index(self, alias):
+        """Physical channel the alias is assigned to, e.g. line number."""
+        return self._channels[alias]
+
     def delete_channel(self, alias):
         """
         Delete a channel reference.
@@ -93,6 +101,27 @@ class AcustoOpticalModulator(Modulator, Device):
     async def set_power(self, alias, power: float):
         pass
 
+    ##
+
+    async def configure_channel(self, alias, frequency=None, power=None, enable=None):
+        """
+        Configure multiple settings of a channel at once.
+
+        Override this if the device can apply them in a single command.
+
+        Args:
+            alias (str): alias of the channel
+            frequency (float, optional): frequency in MHz
+            power (float, optional): power in dBm
+            enable (bool, optional): switch the channel on/off
+        """
+        if frequency is not None:
+            await self.set_frequency(alias, frequency)
+        if power is not None:
+            await self.set_power(alias, power)
+        if enable is not None:
+            await (self.enable(alias) if enable else self.disable(alias))
+
 
 class ElectroOpticalModulator(Modulator, Device):
     """
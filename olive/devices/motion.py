@@ -1,11 +1,27 @@
 from abc import abstractmethod
+import asyncio
+from dataclasses import replace
 from enum import auto, Enum
 import logging
-from typing import Union
+from typing import Optional, Sequence, Tuple, Union
 
-from .base import Device
+import numpy as np
+
+from olive.utils import maybe_await
 
-__all__ = ["Galvo", "LimitStatus", "LinearAxis", "RotaryAxis", "MotionController"]
+from .base import Device
+from .error import MotionError
+from .waveform import synthesize_waveform, Waveform
+
+__all__ = [
+    "Galvo",
+    "LimitStatus",
+    "LinearAxis",
+    "RotaryAxis",
+    "MotionController",
+    "TrajectoryProgress",
+    "estimate_move_time",
+]
 
 logger = logging.getLogger(__name__)
 
@@ -13,52 +29,104 @@ logger = logging.getLogger(__name__)
 class Galvo(Device):
     """
     A beam steering device.
+
+    The scan waveform is a table that the device plays periodically. Tables are
+    synthesized from their parameters, and only uploaded when they change, e.g.
+    between planes that only differ in frequency.
     """
 
-    # TODO galvo REQUIRES sequencer waveform support
-    @abstractmethod
-    def __init__(self):
-        pass
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._waveform = Waveform()
+        # table on the device
+        self._table = None
 
     ##
 
-    def get_table_size(self):
-        pass
+    async def close(self, force=False):
+        await super().close(force=force)
+        if not self.is_opened:
+            # table on the device is unknown after reconnect
+            self._table = None
 
-    def get_waveform(self):
-        pass
+    ##
 
-    def set_waveform(self):
-        pass
+    @abstractmethod
+    async def get_table_size(self) -> int:
+        """Number of samples in the waveform table."""
+
+    async def get_waveform(self) -> Waveform:
+        return self._waveform
+
+    async def set_waveform(
+        self, waveform: Optional[Waveform] = None, **changes
+    ) -> bool:
+        """
+        Update the waveform, the table is uploaded if it changes.
+
+        Args:
+            waveform (Waveform, optional): new waveform, current one if None
+            changes : parameters to replace, e.g. amplitude
+
+        Returns:
+            (bool): True if the table is uploaded
+        """
+        waveform = replace(self._waveform if waveform is None else waveform, **changes)
+
+        table = synthesize_waveform(waveform, await self.get_table_size())
+        # the flyback may overshoot, test the table itself
+        vmin, vmax = await self.get_amplitude_range()
+        lo, hi = table.min(), table.max()
+        if lo < vmin or hi > vmax:
+            raise ValueError(f"waveform spans [{lo}, {hi}], exceeds [{vmin}, {vmax}]")
+
+        self._waveform = waveform
+        # memoized tables are shared, identity is the fast path
+        if self._table is table or (
+            self._table is not None and np.array_equal(self._table, table)
+        ):
+            return False
+        await self._write_table(table)
+        self._table = table
+        return True
 
     ##
 
-    def get_amplitude_range(self):
-        pass
+    @abstractmethod
+    async def get_amplitude_range(self) -> Tuple[float, float]:
+        """(min, max) output of the device."""
 
-    def get_amplitude(self):
-        pass
+    async def get_amplitude(self) -> float:
+        return self._waveform.amplitude
 
-    def set_amplitude(self):
-        pass
+    async def set_amplitude(self, amplitude: float):
+        await self.set_waveform(amplitude=amplitude)
 
-    def get_offset(self):
-        pass
+    async def get_offset(self) -> float:
+        return self._waveform.offset
 
-    def set_offset(self):
-        pass
+    async def set_offset(self, offset: float):
+        await self.set_waveform(offset=offset)
 
-    def get_frequency(self):
-        pass
+    @abstractmethod
+    async def get_frequency(self) -> float:
+        """Number of table periods played per second."""
 
-    def set_frequency(self):
+    @abstractmethod
+    async def set_frequency(self, frequency: float):
         pass
 
-    def get_phase_shift(self):
-        pass
+    async def get_phase_shift(self) -> float:
+        return self._waveform.phase
 
-    def set_phase_shift(self):
-        pass
+    async def set_phase_shift(self, phase: float):
+        await self.set_waveform(phase=phase)
+
+    ##
+
+    @abstractmethod
+    async def _write_table(self, table: np.ndarray):
+        """Upload a waveform table to the device."""
 
 
 class LimitStatus(Enum):
@@ -67,7 +135,172 @@ class LimitStatus(Enum):
     LowerLimit = auto()
 
 
-class Axis(Device):
+class TrajectoryProgress(object):
+    """
+    Progress of a trajectory that runs in background.
+
+    Iterate over the progress asynchronously to receive the number of points reached.
+    Only the latest count is kept, a slow consumer skips intermediate counts.
+
+    Args:
+        n_points (int): number of points in the trajectory
+    """
+
+    def __init__(self, n_points: int):
+        self._n_points, self._n_reached = n_points, 0
+        self._reported = -1
+        self._event = asyncio.Event()
+        self._task = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> int:
+        while self._reported == self._n_reached:
+            if self.is_done:
+                # surface the failure, if any
+                await self.wait()
+                raise StopAsyncIteration
+            self._event.clear()
+            await self._event.wait()
+        self._reported = self._n_reached
+        return self._reported
+
+    ##
+
+    @property
+    def is_done(self) -> bool:
+        return self._task is not None and self._task.done()
+
+    @property
+    def n_points(self) -> int:
+        return self._n_points
+
+    @property
+    def n_reached(self) -> int:
+        return self._n_reached
+
+    ##
+
+    def cancel(self):
+        """Stop the trajectory."""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def wait(self):
+        """Wait until the trajectory finishes."""
+        await self._task
+
+    ##
+
+    def _start(self, coro):
+        self._task = asyncio.ensure_future(coro)
+        # wake up the consumers when it ends
+        self._task.add_done_callback(lambda _: self._event.set())
+
+    def _update(self, n_reached: int):
+        if n_reached != self._n_reached:
+            self._n_reached = n_reached
+            self._event.set()
+
+
+class _TrajectoryMixin(object):
+    """
+    Stream a trajectory into the buffer of a controller ahead of time.
+
+    Devices with a trajectory buffer implement get_trajectory_capacity() and the
+    _queue_trajectory(), _start_trajectory(), _poll_trajectory() hooks, the
+    buffer is refilled as points are consumed. Otherwise, points are visited one by
+    one through _move_to_point(), and triggers are output by _output_trigger().
+    """
+
+    TRAJECTORY_POLL_INTERVAL = 0.01  # s
+
+    async def get_trajectory_capacity(self) -> int:
+        """Number of points the trajectory buffer holds, 0 if not supported."""
+        return 0
+
+    ##
+
+    async def _run_trajectory(self, progress, positions, velocities, triggers):
+        n = len(positions)
+        capacity = await self.get_trajectory_capacity()
+        try:
+            if capacity > 0:
+                await self._stream_trajectory(
+                    progress, capacity, positions, velocities, triggers
+                )
+            else:
+                if triggers is not None and not triggers.any():
+                    triggers = None
+                if (
+                    triggers is not None
+                    and type(self)._output_trigger is _TrajectoryMixin._output_trigger
+                ):
+                    raise MotionError(
+                        "triggers require a trajectory buffer or a software trigger"
+                    )
+                for i in range(n):
+                    velocity = None if velocities is None else velocities[i]
+                    await self._move_to_point(positions[i], velocity)
+                    if triggers is not None and triggers[i]:
+                        await maybe_await(self._output_trigger(i))
+                    progress._update(i + 1)
+        except asyncio.CancelledError:
+            await maybe_await(self._stop_trajectory())
+            raise
+        logger.debug(f"trajectory of {n} point(s) finished")
+
+    async def _stream_trajectory(
+        self, progress, capacity, positions, velocities, triggers
+    ):
+        n = len(positions)
+        sent, reached = 0, 0
+        while reached < n:
+            free = capacity - (sent - reached)
+            if sent < n and free > 0:
+                k = min(free, n - sent)
+                chunk = slice(sent, sent + k)
+                await self._queue_trajectory(
+                    positions[chunk],
+                    None if velocities is None else velocities[chunk],
+                    None if triggers is None else triggers[chunk],
+                )
+                if sent == 0:
+                    await self._start_trajectory()
+                sent += k
+
+            reached = await self._poll_trajectory()
+            progress._update(reached)
+            if reached < n:
+                await asyncio.sleep(self.TRAJECTORY_POLL_INTERVAL)
+
+    async def _queue_trajectory(self, positions, velocities, triggers):
+        """Append points to the trajectory buffer."""
+        raise NotImplementedError
+
+    async def _start_trajectory(self):
+        """Start consuming the trajectory buffer."""
+        raise NotImplementedError
+
+    async def _poll_trajectory(self) -> int:
+        """Number of points reached since the trajectory started."""
+        raise NotImplementedError
+
+    def _stop_trajectory(self):
+        """Stop the trajectory and flush the buffer."""
+        raise NotImplementedError
+
+    async def _move_to_point(self, position, velocity):
+        """Visit a single point without a trajectory buffer."""
+        raise NotImplementedError
+
+    def _output_trigger(self, index: int):
+        """Output a trigger after a point is visited without a trajectory buffer."""
+        raise NotImplementedError
+
+
+class Axis(_TrajectoryMixin, Device):
     ## position ##
     @abstractmethod
     async def go_home(self, blocking=True):
@@ -124,6 +357,31 @@ class Axis(Device):
     def set_limits(self):
         pass
 
+    ## trajectory ##
+    async def move_trajectory(
+        self, positions, velocities=None, triggers=None
+    ) -> TrajectoryProgress:
+        """
+        Visit a series of positions in background.
+
+        Args:
+            positions (array-like): positions to visit, in order
+            velocities (array-like, optional): velocity to approach each position
+            triggers (array-like of bool, optional): output a trigger when the position
+                is reached, requires a trajectory buffer or a software trigger
+
+        Returns:
+            (TrajectoryProgress): progress of the trajectory
+        """
+        positions, velocities, triggers = _as_trajectory(
+            positions, velocities, triggers, ndim=1
+        )
+        progress = TrajectoryProgress(len(positions))
+        progress._start(
+            self._run_trajectory(progress, positions, velocities, triggers)
+        )
+        return progress
+
     ## utils ##
     @abstractmethod
     async def calibrate(self):
@@ -137,6 +395,16 @@ class Axis(Device):
     async def wait(self):
         pass
 
+    ##
+
+    def _stop_trajectory(self):
+        return self.stop()
+
+    async def _move_to_point(self, position, velocity):
+        if velocity is not None:
+            await maybe_await(self.set_velocity(velocity))
+        await self.move_absolute(position)
+
 
 class LinearAxis(Axis, Device):
     """
@@ -151,7 +419,97 @@ class RotaryAxis(Axis, Device):
     """
 
 
-class MotionController(Device):
+class MotionController(_TrajectoryMixin, Device):
     @abstractmethod
     async def enumerate_axes(self) -> Union[Axis]:
         """Enumerate connected axes."""
+
+    ## trajectory ##
+    async def move_trajectory(
+        self, axes: Sequence[Axis], positions, velocities=None, triggers=None
+    ) -> TrajectoryProgress:
+        """
+        Visit a series of positions with multiple axes in background.
+
+        Args:
+            axes (list of Axis): axes to move
+            positions (array-like): positions to visit, (points, axes)
+            velocities (array-like, optional): velocity to approach each position
+            triggers (array-like of bool, optional): output a trigger when the position
+                is reached, requires a trajectory buffer or a software trigger
+
+        Returns:
+            (TrajectoryProgress): progress of the trajectory
+        """
+        positions, velocities, triggers = _as_trajectory(
+            positions, velocities, triggers, ndim=2
+        )
+        if positions.shape[1] != len(axes):
+            raise ValueError(f"positions do not match {len(axes)} axes")
+        for axis in axes:
+            if axis.parent is not self:
+                raise MotionError(f'"{axis}" does not belong to "{self}"')
+
+        self._trajectory_axes = tuple(axes)
+        progress = TrajectoryProgress(len(positions))
+        progress._start(
+            self._run_trajectory(progress, positions, velocities, triggers)
+        )
+        return progress
+
+    ##
+
+    async def _stop_trajectory(self):
+        await asyncio.gather(
+            *(maybe_await(axis.stop()) for axis in self._trajectory_axes)
+        )
+
+    async def _move_to_point(self, position, velocity):
+        if velocity is None:
+            velocity = [None] * len(position)
+        # axes move concurrently, the point is reached when all of them arrive
+        await asyncio.gather(
+            *(
+                axis._move_to_point(p, v)
+                for axis, p, v in zip(self._trajectory_axes, position, velocity)
+            )
+        )
+
+
+def estimate_move_time(distance, velocity: float, acceleration: float):
+    """
+    Time to travel a distance by a trapezoidal velocity profile, from rest to rest.
+
+    Args:
+        distance (array-like): distance to travel
+        velocity (float): maximum velocity
+        acceleration (float): acceleration and deceleration
+
+    Returns:
+        (np.ndarray): time to travel each distance
+    """
+    distance = np.abs(np.asarray(distance, dtype=np.float64))
+    # short moves never reach the maximum velocity
+    return np.where(
+        distance >= velocity ** 2 / acceleration,
+        distance / velocity + velocity / acceleration,
+        2 * np.sqrt(distance / acceleration),
+    )
+
+
+def _as_trajectory(positions, velocities, triggers, ndim: int):
+    """Validate a trajectory and convert it to arrays."""
+    positions = np.asarray(positions, dtype=np.float64)
+    if positions.ndim != ndim or len(positions) == 0:
+        raise ValueError(f"positions have to be a non-empty {ndim}-D array")
+    if velocities is not None:
+        velocities = np.broadcast_to(
+            np.asarray(velocities, dtype=np.float64), positions.shape
+        )
+        if (velocities <= 0).any():
+            raise ValueError("velocities have to be positive")
+    if triggers is not None:
+        triggers = np.asarray(triggers, dtype=bool)
+        if triggers.shape != positions.shape[:1]:
+            raise ValueError("requires a trigger flag for each position")
+    return positions, velocities, triggers
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Dict, Iterable, NamedTuple
+
+__all__ = ["PropertyChange", "PropertySubscription"]
+
+logger = logging.getLogger(__name__)
+
+
+class PropertyChange(NamedTuple):
+    name: str
+    value: Any
+    previous: Any
+    timestamp: float  # s, time.monotonic()
+
+
+class PropertySubscription(object):
+    """
+    Changes of device properties that a subscriber is interested in.
+
+    Iterate over the subscription asynchronously to receive the changes. Only the
+    latest change of each property is kept, a slow subscriber skips intermediate
+    values instead of lagging behind.
+
+    Args:
+        poller (PropertyPoller): poller of the device
+        names (list of str): properties to watch
+        interval (float): desired polling interval in seconds
+    """
+
+    def __init__(self, poller, names: Iterable[str], interval: float):
+        self._poller = poller
+        self._names, self._interval = frozenset(names), interval
+
+        self._pending, self._event = dict(), asyncio.Event()
+        self._is_closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> PropertyChange:
+        return await self.get()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    ##
+
+    @property
+    def interval(self):
+        return self._interval
+
+    @property
+    def is_closed(self):
+        return self._is_closed
+
+    @property
+    def names(self):
+        return self._names
+
+    ##
+
+    async def get(self) -> PropertyChange:
+        """
+        Wait for next change.
+
+        Raises:
+            StopAsyncIteration: the subscription is closed
+        """
+        while True:
+            if self._is_closed:
+                raise StopAsyncIteration
+            if self._pending:
+                break
+            self._event.clear()
+            await self._event.wait()
+        name = next(iter(self._pending))
+        return self._pending.pop(name)
+
+    def close(self):
+        """Stop receiving changes, pending changes are dropped."""
+        if not self._is_closed:
+            self._is_closed = True
+            self._pending.clear()
+            # wake up those still waiting
+            self._event.set()
+            self._poller.unsubscribe(self)
+
+    ##
+
+    def _push(self, change: PropertyChange):
+        # keep the original order of the properties
+        self._pending.pop(change.name, None)
+        self._pending[change.name] = change
+        self._event.set()
+
+
+class PropertyPoller(object):
+    """
+    Shared poller of a device.
+
+    Intervals of all the subscribers are merged, a property is polled at the shortest
+    interval requested. Properties that are due, or nearly due, are queried in a single
+    batch.
+
+    Args:
+        device (Device): the device to poll
+    """
+
+    SLACK = 0.25  # fraction of the interval that a poll can be early to join a batch
+
+    def __init__(self, device):
+        self._device = device
+        self._subscriptions = []
+
+        # name -> next poll time
+        self._due = dict()
+        self._values = dict()
+
+        self._task, self._wakeup = None, asyncio.Event()
+
+    ##
+
+    @property
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    ##
+
+    def subscribe(self, names: Iterable[str], interval: float) -> PropertySubscription:
+        subscription = PropertySubscription(self, names, interval)
+        self._subscriptions.append(subscription)
+
+        # new subscriber starts with current values
+        now = time.monotonic()
+        for name in subscription.names:
+            if name in self._values:
+                subscription._push(
+                    PropertyChange(name, self._values[name], None, now)
+                )
+                due = now + interval
+            else:
+                due = now
+            self._due[name] = min(self._due.get(name, math.inf), due)
+
+        if not self.is_running:
+            self._task = asyncio.ensure_future(self._run())
+        self._wakeup.set()
+
+        return subscription
+
+    def unsubscribe(self, subscription: PropertySubscription):
+        self._subscriptions.remove(subscription)
+
+        names = self._watched_names()
+        for name in list(self._due.keys()):
+            if name not in names:
+                del self._due[name]
+                self._values.pop(name, None)
+
+        if not self._subscriptions:
+            self.stop()
+
+    def invalidate(self, names: Iterable[str]):
+        """Poll the properties as soon as possible, e.g. after they are written."""
+        now = time.monotonic()
+        for name in names:
+            if name in self._due:
+                self._due[name] = now
+                self._wakeup.set()
+
+    def stop(self):
+        if self.is_running:
+            self._task.cancel()
+        self._task = None
+
+    ##
+
+    def _watched_names(self):
+        return frozenset().union(*(sub.names for sub in self._subscriptions))
+
+    def _get_interval(self, name) -> float:
+        return min(
+            (sub.interval for sub in self._subscriptions if name in sub.names),
+            default=math.inf,
+        )
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            if any(t <= now for t in self._due.values()):
+                names = [
+                    name
+                    for name, t in self._due.items()
+                    if t <= now + self.SLACK * self._get_interval(name)
+                ]
+                if self._device.is_opened:
+                    values = await self._poll(names)
+                else:
+                    values = dict()
+
+                # subscribers may leave during the poll
+                watched = self._watched_names()
+                names = [name for name in names if name in watched]
+                values = {name: values[name] for name in names if name in values}
+                self._dispatch(values, time.monotonic())
+                for name in names:
+                    self._due[name] = now + self._get_interval(name)
+
+            self._wakeup.clear()
+            timeout = min(self._due.values(), default=math.inf) - time.monotonic()
+            timeout = None if math.isinf(timeout) else max(timeout, 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, names) -> Dict[str, Any]:
+        try:
+            return await self._device.get_properties(names)
+        except Exception as err:
+            # retry in next interval
+            logger.error(f'unable to poll {names} of "{self._device}", due to "{err}"')
+            return dict()
+
+    def _dispatch(self, values: Dict[str, Any], timestamp):
+        for name, value in values.items():
+            previous = self._values.get(name)
+            if name in self._values and self._is_equal(previous, value):
+                continue
+            self._values[name] = value
+
+            change = PropertyChange(name, value, previous, timestamp)
+            for subscription in self._subscriptions:
+                if name in subscription.names:
+                    subscription._push(change)
+
+    @staticmethod
+    def _is_equal(a, b) -> bool:
+        try:
+            return bool(a == b)
+        except ValueError:
+            # ambiguous, e.g. arrays
+            return False
@@ -1,10 +1,163 @@
 from abc import abstractmethod
-from typing import Union
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+import time
+from typing import Optional, Tuple, Union
+
+import numpy as np
 
 from .base import Device
 
 __all__ = ["Sensor", "SensorAdapter", "PowerSensor"]
 
+logger = logging.getLogger(__name__)
+
+
+class SampleBuffer(object):
+    """
+    A preallocated ring buffer for timestamped scalar samples.
+
+    Args:
+        capacity (int): number of samples the ring can hold
+        dtype (dtype, optional): data type of the samples
+    """
+
+    def __init__(self, capacity, dtype=np.float64):
+        assert capacity >= 1, "samples in a ring buffer should be >= 1"
+
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._values = np.empty(capacity, dtype=dtype)
+
+        # total number of samples ever written/read
+        self._write_count, self._read_count = 0, 0
+        self._updated = asyncio.Event()
+        # reason that no more samples will arrive
+        self._error = None
+
+    ##
+
+    @property
+    def capacity(self):
+        """Maximum number of samples the ring can hold."""
+        return self._values.size
+
+    @property
+    def count(self):
+        """Total number of samples written since last reset."""
+        return self._write_count
+
+    @property
+    def dtype(self):
+        return self._values.dtype
+
+    @property
+    def size(self):
+        """Number of valid samples in the buffer."""
+        return min(self._write_count, self.capacity)
+
+    ##
+
+    def reset(self):
+        self._write_count, self._read_count = 0, 0
+        self._error = None
+
+    def fail(self, error: Exception):
+        """No more samples will arrive, waiters are woken up with the error."""
+        self._error = error
+        self._updated.set()
+
+    def put(self, timestamp, value):
+        """
+        Write a single sample.
+
+        Args:
+            timestamp (float): time of the sample, in seconds
+            value : the sample
+        """
+        index = self._write_count % self.capacity
+        self._timestamps[index], self._values[index] = timestamp, value
+
+        self._write_count += 1
+        self._updated.set()
+
+    def put_many(self, timestamps, values):
+        """
+        Write a batch of samples.
+
+        Args:
+            timestamps (np.ndarray): time of the samples, in seconds
+            values (np.ndarray): the samples
+        """
+        n = len(values)
+        # only the last samples survive if the batch exceeds the capacity
+        m = min(n, self.capacity)
+        indices = (self._write_count + n - m + np.arange(m)) % self.capacity
+        self._timestamps[indices] = timestamps[-m:]
+        self._values[indices] = values[-m:]
+
+        self._write_count += n
+        self._updated.set()
+
+    def since(self, count) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Samples written after the specified sample count.
+
+        Args:
+            count (int): sample count to start from, overwritten samples are dropped
+
+        Returns:
+            (tuple): tuple containing
+                timestamps (np.ndarray): time of the samples
+                values (np.ndarray): the samples
+
+        Note:
+            Unless the samples wrap around the ring, returned arrays are views and
+            will be overwritten by later samples. Copy them if necessary.
+        """
+        stop = self._write_count
+        start = min(max(count, stop - self.capacity), stop)
+
+        i0, i1 = start % self.capacity, stop % self.capacity
+        if stop == start:
+            i0 = i1 = 0
+        elif i1 <= i0:
+            # wrap around
+            return (
+                np.concatenate((self._timestamps[i0:], self._timestamps[:i1])),
+                np.concatenate((self._values[i0:], self._values[:i1])),
+            )
+        return self._timestamps[i0:i1], self._values[i0:i1]
+
+    def latest(self, n=1) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the latest n samples."""
+        return self.since(self._write_count - n)
+
+    def read(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns samples that are not read yet."""
+        overrun = self._write_count - self._read_count - self.capacity
+        if overrun > 0:
+            logger.warning(f"{overrun} sample(s) are overwritten before read")
+        samples = self.since(self._read_count)
+        self._read_count = self._write_count
+        return samples
+
+    async def wait(self, count):
+        """
+        Wait until total sample count reaches the specified value.
+
+        Args:
+            count (int): target sample count
+
+        Raises:
+            RuntimeError: source of the samples has failed
+        """
+        while self._write_count < count:
+            if self._error is not None:
+                raise RuntimeError(f'stream is terminated, due to "{self._error}"')
+            self._updated.clear()
+            await self._updated.wait()
+
 
 class Sensor(Device):
     """
@@ -17,23 +170,23 @@ class Sensor(Device):
     """
 
     @abstractmethod
-    def readout(self):
+    async def readout(self):
         """Retrieve measured info from the sensor."""
 
     @abstractmethod
-    def get_current_range(self):
+    async def get_current_range(self):
         """Get sensor read-out value range."""
 
     @abstractmethod
-    def set_current_range(self, value):
+    async def set_current_range(self, value):
         """Set sensor measurement range."""
 
     @abstractmethod
-    def get_unit(self):
+    async def get_unit(self):
         """Get readout unit."""
 
     @abstractmethod
-    def get_valid_ranges(self):
+    async def get_valid_ranges(self):
         """
         Get valid sensor measurement range.
 
@@ -48,7 +201,7 @@ class SensorAdapter(Device):
     """
 
     @abstractmethod
-    def enumerate_sensors(self) -> Union[Sensor]:
+    async def enumerate_sensors(self) -> Union[Sensor]:
         """Enumerate connected sensors."""
 
 
@@ -62,6 +215,121 @@ class PowerSensor(Sensor, Device):
     specified standard and used as the input of a power meter.
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self._buffer, self._stream_task = None, None
+
+    ##
+
+    @property
+    def buffer(self) -> Optional[SampleBuffer]:
+        """Samples of the latest stream."""
+        return self._buffer
+
+    @property
+    def is_streaming(self):
+        return self._stream_task is not None and not self._stream_task.done()
+
+    ##
+
     @abstractmethod
-    def set_wavelength(self):
+    async def set_wavelength(self, value):
         """Configure the wavelength to work with."""
+
+    ##
+
+    async def start_streaming(self, n_samples=4096):
+        """
+        Continuously acquire timestamped samples into a ring buffer.
+
+        Args:
+            n_samples (int, optional): capacity of the ring buffer
+        """
+        if self.is_streaming:
+            raise RuntimeError("sensor is already streaming")
+
+        self._buffer = SampleBuffer(n_samples)
+        self._start_stream()
+        logger.debug(f"start streaming, {n_samples} sample(s) in the ring")
+
+    async def stop_streaming(self):
+        """Stop the stream, samples are kept in the buffer until next stream."""
+        if self._stream_task is None:
+            return
+
+        await self._cancel_stream()
+        logger.debug(f"stop streaming, {self.buffer.count} sample(s) acquired")
+
+    @asynccontextmanager
+    async def paused_stream(self):
+        """
+        Suspend the stream, e.g. to issue other commands over a connection that is
+        occupied by the stream. The stream resumes into the same buffer afterwards.
+        """
+        if not self.is_streaming:
+            yield
+            return
+
+        await self._cancel_stream()
+        try:
+            yield
+        finally:
+            self._start_stream()
+
+    async def collect(self, n_samples, timeout=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Wait for the next n samples from the stream.
+
+        Args:
+            n_samples (int): number of samples
+            timeout (float, optional): timeout in seconds
+
+        Returns:
+            (tuple): timestamps and values of the samples
+
+        Raises:
+            asyncio.TimeoutError: samples do not arrive in time
+            RuntimeError: stream is terminated before the samples arrive
+        """
+        assert self.is_streaming, "stream is not started"
+        count0 = self.buffer.count
+        await asyncio.wait_for(self.buffer.wait(count0 + n_samples), timeout)
+        # more samples may arrive before we get to the buffer
+        timestamps, values = self.buffer.since(count0)
+        return timestamps[:n_samples], values[:n_samples]
+
+    async def _stream(self, buffer: SampleBuffer):
+        """
+        Acquire samples until cancelled.
+
+        By default, readout is polled back-to-back. Override this if the device can
+        pipeline requests or push samples by itself.
+
+        Args:
+            buffer (SampleBuffer): destination of the samples
+        """
+        while True:
+            value = await self.readout()
+            buffer.put(time.perf_counter(), value)
+
+    def _start_stream(self):
+        buffer = self._buffer
+
+        def on_terminated(task):
+            # wake up those waiting for samples that will never arrive
+            if not task.cancelled() and task.exception() is not None:
+                buffer.fail(task.exception())
+
+        self._stream_task = asyncio.create_task(self._stream(buffer))
+        self._stream_task.add_done_callback(on_terminated)
+
+    async def _cancel_stream(self):
+        task, self._stream_task = self._stream_task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception as err:
+            logger.error(f'stream terminated, due to "{str(err)}"')
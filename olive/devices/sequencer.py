@@ -1,6 +1,18 @@
 from abc import abstractmethod
+import asyncio
 from functools import wraps
 import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from olive.metrics import Metrics
+
+from .error import PatternError, SequencerError
 
 __all__ = ["SoftwareSequencer", "HardwareSequencer"]
 
@@ -26,10 +38,228 @@ class Sequencer(metaclass=SequencerType):
 class SoftwareSequencer(Sequencer):
     """
     We can directly use software sequencer.
+
+    Instructions of a timeline fire on a dedicated thread at their scheduled time. The
+    thread sleeps until shortly before each deadline, then spins for the rest, the
+    actual fire time of every instruction is recorded. Instructions are triggered by
+    time alone, their dependencies are expected to be resolved by the schedule.
+
+    Actions that are coroutines are fired by submitting them to the event loop, they
+    start once the loop gets to them. Therefore, both the fire time and the start time
+    are recorded, lateness is measured against the start time. A failed action, either
+    synchronous or not, stops the sequencer from firing the rest.
+
+    Args:
+        spin (float, optional): time in seconds to busy-wait before each deadline
+        priority (int, optional): SCHED_FIFO priority of the thread, if permitted
+        cpus (set of int, optional): CPUs to pin the thread to, if permitted
     """
 
-    def __init__(self):
+    FIRE_DTYPE = np.dtype(
+        [
+            ("row", np.uint32),  # row in the timeline
+            ("scheduled", np.int64),  # ns, since the start
+            ("fired", np.int64),  # ns, since the start, -1 if never fired
+            ("actual", np.int64),  # ns, since the start, -1 if never started
+        ]
+    )
+
+    def __init__(
+        self,
+        spin: float = 200e-6,
+        priority: Optional[int] = None,
+        cpus: Optional[Set[int]] = None,
+    ):
         super().__init__()
+        self._spin = int(spin * 1e9)
+        self._priority, self._cpus = priority, cpus
+
+        self._thread, self._stop = None, threading.Event()
+        self._records = np.zeros(0, dtype=self.FIRE_DTYPE)
+        self._futures, self._error = [], None
+
+    ##
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def lateness(self) -> np.ndarray:
+        """How late each started instruction is in nanoseconds."""
+        started = self._records[self._records["actual"] >= 0]
+        return started["actual"] - started["scheduled"]
+
+    @property
+    def records(self) -> np.ndarray:
+        """Scheduled, fire and start time of each instruction, FIRE_DTYPE."""
+        return self._records
+
+    ##
+
+    def start(self, timeline, devices: Dict[str, Any]):
+        """
+        Start firing instructions of a timeline in background.
+
+        Actions that are coroutines are submitted to the event loop that starts the
+        sequencer, they are awaited by wait().
+
+        Args:
+            timeline (Timeline): compiled timeline
+            devices (dict of str: object): alias -> device
+
+        Raises:
+            SequencerError: already running, or not started from an event loop
+        """
+        if self.is_running:
+            raise SequencerError("sequencer is already running")
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            raise SequencerError("sequencer has to start from a running event loop")
+
+        # resolve everything ahead of time, keep the loop tight
+        events = [
+            (
+                instruction.row,
+                int(round(instruction.time * 1e9)),
+                getattr(devices[instruction.device], instruction.action),
+                instruction.args,
+            )
+            for instruction in timeline
+        ]
+        self._records = np.zeros(len(events), dtype=self.FIRE_DTYPE)
+        self._records["row"] = [event[0] for event in events]
+        self._records["scheduled"] = [event[1] for event in events]
+        self._records["fired"] = self._records["actual"] = -1
+        self._futures, self._error = [], None
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(events, loop), name="sequencer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop firing, instructions in flight are not interrupted."""
+        self._stop.set()
+
+    async def wait(self):
+        """
+        Wait until all the instructions are fired and finished.
+
+        Raises:
+            SequencerError: an instruction failed
+        """
+        if self._thread is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+        if self._futures:
+            results = await asyncio.gather(
+                *(asyncio.wrap_future(f) for f in self._futures),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception) and self._error is None:
+                    self._error = result
+
+        # submitted actions are started by now
+        lateness = self.lateness
+        if len(lateness) > 0:
+            logger.debug(
+                f"{len(lateness)} instruction(s) started, lateness "
+                f"p50 {np.percentile(lateness, 50) / 1e3:.1f} us, "
+                f"p99 {np.percentile(lateness, 99) / 1e3:.1f} us, "
+                f"max {lateness.max() / 1e3:.1f} us"
+            )
+
+        if self._error is not None:
+            raise SequencerError(f'instruction failed, due to "{self._error}"')
+
+    async def run(self, timeline, devices: Dict[str, Any]) -> np.ndarray:
+        """
+        Fire instructions of a timeline.
+
+        Returns:
+            (np.ndarray): fire records, FIRE_DTYPE
+        """
+        self.start(timeline, devices)
+        try:
+            await self.wait()
+        except asyncio.CancelledError:
+            self.stop()
+            raise
+        return self.records
+
+    ##
+
+    def _configure_thread(self):
+        """Apply real-time policies to the calling thread, best effort."""
+        if self._cpus is not None:
+            try:
+                os.sched_setaffinity(0, self._cpus)
+            except (AttributeError, OSError) as err:
+                logger.warning(f"unable to pin to CPU {self._cpus}, due to {err}")
+        if self._priority is not None:
+            try:
+                param = os.sched_param(self._priority)
+                os.sched_setscheduler(0, os.SCHED_FIFO, param)
+            except (AttributeError, OSError) as err:
+                logger.warning(f"unable to use SCHED_FIFO, due to {err}")
+
+    def _run(self, events, loop):
+        self._configure_thread()
+
+        records, metrics = self._records, Metrics()
+        clock = time.perf_counter_ns
+        t0 = clock()
+        for i, (_, scheduled, func, args) in enumerate(events):
+            deadline = t0 + scheduled
+            # coarse sleep, wakes up early if stopped
+            timeout = deadline - self._spin - clock()
+            if timeout > 0 and self._stop.wait(timeout / 1e9):
+                break
+            if self._stop.is_set():
+                break
+            # spin the rest
+            while clock() < deadline:
+                pass
+
+            t = clock()
+            records["fired"][i] = t - t0
+            try:
+                result = func(*args)
+                if asyncio.iscoroutine(result):
+                    # starts once the loop gets to it
+                    result = self._started(i, result, t0)
+                    self._futures.append(
+                        asyncio.run_coroutine_threadsafe(result, loop)
+                    )
+                else:
+                    records["actual"][i] = t - t0
+                    metrics.record("sequencer_lateness", t - deadline)
+            except Exception as err:
+                self._fail(i, err)
+                break
+
+    async def _started(self, i, coro, t0):
+        """Record the time a submitted action actually starts on the event loop."""
+        t = time.perf_counter_ns() - t0
+        self._records["actual"][i] = t
+        lateness = t - int(self._records["scheduled"][i])
+        Metrics().record("sequencer_lateness", lateness)
+        try:
+            return await coro
+        except Exception as err:
+            self._fail(i, err)
+            raise
+
+    def _fail(self, i, err):
+        """Keep the first failure, and stop firing the rest."""
+        logger.error(f"instruction {i} failed, due to {err}")
+        if self._error is None:
+            self._error = err
+        self._stop.set()
 
 
 class HardwareSequencer(SoftwareSequencer):
@@ -62,11 +292,280 @@ class HardwareSequencer(SoftwareSequencer):
         pass
 
     class PatternBuffer(object):
-        pass
+        """
+        Sampled output pattern of digital lines and analog channels.
+
+        Digital lines are packed as bit-planes, bit i of a sample word is the i-th
+        line. Analog channels hold their value until the next update.
+
+        Args:
+            rate (float): sample rate in Hz
+            lines (list of str): digital lines, in bit order
+            channels (list of str): analog channels
+        """
+
+        MAX_LINES = 32
+
+        def __init__(self, rate: float, lines: Sequence[str] = (), channels=()):
+            if len(lines) > self.MAX_LINES:
+                raise PatternError(f"no more than {self.MAX_LINES} digital lines")
+            self._rate = float(rate)
+            self._lines, self._channels = tuple(lines), tuple(channels)
+            self.resize(0)
+
+        def __len__(self):
+            return len(self.digital)
+
+        def __eq__(self, other):
+            return (
+                isinstance(other, type(self))
+                and self._layout == other._layout
+                and np.array_equal(self.digital, other.digital)
+                and np.array_equal(self.analog, other.analog)
+            )
+
+        ##
+
+        @property
+        def channels(self) -> Tuple[str]:
+            return self._channels
+
+        @property
+        def duration(self) -> float:
+            return len(self) / self._rate
+
+        @property
+        def lines(self) -> Tuple[str]:
+            return self._lines
+
+        @property
+        def rate(self) -> float:
+            return self._rate
+
+        ##
+
+        def resize(self, n_samples: int):
+            """Clear the pattern to n_samples, all lines low and channels at 0."""
+            self.digital = np.zeros(n_samples, dtype=np.uint32)
+            self.analog = np.zeros((len(self._channels), n_samples), dtype=np.float32)
+
+        def compile(self, timeline, digital=None, analog=None):
+            """
+            Compile a timeline into the pattern.
+
+            A digital action is a pulse as long as its duration, an analog action sets
+            its channel to its first argument.
+
+            Args:
+                timeline (Timeline): compiled timeline
+                digital (dict, optional): (device, action) -> line
+                analog (dict, optional): (device, action) -> channel
+
+            Returns:
+                (PatternBuffer): the pattern itself
+            """
+            digital = dict() if digital is None else digital
+            analog = dict() if analog is None else analog
+
+            # an extra sample to hold the final state
+            self.resize(int(math.ceil(timeline.duration * self._rate)) + 1)
+
+            table = timeline.table
+            keys = [
+                (timeline.devices[device], timeline.actions[action])
+                for device, action in zip(table["device"], table["action"])
+            ]
+            for mapping, apply in (
+                (digital, self._compile_pulses),
+                (analog, self._compile_levels),
+            ):
+                targets = dict()
+                for row, key in enumerate(keys):
+                    if key in mapping:
+                        targets.setdefault(mapping[key], []).append(row)
+                for target, rows in targets.items():
+                    apply(timeline, target, np.array(rows))
+
+            logger.debug(
+                f"{len(self)} samples ({self.duration * 1000:.3f} ms) compiled, "
+                f"{len(self.compress()[0])} runs"
+            )
+            return self
+
+        def add_pulses(self, line: str, starts, durations):
+            """
+            Set a digital line high over [start, start + duration).
+
+            Args:
+                line (str): the line
+                starts (array-like): start of the pulses in seconds
+                durations (array-like): duration of the pulses in seconds
+            """
+            starts = np.asarray(starts, dtype=np.float64)
+            ends = starts + np.asarray(durations, dtype=np.float64)
+            starts, ends = self._to_samples(starts), self._to_samples(ends)
+            # a pulse is at least a sample long
+            short = ends <= starts
+            if short.any():
+                logger.warning(
+                    f'{np.count_nonzero(short)} pulse(s) on "{line}" are shorter than '
+                    f"a sample ({1e6 / self._rate:.3f} us)"
+                )
+                ends = np.maximum(ends, starts + 1)
+
+            # overlapped pulses merge
+            edges = np.zeros(len(self) + 1, dtype=np.int32)
+            np.add.at(edges, starts, 1)
+            np.add.at(edges, np.minimum(ends, len(self)), -1)
+            high = np.cumsum(edges[:-1]) > 0
+
+            bit = np.uint32(1 << self._lines.index(line))
+            self.digital[high] |= bit
+
+        def set_levels(self, channel: str, times, values):
+            """
+            Set an analog channel to a value at each time, until the next one.
+
+            Args:
+                channel (str): the channel
+                times (array-like): time of the updates in seconds
+                values (array-like): new values
+            """
+            times = self._to_samples(np.asarray(times, dtype=np.float64))
+            values = np.asarray(values, dtype=np.float32)
+            order = np.argsort(times, kind="stable")
+            times, values = times[order], values[order]
+
+            # latest update of each sample, the last one wins in the same sample
+            latest = np.searchsorted(times, np.arange(len(self)), side="right") - 1
+            updated = latest >= 0
+            self.analog[self._channels.index(channel), updated] = values[
+                latest[updated]
+            ]
+
+        ##
+
+        def validate(self, capacity: Optional[int] = None, analog_range=None):
+            """
+            Ensure the pattern can be uploaded.
+
+            Args:
+                capacity (int, optional): maximum number of samples
+                analog_range (tuple of float, optional): (min, max) of analog outputs
+
+            Raises:
+                PatternError: the pattern does not fit
+            """
+            if len(self) == 0:
+                raise PatternError("pattern is empty")
+            if capacity is not None and len(self) > capacity:
+                raise PatternError(
+                    f"pattern requires {len(self)} samples, exceeds {capacity}"
+                )
+            if not np.isfinite(self.analog).all():
+                raise PatternError("analog outputs are not finite")
+            if analog_range is not None and self.analog.size > 0:
+                vmin, vmax = analog_range
+                lo, hi = self.analog.min(), self.analog.max()
+                if lo < vmin or hi > vmax:
+                    raise PatternError(
+                        f"analog outputs span [{lo}, {hi}], exceeds [{vmin}, {vmax}]"
+                    )
+
+        def diff(self, other) -> List[Tuple[int, int]]:
+            """
+            Sample ranges [start, end) that differ from another pattern.
+
+            Args:
+                other (PatternBuffer): previous pattern
+            """
+            if self._layout != other._layout:
+                return [(0, len(self))] if len(self) > 0 else []
+            return _diff_rows(
+                (self.digital, self.analog), (other.digital, other.analog)
+            )
+
+        def compress(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            """
+            Run-length encode the pattern.
+
+            Returns:
+                (tuple): length of each run, and its digital word and analog values
+            """
+            if len(self) == 0:
+                return self.digital, self.digital, self.analog
+            changed = np.diff(self.digital) != 0
+            if self.analog.size > 0:
+                changed |= (np.diff(self.analog, axis=1) != 0).any(axis=0)
+            starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+            lengths = np.diff(np.append(starts, len(self))).astype(np.uint32)
+            return lengths, self.digital[starts], self.analog[:, starts]
+
+        ##
+
+        @property
+        def _layout(self):
+            return self._rate, self._lines, self._channels
+
+        def _to_samples(self, t: np.ndarray) -> np.ndarray:
+            samples = np.round(t * self._rate).astype(np.int64)
+            return np.clip(samples, 0, len(self))
+
+        def _compile_pulses(self, timeline, line, rows):
+            table = timeline.table
+            self.add_pulses(line, table["time"][rows], table["duration"][rows])
+
+        def _compile_levels(self, timeline, channel, rows):
+            table = timeline.table
+            values = []
+            for row in rows:
+                args = timeline.args[table["args"][row]]
+                if not args:
+                    raise PatternError(
+                        f'analog action "{timeline.actions[table["action"][row]]}" '
+                        "requires a value"
+                    )
+                values.append(args[0])
+            self.set_levels(channel, table["time"][rows], values)
+
+    CHUNK_SIZE = 4096  # samples, or runs, per transfer
 
     @abstractmethod
     def __init__(self):
         super().__init__()
+        self._uploaded = None
+
+    ##
+
+    @property
+    def analog_range(self) -> Optional[Tuple[float, float]]:
+        """Range of analog outputs, unbounded if None."""
+        return None
+
+    @property
+    @abstractmethod
+    def capacity(self) -> int:
+        """Maximum samples, or runs if the sequencer is run-length based."""
+
+    @property
+    def is_run_length(self) -> bool:
+        """Does the sequencer take run-length encoded patterns?"""
+        return False
+
+    @property
+    @abstractmethod
+    def rate(self) -> float:
+        """Sample rate in Hz."""
+
+    @property
+    @abstractmethod
+    def lines(self) -> Tuple[str]:
+        """Digital output lines."""
+
+    @property
+    @abstractmethod
+    def channels(self) -> Tuple[str]:
+        """Analog output channels."""
 
     @property
     def digital(self):
@@ -77,6 +576,89 @@ class HardwareSequencer(SoftwareSequencer):
     def analog(self):
         pass
 
+    ##
+
+    def create_pattern(self) -> "HardwareSequencer.PatternBuffer":
+        """Create an empty pattern that matches the outputs of the sequencer."""
+        return self.PatternBuffer(self.rate, self.lines, self.channels)
+
+    async def upload(self, pattern: "HardwareSequencer.PatternBuffer") -> int:
+        """
+        Upload a pattern, only parts that changed since last upload are transferred.
+
+        Args:
+            pattern (PatternBuffer): the pattern
+
+        Returns:
+            (int): number of samples, or runs, transferred
+
+        Raises:
+            PatternError: the pattern does not fit
+        """
+        if pattern._layout != (self.rate, self.lines, self.channels):
+            raise PatternError("pattern does not match outputs of the sequencer")
+
+        if self.is_run_length:
+            lengths, digital, analog = pattern.compress()
+            if len(lengths) > self.capacity:
+                raise PatternError(
+                    f"pattern requires {len(lengths)} runs, exceeds {self.capacity}"
+                )
+            pattern.validate(analog_range=self.analog_range)
+            data = (lengths, digital, analog)
+        else:
+            pattern.validate(self.capacity, self.analog_range)
+            data = (pattern.digital, pattern.analog)
+
+        ranges = [(0, len(data[0]))]
+        if self._uploaded is not None:
+            ranges = _diff_rows(data, self._uploaded)
+
+        # content of the memory is unknown until every write succeeds
+        self._uploaded = None
+
+        n = 0
+        await self._resize_pattern(len(data[0]))
+        for start, end in ranges:
+            for offset in range(start, end, self.CHUNK_SIZE):
+                stop = min(offset + self.CHUNK_SIZE, end)
+                await self._write_pattern(
+                    offset, *(array[..., offset:stop] for array in data)
+                )
+                n += stop - offset
+        self._uploaded = tuple(array.copy() for array in data)
+
+        logger.debug(
+            f"{n} of {len(data[0])} entries uploaded in {len(ranges)} range(s)"
+        )
+        return n
+
+    def invalidate(self):
+        """
+        Forget the uploaded pattern, next upload transfers the entire pattern.
+
+        Drivers should call this on close or reconnect, since the pattern memory may
+        be lost or altered in between.
+        """
+        self._uploaded = None
+
+    ##
+
+    @abstractmethod
+    async def _resize_pattern(self, n: int):
+        """Resize the pattern memory to n entries, existing entries are kept."""
+
+    @abstractmethod
+    async def _write_pattern(self, offset: int, *data):
+        """
+        Write a chunk of the pattern.
+
+        Args:
+            offset (int): offset of the chunk in samples, or runs
+            data : digital words and analog values, prefixed by lengths of the runs if
+                the sequencer is run-length based
+        """
+
     """
     # TODO
 
@@ -91,3 +673,26 @@ class HardwareSequencer(SoftwareSequencer):
         - edge
         - level
     """
+
+
+def _diff_rows(a, b) -> List[Tuple[int, int]]:
+    """
+    Ranges [start, end) of entries that differ, entries are along the last axis.
+
+    Args:
+        a (tuple of np.ndarray): new columns
+        b (tuple of np.ndarray): old columns
+    """
+    n, m = a[0].shape[-1], b[0].shape[-1]
+    k = min(n, m)
+    changed = np.zeros(k, dtype=bool)
+    for x, y in zip(a, b):
+        neq = x[..., :k] != y[..., :k]
+        changed |= neq.reshape(-1, k).any(axis=0) if neq.ndim > 1 else neq
+    if n > k:
+        # new entries are always written
+        changed = np.append(changed, np.ones(n - k, dtype=bool))
+
+    edges = np.diff(changed.astype(np.int8), prepend=0, append=0)
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    return list(zip(starts.tolist(), ends.tolist()))
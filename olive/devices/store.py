@@ -0,0 +1,99 @@
+import json
+import logging
+import os
+import re
+from typing import Any, Dict
+
+from olive.utils import Singleton
+
+__all__ = ["DeviceStore"]
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceStore(metaclass=Singleton):
+    """
+    On-disk store of device calibrations and capabilities.
+
+    Each device owns a record identified by its vendor, model and serial number. A
+    record is dropped when firmware version changes, since capabilities may change
+    along with it.
+
+    Args:
+        root (str, optional): directory to store the records
+    """
+
+    def __init__(self, root=None):
+        if root is None:
+            root = os.path.join(os.path.expanduser("~"), ".olive", "devices")
+        self._root = root
+
+    ##
+
+    @property
+    def root(self):
+        return self._root
+
+    ##
+
+    def load(self, info) -> Dict[str, Any]:
+        """
+        Load record of a device.
+
+        Args:
+            info (DeviceInfo): identity of the device
+
+        Returns:
+            (dict): entries of the record, empty if unknown or outdated
+        """
+        path = self._get_path(info)
+        if path is None:
+            return dict()
+
+        try:
+            with open(path, "r") as fd:
+                record = json.load(fd)
+        except FileNotFoundError:
+            logger.debug(f"no record for {info}")
+            return dict()
+        except json.JSONDecodeError:
+            logger.warning(f'corrupted record "{path}", ignored')
+            return dict()
+
+        if record.get("version", "") != info.version:
+            logger.info(f"firmware of {info} changed, record dropped")
+            return dict()
+
+        entries = record.get("entries", dict())
+        logger.debug(f"{len(entries)} entr(ies) restored for {info}")
+        return entries
+
+    def save(self, info, entries: Dict[str, Any]):
+        """
+        Save record of a device.
+
+        Args:
+            info (DeviceInfo): identity of the device
+            entries (dict): entries of the record, values have to be JSON serializable
+        """
+        path = self._get_path(info)
+        if path is None:
+            logger.debug(f"{info} does not have a serial number, record not saved")
+            return
+
+        os.makedirs(self.root, exist_ok=True)
+        # avoid corrupting the record on failures
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as fd:
+            json.dump({"version": info.version, "entries": entries}, fd, indent=2)
+        os.replace(tmp_path, path)
+
+    ##
+
+    def _get_path(self, info):
+        if info is None or not info.serial_number:
+            return None
+        tokens = (info.vendor, info.model, info.serial_number)
+        name = "_".join(token for token in tokens if token)
+        name = re.sub(r"[^\w\-.]", "_", name)
+        return os.path.join(self.root, f"{name}.json")
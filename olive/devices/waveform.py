@@ -0,0 +1,98 @@
+"""
+Periodic scan waveforms, e.g. for galvanometer mirrors.
+"""
+from dataclasses import dataclass
+from enum import auto, Enum
+from functools import lru_cache
+import logging
+
+import numpy as np
+
+__all__ = ["Waveform", "WaveformShape", "synthesize_waveform"]
+
+logger = logging.getLogger(__name__)
+
+
+class WaveformShape(Enum):
+    Sawtooth = auto()
+    Triangle = auto()
+    Sine = auto()
+    Flyback = auto()  # linear scan, smooth return
+
+
+@dataclass(frozen=True)
+class Waveform:
+    """
+    Parameters of a waveform table, a period spans the entire table.
+
+    Args:
+        shape (WaveformShape): shape of the waveform
+        amplitude (float): half of the peak-to-peak span
+        offset (float): center of the span
+        phase (float): phase shift as a fraction of the period
+        flyback (float): fraction of the period to return, Flyback only
+    """
+
+    shape: WaveformShape = WaveformShape.Sawtooth
+    amplitude: float = 1.0
+    offset: float = 0.0
+    phase: float = 0.0
+    flyback: float = 0.2
+
+
+@lru_cache(maxsize=64)
+def synthesize_waveform(waveform: Waveform, size: int) -> np.ndarray:
+    """
+    Synthesize a waveform table.
+
+    Tables are memoized by their parameters, returned arrays are read-only.
+
+    Args:
+        waveform (Waveform): the waveform
+        size (int): number of samples in the table
+    """
+    if size < 2:
+        raise ValueError("table requires at least 2 samples")
+    # phase of each sample, in [0, 1)
+    t = np.mod(np.arange(size) / size + waveform.phase, 1.0)
+
+    if waveform.shape == WaveformShape.Sawtooth:
+        y = 2 * t - 1
+    elif waveform.shape == WaveformShape.Triangle:
+        y = 1 - 4 * np.abs(t - 0.5)
+    elif waveform.shape == WaveformShape.Sine:
+        y = np.sin(2 * np.pi * t)
+    elif waveform.shape == WaveformShape.Flyback:
+        y = _flyback(t, waveform.flyback)
+    else:
+        raise ValueError(f'unknown waveform shape "{waveform.shape}"')
+
+    table = waveform.offset + waveform.amplitude * y
+    table.flags.writeable = False
+    logger.debug(f"synthesized {waveform.shape.name} table of {size} samples")
+    return table
+
+
+def _flyback(t: np.ndarray, flyback: float) -> np.ndarray:
+    """
+    Linear scan over [-1, 1), then returns by a cubic Hermite curve, position and
+    velocity are continuous at both ends to spare the mirror from ringing.
+    """
+    if not 0 < flyback < 1:
+        raise ValueError("flyback has to be a fraction of the period")
+    scan = 1 - flyback
+    slope = 2 / scan
+
+    y = np.empty_like(t)
+    is_scan = t < scan
+    y[is_scan] = -1 + slope * t[is_scan]
+
+    # normalized time on the return
+    s = (t[~is_scan] - scan) / flyback
+    s2, s3 = s * s, s * s * s
+    h00, h10 = 2 * s3 - 3 * s2 + 1, s3 - 2 * s2 + s
+    h01, h11 = -2 * s3 + 3 * s2, s3 - s2
+    # from 1 back to -1, with the scan velocity on both ends
+    m = slope * flyback
+    y[~is_scan] = h00 * 1 + h10 * m + h01 * (-1) + h11 * m
+    return y
@@ -4,7 +4,6 @@ import math
 import re
 from dataclasses import dataclass
 from enum import Enum
-from functools import lru_cache
 from typing import Iterable
 
 from serial_asyncio import open_serial_connection
@@ -17,7 +16,11 @@ from olive.devices.error import (
     UnsupportedClassError,
 )
 from olive.drivers.base import Driver
-from olive.drivers.utils import SerialPortManager
+from olive.drivers.utils import (
+    MeteredStreamReader,
+    MeteredStreamWriter,
+    SerialPortManager,
+)
 
 __all__ = ["MultiDigitalSynthesizer"]
 
@@ -63,10 +66,15 @@ class MDSnC(AcustoOpticalModulator):
         self._port = port
         # stream r/w pair
         self._reader, self._writer = None, None
+        # a line command is not complete until its status is received
+        self._lock = asyncio.Lock()
 
         # cached
-        self._command_list = None
-        self._n_channels = -1
+        self._identity = None
+        self._n_channels, self._power_range = -1, None
+
+        # line parameters changed since open, EEPROM has limited write cycles
+        self._is_dirty = False
 
     ##
 
@@ -74,6 +82,10 @@ class MDSnC(AcustoOpticalModulator):
     def is_busy(self):
         return False  # nothing to be busy about
 
+    @property
+    def port(self):
+        return self._port
+
     @property
     def is_opened(self):
         """Is the device opened?"""
@@ -82,69 +94,39 @@ class MDSnC(AcustoOpticalModulator):
     ##
 
     async def test_open(self):
+        """Only query the identity, control mode and EEPROM are left untouched."""
+        await self._open_connection()
         try:
-            await self.open()
             logger.info(f".. {await self.get_device_info()}")
             # TODO verify device version
         except (DeviceTimeoutError, SyntaxError):
             raise UnsupportedClassError
         finally:
-            await self.close()
+            await self._close_connection()
 
     async def _open(self):
         """Open connection to the synthesizer and seize its internal control."""
-        loop = asyncio.get_running_loop()
-
-        port = await self.driver.manager.request_port(self._port)
-        self._reader, self._writer = await open_serial_connection(
-            loop=loop, url=port, baudrate=self.BAUDRATE
-        )
-
-        self._command_list = await self._get_command_list()
-        self._n_channels = await self._get_number_of_channels()
+        await self._open_connection()
 
         await self._set_control_voltage(ControlVoltage.FIVE_VOLT)
         await self._set_control_mode(ControlMode.EXTERNAL)
 
+    async def _post_open(self):
+        await self._load_capabilities()
+
     async def _close(self):
         await self._set_control_mode(ControlMode.INTERNAL)
-        await self._save_parameters()
+        if self._is_dirty:
+            await self._save_parameters()
 
-        self._writer.close()
-        await self._writer.wait_closed()
-
-        self.driver.manager.release_port(self._port)
-
-        self._reader, self._writer = None, None
+        await self._close_connection()
 
     ##
 
     async def get_device_info(self):
-        # parse firmware version
-        matches = re.search(
-            self.VERSION_PATTERN, self._command_list, flags=re.MULTILINE
-        )
-        if matches:
-            version = matches.group(1)
-        else:
-            raise SyntaxError("unable to find version string")
-
-        # request serial
-        self._writer.write(b"q\r")
-        await self._writer.drain()
-        serial = await self._reader.readuntil(b"?")
-        serial = serial.decode()
-
-        # parse serial
-        matches = re.search(self.SERIAL_PATTERN, serial)
-        if matches:
-            serial = matches.group(1)
-        else:
-            raise SyntaxError("unable to find serial number")
-
-        return DeviceInfo(
-            version=version, vendor="AA", model="MDSnC", serial_number=serial
-        )
+        if self._identity is None:
+            self._identity = await self._get_identity()
+        return self._identity
 
     ##
 
@@ -216,6 +198,11 @@ class MDSnC(AcustoOpticalModulator):
     ##
 
     async def get_frequency_range(self, alias, frange=(0, 1000)):
+        key = f"frequency_range/{self._channels[alias]}"
+        cached = self.get_record(key)
+        if cached is not None:
+            return tuple(cached)
+
         state0 = await self.is_enabled(alias)
         if state0:
             await self.disable(alias)
@@ -231,6 +218,7 @@ class MDSnC(AcustoOpticalModulator):
         if state0:
             await self.enable(alias)
 
+        self.set_record(key, (fmin, fmax))
         return (fmin, fmax)
 
     async def get_frequency(self, alias):
@@ -244,12 +232,17 @@ class MDSnC(AcustoOpticalModulator):
         """
         Test power range for _current_ frequency setting.
         """
-        state0 = await self.is_enabled(alias)
+        status0 = await self._get_line_status(alias)
+        key = f"power_range/{self._channels[alias]}/{status0.frequency:.2f}"
+        cached = self.get_record(key)
+        if cached is not None:
+            return tuple(cached)
+
+        state0, power0 = status0.switch, status0.power
         if state0:
             await self.disable(alias)
-        power0 = await self.get_power(alias)
 
-        vmin, vmax = self._discrete_power_range()
+        vmin, vmax = self._power_range
         # test lower/upper bound by discrete power level
         pmin = await self._set_line_status(alias, discrete_power=vmin, validate=False)
         pmax = await self._set_line_status(alias, discrete_power=vmax, validate=False)
@@ -260,6 +253,7 @@ class MDSnC(AcustoOpticalModulator):
         if state0:
             await self.enable(alias)
 
+        self.set_record(key, (pmin, pmax))
         return (pmin, pmax)
 
     async def get_power(self, alias):
@@ -269,24 +263,110 @@ class MDSnC(AcustoOpticalModulator):
     async def set_power(self, alias, power):
         await self._set_line_status(alias, power=power)
 
+    async def configure_channel(self, alias, frequency=None, power=None, enable=None):
+        kwargs = {"frequency": frequency, "power": power, "switch": enable}
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
+        if kwargs:
+            # single line command
+            await self._set_line_status(alias, **kwargs)
+
     ##
 
-    async def _get_command_list(self, timeout=1, n_retry=3):
+    async def _open_connection(self):
+        loop = asyncio.get_running_loop()
+
+        port = await self.driver.manager.request_port(self._port)
+        try:
+            reader, writer = await open_serial_connection(
+                loop=loop, url=port, baudrate=self.BAUDRATE
+            )
+            self._reader = MeteredStreamReader(reader, port)
+            self._writer = MeteredStreamWriter(writer, port)
+        except Exception:
+            self.driver.manager.release_port(self._port)
+            raise
+
+    async def _close_connection(self):
+        if not self.is_opened:
+            return
+
+        self._writer.close()
+        await self._writer.wait_closed()
+
+        self.driver.manager.release_port(self._port)
+
+        self._reader, self._writer = None, None
+        # the device may be swapped before next open
+        self._identity = None
+
+    async def _get_identity(self) -> DeviceInfo:
+        """
+        Identify the device by a single query.
+
+        Unknown commands are answered by the command list, which starts with the serial
+        number. Firmware version is parsed as well if the banner contains it, otherwise,
+        a full command list is requested.
+        """
+        response = await self._get_command_list(command=b"q\r")
+
+        # parse serial
+        matches = re.search(self.SERIAL_PATTERN, response)
+        if matches:
+            serial = matches.group(1)
+        else:
+            raise SyntaxError("unable to find serial number")
+
+        # parse firmware version
+        matches = re.search(self.VERSION_PATTERN, response, flags=re.MULTILINE)
+        if not matches:
+            response = await self._get_command_list()
+            matches = re.search(self.VERSION_PATTERN, response, flags=re.MULTILINE)
+        if matches:
+            version = matches.group(1)
+        else:
+            raise SyntaxError("unable to find version string")
+
+        return DeviceInfo(
+            version=version, vendor="AA", model="MDSnC", serial_number=serial
+        )
+
+    async def _load_capabilities(self):
+        """
+        Restore capabilities of this firmware, probe them if unknown.
+
+        Capabilities are saved along with the device record, which is dropped when
+        the firmware version changes.
+        """
+        capabilities = self.get_record("capabilities")
+        if capabilities is not None:
+            self._power_range = tuple(capabilities["discrete_power_range"])
+            self._n_channels = capabilities["n_channels"]
+            logger.debug(f"capabilities of {self.info} restored")
+            return
+        logger.debug(f"probing capabilities of {self.info}")
+
+        command_list = await self._get_command_list()
+        self._power_range = self._parse_discrete_power_range(command_list)
+        self._n_channels = await self._get_number_of_channels()
+
+        self.set_record(
+            "capabilities",
+            {"discrete_power_range": self._power_range, "n_channels": self._n_channels},
+        )
+
+    async def _get_command_list(self, command=b"\r", timeout=1, n_retry=3):
         """
         Get command list using dummy <ENTER>.
 
         Args:
+            command (bytes, optional): command that triggers the command list
             timeout (int, optional): timeout in seconds
 
         Returns:
             (str): decoded raw command list
         """
-        if self._command_list is not None:
-            return self._command_list
-        logger.debug(f"command list not cached")
-
         for i_retry in range(n_retry):
-            self._writer.write(b"\r")
+            self._writer.write(command)
             await self._writer.drain()
 
             try:
@@ -301,24 +381,25 @@ class MDSnC(AcustoOpticalModulator):
         else:
             raise DeviceTimeoutError()
 
-    @lru_cache(maxsize=1)
-    def _discrete_power_range(self):
+    @classmethod
+    def _parse_discrete_power_range(cls, command_list):
         """
         Use fast channel command description to boostrap discrete steps.
         """
-        matches = re.search(
-            self.POWER_RANGE_PATTERN, self._command_list, flags=re.MULTILINE
-        )
+        matches = re.search(cls.POWER_RANGE_PATTERN, command_list, flags=re.MULTILINE)
         if matches:
             return (int(matches.group(1)), int(matches.group(2)))
         else:
             raise SyntaxError("unable to parse discrete power range")
 
-    async def _get_line_status(self, alias, from_response=False) -> LineStatus:
-        if not from_response:
+    async def _get_line_status(self, alias) -> LineStatus:
+        async with self._lock:
             self._writer.write(f"L{self._channels[alias]}\r".encode())
             await self._writer.drain()
 
+            return await self._read_line_status()
+
+    async def _read_line_status(self) -> LineStatus:
         response = await self._reader.readuntil(b"\r")
         response = response.decode()
 
@@ -363,12 +444,14 @@ class MDSnC(AcustoOpticalModulator):
         commands = "".join(commands) + "\r"
         logger.debug(f"write [{commands[:-1]}]")
 
-        # send it
-        self._writer.write(commands.encode())
-        await self._writer.drain()
+        async with self._lock:
+            # send it
+            self._writer.write(commands.encode())
+            await self._writer.drain()
+            self._is_dirty = True
 
-        # clear out receive buffer
-        status = await self._get_line_status(alias, from_response=True)
+            # clear out receive buffer
+            status = await self._read_line_status()
         if validate:
             for key, value0 in kwargs.items():
                 if key not in ("frequency", "power", "switch"):
@@ -399,6 +482,7 @@ class MDSnC(AcustoOpticalModulator):
         """Save parameters in the EEPROM."""
         self._writer.write(b"E\r")
         await self._writer.drain()
+        self._is_dirty = False
 
 
 class MultiDigitalSynthesizer(Driver):
@@ -414,7 +498,7 @@ class MultiDigitalSynthesizer(Driver):
 
     ##
 
-    def initialize(self):
+    async def initialize(self):
         self.manager.refresh()
 
     def _enumerate_device_candidates(self) -> Iterable[MDSnC]:
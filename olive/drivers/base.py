@@ -1,9 +1,10 @@
 import asyncio
+import itertools
 import logging
 from abc import ABCMeta, abstractmethod
-from typing import Iterable, Tuple, get_type_hints
+from typing import AsyncIterator, Iterable, Optional, Tuple, get_type_hints
 
-from olive.devices.base import Device, DeviceType
+from olive.devices.base import Device, DeviceRegistry, DeviceType
 from olive.devices.error import UnsupportedClassError
 
 __all__ = ["Driver", "DriverType"]
@@ -21,9 +22,14 @@ class Driver(metaclass=DriverType):
 
     ##
 
+    @property
+    def devices(self) -> Tuple[Device]:
+        """Devices found in last enumeration."""
+        return tuple(self._devices)
+
     @property
     def is_active(self):
-        return any(device.is_opened() for device in self._devices)
+        return any(device.is_opened for device in self._devices)
 
     ##
 
@@ -48,38 +54,100 @@ class Driver(metaclass=DriverType):
         Note:
             Returned devices are NOT active yet.
         """
+        async for _ in self.iter_devices():
+            pass
+        return tuple(self._devices)
+
+    async def iter_devices(
+        self, ports: Optional[Iterable[str]] = None
+    ) -> AsyncIterator[Device]:
+        """
+        Enumerate devices, and yield newly found devices as soon as they are tested.
+
+        Args:
+            ports (list of str, optional): only probe candidates on these ports,
+                devices on other ports are left untouched
+
+        Note:
+            Yielded devices are NOT active yet, while devices that are already active
+            are not yielded.
+        """
         candidates = self._enumerate_device_candidates()
+        if ports is not None:
+            ports = set(ports)
+            candidates = [
+                device for device in candidates if self.get_device_port(device) in ports
+            ]
 
         # ignore devices that are already active
-        active_devices = [device for device in self._devices if device.is_opened()]
+        active_devices = [device for device in self._devices if device.is_opened]
         logger.debug(
             f"there are {len(active_devices)} active device(s) during enumeration"
         )
         candidates = [device for device in candidates if device not in active_devices]
 
-        inactive_devices = []
-        if candidates:
-            # test device support
-            tasks = [device.test_open() for device in candidates]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            for device, result in zip(candidates, results):
-                if result is None:
-                    inactive_devices.append(device)
-                else:
-                    try:
-                        raise result
-                    except UnsupportedClassError:
-                        # known unsupported case
-                        continue
-                    except Exception as e:
-                        # grace fully logged and ignored
-                        logger.error(str(e))
-
-        # combine results and refresh internal book-keeping
-        self._devices = active_devices + inactive_devices
+        # refresh internal book-keeping as devices are found
+        self._devices = self._keep_devices(active_devices, ports)
+
+        async def test_open(device):
+            try:
+                await device.test_open()
+                return device
+            except UnsupportedClassError:
+                # known unsupported case
+                pass
+            except Exception as e:
+                # grace fully logged and ignored
+                logger.error(str(e))
+
+        # test device support
+        tasks = [asyncio.ensure_future(test_open(device)) for device in candidates]
+        try:
+            for task in asyncio.as_completed(tasks):
+                device = await task
+                if device is not None:
+                    self._devices.append(device)
+                    yield device
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def forget_ports(self, ports: Iterable[str]) -> Tuple[Device]:
+        """
+        Drop devices that reside on ports that no longer exist.
 
-        return tuple(self._devices)
+        Args:
+            ports (list of str): removed ports
+
+        Returns:
+            (tuple of Device): dropped devices, they may still be active
+        """
+        ports = set(ports)
+        devices = [
+            device for device in self._devices if self.get_device_port(device) in ports
+        ]
+        self._devices = [device for device in self._devices if device not in devices]
+        return tuple(devices)
+
+    @staticmethod
+    def get_device_port(device: Device) -> Optional[str]:
+        """Physical port of a device, inherited from its parent if it has none."""
+        while device is not None:
+            port = getattr(device, "port", None)
+            if port is not None:
+                return port
+            device = device.parent
+        return None
+
+    def _keep_devices(self, active_devices, ports) -> list:
+        """Devices to keep before a (partial) enumeration."""
+        if ports is None:
+            return active_devices
+        return [
+            device
+            for device in self._devices
+            if device in active_devices or self.get_device_port(device) not in ports
+        ]
 
     @abstractmethod
     def _enumerate_device_candidates(self) -> Iterable[Device]:
@@ -93,15 +161,26 @@ class Driver(metaclass=DriverType):
     @classmethod
     def enumerate_supported_device_types(cls) -> Iterable[DeviceType]:
         """List device types that this driver may support."""
+        # derived from the class definition, resolve once per driver class
+        try:
+            return cls.__dict__["_supported_device_types"]
+        except KeyError:
+            pass
         hints = get_type_hints(cls._enumerate_device_candidates)["return"]
         try:
             klasses = hints.__args__
         except AttributeError:
             # not an iterable
             klasses = [hints]
+        # flatten unions, e.g. Iterable[Union[A, B]]
+        klasses = list(
+            itertools.chain.from_iterable(getattr(k, "__args__", (k,)) for k in klasses)
+        )
 
         # remap to device primitives
-        device_klasses = []
+        registry = DeviceRegistry()
+        device_klasses = set()
         for klass in klasses:
-            device_klasses.extend(klass.__bases__)
-        return tuple(set(device_klasses) & set(Device.__subclasses__()))
+            device_klasses |= registry.get_primitives(klass)
+        cls._supported_device_types = tuple(device_klasses)
+        return cls._supported_device_types
@@ -1 +1,4 @@
 from .camera import *
+from .galvo import *
+from .motion import *
+from .sequencer import *
@@ -104,11 +104,11 @@ class PseudoCameraDriver(object):  # Driver):
 
     ##
 
-    def initialize(self):
+    async def initialize(self):
         root = os.path.join(os.path.dirname(__file__), "resources")
         self._resources.extend(glob.glob(os.path.join(root, "*.tif")))
 
-    def shutdown(self):
+    async def shutdown(self):
         self._resources = []
 
     async def enumerate_devices(self) -> Iterable[PseudoCamera]:
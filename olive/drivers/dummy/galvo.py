@@ -0,0 +1,82 @@
+import logging
+from typing import List, Tuple
+
+import numpy as np
+
+from olive.devices import Galvo
+from olive.devices.base import DeviceInfo
+
+__all__ = ["PseudoGalvo"]
+
+logger = logging.getLogger(__name__)
+
+
+class PseudoGalvo(Galvo):
+    """
+    Simulated galvanometer mirror, the waveform table lives in host memory.
+
+    Args:
+        driver : driver that instantiate this device
+        table_size (int, optional): number of samples in the waveform table
+        amplitude_range (tuple of float, optional): (min, max) output
+    """
+
+    def __init__(
+        self,
+        driver=None,
+        *,
+        parent=None,
+        table_size=1024,
+        amplitude_range=(-10.0, 10.0),
+    ):
+        super().__init__(driver, parent=parent)
+        self._table_size, self._amplitude_range = table_size, tuple(amplitude_range)
+        self._frequency = 1.0
+
+        self._is_opened = False
+        # tables written to the device, the last one is playing
+        self.uploads: List[np.ndarray] = []
+
+    ##
+
+    async def test_open(self):
+        pass
+
+    async def _open(self):
+        self._is_opened = True
+
+    async def _close(self):
+        self._is_opened = False
+
+    ##
+
+    async def enumerate_properties(self):
+        return tuple()
+
+    @property
+    def is_opened(self):
+        return self._is_opened
+
+    async def get_device_info(self):
+        return DeviceInfo(
+            version="0.0", vendor="olive", model="PseudoGalvo", serial_number=None
+        )
+
+    ##
+
+    async def get_table_size(self) -> int:
+        return self._table_size
+
+    async def get_amplitude_range(self) -> Tuple[float, float]:
+        return self._amplitude_range
+
+    async def get_frequency(self) -> float:
+        return self._frequency
+
+    async def set_frequency(self, frequency: float):
+        self._frequency = frequency
+
+    ##
+
+    async def _write_table(self, table: np.ndarray):
+        self.uploads.append(table.copy())
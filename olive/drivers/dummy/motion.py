@@ -0,0 +1,196 @@
+import asyncio
+from collections import deque
+import logging
+import math
+from typing import List, Tuple
+
+from olive.devices import LimitStatus, LinearAxis
+from olive.devices.base import DeviceInfo
+from olive.devices.motion import estimate_move_time
+
+__all__ = ["PseudoAxis"]
+
+logger = logging.getLogger(__name__)
+
+
+class PseudoAxis(LinearAxis):
+    """
+    Simulated linear axis, moves take the time of a trapezoidal velocity profile.
+
+    Args:
+        driver : driver that instantiate this device
+        velocity (float, optional): maximum velocity
+        acceleration (float, optional): acceleration
+        capacity (int, optional): size of the trajectory buffer, 0 if not supported
+        time_scale (float, optional): scale of the simulated time
+    """
+
+    def __init__(
+        self,
+        driver=None,
+        *,
+        parent=None,
+        velocity=10.0,
+        acceleration=100.0,
+        capacity=0,
+        time_scale=1.0,
+    ):
+        super().__init__(driver, parent=parent)
+        self._position, self._origin = 0.0, 0.0
+        self._velocity, self._acceleration = velocity, acceleration
+        self._limits = (-math.inf, math.inf)
+        self._capacity, self._time_scale = capacity, time_scale
+
+        self._is_opened = False
+        self._motion = None
+        # trajectory buffer, and number of points reached
+        self._buffer, self._reached = deque(), 0
+        # index of the points that output a trigger
+        self.triggers: List[int] = []
+
+    ##
+
+    async def test_open(self):
+        pass
+
+    async def _open(self):
+        self._is_opened = True
+
+    async def _close(self):
+        self.stop()
+        self._is_opened = False
+
+    ##
+
+    async def enumerate_properties(self):
+        return tuple()
+
+    @property
+    def is_opened(self):
+        return self._is_opened
+
+    async def get_device_info(self):
+        return DeviceInfo(
+            version="0.0", vendor="olive", model="PseudoAxis", serial_number=None
+        )
+
+    ## position ##
+    async def go_home(self, blocking=True):
+        await self.move_absolute(0.0, blocking)
+
+    def get_position(self):
+        return self._position - self._origin
+
+    async def move_absolute(self, pos, blocking=True):
+        lo, hi = self._limits
+        if not lo <= pos <= hi:
+            raise ValueError(f"{pos} is beyond the limits [{lo}, {hi}]")
+        await self.wait()
+        self._motion = asyncio.ensure_future(self._move(pos + self._origin))
+        if blocking:
+            await self.wait()
+
+    async def move_relative(self, pos, blocking=True):
+        await self.move_absolute(self.get_position() + pos, blocking)
+
+    def move_continuous(self, vel):
+        raise NotImplementedError
+
+    ## velocity ##
+    def get_velocity(self):
+        return self._velocity
+
+    def set_velocity(self, vel):
+        self._velocity = vel
+
+    ## acceleration ##
+    def get_acceleration(self):
+        return self._acceleration
+
+    def set_acceleration(self, acc):
+        self._acceleration = acc
+
+    ## constraints ##
+    def set_origin(self):
+        self._origin = self._position
+
+    def get_limits(self) -> Tuple[float, float]:
+        return self._limits
+
+    def get_limit_status(self) -> LimitStatus:
+        lo, hi = self._limits
+        if self.get_position() <= lo:
+            return LimitStatus.LowerLimit
+        elif self.get_position() >= hi:
+            return LimitStatus.UpperLimit
+        return LimitStatus.WithinRange
+
+    def set_limits(self, limits=(-math.inf, math.inf)):
+        self._limits = tuple(limits)
+
+    ## utils ##
+    async def calibrate(self):
+        pass
+
+    def stop(self, emergency=False):
+        self._buffer.clear()
+        if self._motion is not None:
+            self._motion.cancel()
+
+    async def wait(self):
+        if self._motion is not None:
+            try:
+                await self._motion
+            except asyncio.CancelledError:
+                pass
+
+    ## trajectory ##
+    async def get_trajectory_capacity(self) -> int:
+        return self._capacity
+
+    async def _queue_trajectory(self, positions, velocities, triggers):
+        if len(self._buffer) + len(positions) > self._capacity:
+            raise RuntimeError("trajectory buffer overflows")
+        for i, position in enumerate(positions):
+            self._buffer.append(
+                (
+                    position + self._origin,
+                    None if velocities is None else velocities[i],
+                    False if triggers is None else triggers[i],
+                )
+            )
+        # resume after an underrun
+        if self._reached > 0 and self._motion.done():
+            self._motion = asyncio.ensure_future(self._consume())
+
+    async def _start_trajectory(self):
+        await self.wait()
+        self._reached = 0
+        self._motion = asyncio.ensure_future(self._consume())
+
+    async def _poll_trajectory(self) -> int:
+        if self._motion is not None and self._motion.done():
+            # surface failures of the simulation
+            if not self._motion.cancelled():
+                self._motion.result()
+        return self._reached
+
+    def _output_trigger(self, index):
+        self.triggers.append(index)
+
+    ##
+
+    async def _move(self, target, velocity=None):
+        velocity = self._velocity if velocity is None else velocity
+        t = estimate_move_time(target - self._position, velocity, self._acceleration)
+        await asyncio.sleep(float(t) * self._time_scale)
+        self._position = target
+
+    async def _consume(self):
+        # stops when the buffer underruns
+        while self._buffer:
+            target, velocity, trigger = self._buffer.popleft()
+            await self._move(target, velocity)
+            if trigger:
+                self.triggers.append(self._reached)
+            self._reached += 1
@@ -0,0 +1,106 @@
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from olive.devices import HardwareSequencer
+
+__all__ = ["PseudoSequencer"]
+
+logger = logging.getLogger(__name__)
+
+
+class PseudoSequencer(HardwareSequencer):
+    """
+    Simulated hardware sequencer, the pattern memory lives in host memory.
+
+    Args:
+        rate (float, optional): sample rate in Hz
+        lines (list of str, optional): digital output lines
+        channels (list of str, optional): analog output channels
+        capacity (int, optional): size of the pattern memory
+        analog_range (tuple of float, optional): range of analog outputs
+        run_length (bool, optional): take run-length encoded patterns
+    """
+
+    def __init__(
+        self,
+        rate: float = 1e6,
+        lines: Sequence[str] = (),
+        channels: Sequence[str] = (),
+        capacity: int = 1 << 20,
+        analog_range: Optional[Tuple[float, float]] = (-10.0, 10.0),
+        run_length=False,
+    ):
+        super().__init__()
+        self._rate, self._lines, self._channels = rate, tuple(lines), tuple(channels)
+        self._capacity, self._analog_range = capacity, analog_range
+        self._run_length = run_length
+
+        self._memory = self._allocate(0)
+        # (offset, length) of each write
+        self.writes: List[Tuple[int, int]] = []
+
+    ##
+
+    @property
+    def analog_range(self):
+        return self._analog_range
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def is_run_length(self) -> bool:
+        return self._run_length
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def lines(self) -> Tuple[str]:
+        return self._lines
+
+    @property
+    def channels(self) -> Tuple[str]:
+        return self._channels
+
+    ##
+
+    def play(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Output of the pattern memory.
+
+        Returns:
+            (tuple): digital words and analog values of each sample
+        """
+        if not self._run_length:
+            return self._memory
+        lengths, digital, analog = self._memory
+        return np.repeat(digital, lengths), np.repeat(analog, lengths, axis=1)
+
+    ##
+
+    async def _resize_pattern(self, n: int):
+        memory = self._allocate(n)
+        m = min(n, self._memory[0].shape[-1])
+        for old, new in zip(self._memory, memory):
+            new[..., :m] = old[..., :m]
+        self._memory = memory
+
+    async def _write_pattern(self, offset: int, *data):
+        n = data[0].shape[-1]
+        for memory, chunk in zip(self._memory, data):
+            memory[..., offset : offset + n] = chunk
+        self.writes.append((offset, n))
+
+    def _allocate(self, n: int):
+        memory = (
+            np.zeros(n, dtype=np.uint32),
+            np.zeros((len(self._channels), n), dtype=np.float32),
+        )
+        if self._run_length:
+            memory = (np.zeros(n, dtype=np.uint32),) + memory
+        return memory
@@ -1,18 +1,24 @@
 import asyncio
+from collections import defaultdict
 from itertools import product
 import logging
-from typing import Union
+import time
+from typing import AsyncIterator, Iterable, Union
 
-from serial import Serial
-from serial.tools import list_ports
+from serial_asyncio import open_serial_connection
 
 from olive.drivers.base import Driver
 from olive.devices.base import DeviceInfo
 from olive.utils import retry
 from olive.devices import SensorAdapter
-from olive.devices.error import UnsupportedClassError
+from olive.devices.error import DeviceTimeoutError, UnsupportedClassError
 
 from olive.drivers.ophir.sensors import Photodiode
+from olive.drivers.utils import (
+    MeteredStreamReader,
+    MeteredStreamWriter,
+    SerialPortManager,
+)
 
 __all__ = ["Ophir", "Nova2"]
 
@@ -27,90 +33,241 @@ class OphirMeter(SensorAdapter):
         port (str): device name
         baudrate (int): baud rate
         timeout (int): timeout in ms
+
+    Attributes:
+        STREAM_MODE (bool): meter supports continuous send ($CS) in full duplex mode
     """
 
+    STREAM_MODE = False
+
     def __init__(self, driver, port, baudrate, timeout=1000):
-        super().__init__(driver, timeout=timeout)
+        super().__init__(driver)
+
+        self._port, self._baudrate = port, baudrate
 
-        # Serial use s instead of ms
-        timeout = self.timeout
+        # asyncio use s instead of ms
         if timeout is not None:
             timeout /= 1000
+        self._timeout = timeout
 
-        ser = Serial()
-        ser.port = port
-        ser.baudrate = baudrate
-        ser.timeout = timeout
-        ser.write_timeout = timeout
-        self._handle = ser
-
-    def enumerate_sensors(self) -> Union[Photodiode, None]:
-        self.handle.write(b"$HT\r")
-        response = self.handle.read_until("\r").decode("utf-8")
-        # LaserStar and Nova-II append the measurement, split them by space
-        response = response.strip("* ").split()[0]
-        try:
-            return ({"SI": Photodiode, "XX": None}[response],)
-        except KeyError:
-            raise RuntimeError(f'unknown head type "{response}"')
+        # stream r/w pair
+        self._reader, self._writer = None, None
+        # a request is not complete until its response is received
+        self._lock = asyncio.Lock()
 
     ##
 
-    def enumerate_properties(self):
-        return tuple()
-
-    ##
+    @property
+    def baudrate(self):
+        return self._baudrate
 
     @property
-    def busy(self):
-        return False
+    def is_busy(self):
+        return self._lock.locked()
 
     @property
-    def handle(self):
-        return self._handle
+    def is_opened(self):
+        return self._reader is not None and self._writer is not None
 
     @property
-    def info(self) -> DeviceInfo:
+    def port(self):
+        return self._port
+
+    ##
+
+    @retry(UnsupportedClassError, logger=logger)
+    async def test_open(self):
+        await self._open_connection()
+        try:
+            logger.info(f".. {await self.get_device_info()}")
+        except (DeviceTimeoutError, SyntaxError):
+            raise UnsupportedClassError
+        finally:
+            # fast close
+            await self._close_connection()
+
+    async def _open(self):
+        await self._open_connection()
+        await self._set_full_duplex()
+
+    async def _close(self):
+        await self._save_configuration()
+        await self._close_connection()
+
+    ##
+
+    async def get_device_info(self) -> DeviceInfo:
         # mode name and serial number
-        self.handle.write(b"$II\r")
+        response = await self.query("$II")
         try:
-            response = self.handle.read_until("\r").decode("utf-8")
             _, sn, name = tuple(response.strip("* ").split())
-        except (ValueError, UnicodeDecodeError):
+        except ValueError:
             raise SyntaxError("unable to parse device info")
 
         # ROM version
-        self.handle.write(b"$VE\r")
-        response = self.handle.read_until("\r").decode("utf-8")
+        response = await self.query("$VE")
         version = response.strip("* ").split()[0]
 
         return DeviceInfo(version=version, vendor="Ophir", model=name, serial_number=sn)
 
-    @property
-    def is_opened(self):
-        return self.handle.is_open
+    ##
 
-    """
-    Property accessors.
-    """
+    async def enumerate_properties(self):
+        return tuple()
+
+    ##
+
+    async def enumerate_sensors(self) -> Union[Photodiode]:
+        response = await self.query("$HT")
+        # LaserStar and Nova-II append the measurement, split them by space
+        response = response.strip("* ").split()[0]
+        try:
+            return {"SI": (Photodiode,), "XX": tuple()}[response]
+        except KeyError:
+            raise RuntimeError(f'unknown head type "{response}"')
+
+    ##
+
+    async def query(self, command: str) -> str:
+        """
+        Send a command and wait for its response.
+
+        Args:
+            command (str): command without the trailing carriage return
+
+        Returns:
+            (str): decoded response
+        """
+        async with self._lock:
+            self._writer.write(f"{command}\r".encode())
+            await self._writer.drain()
+
+            try:
+                response = await asyncio.wait_for(
+                    self._reader.readuntil(b"\r"), timeout=self._timeout
+                )
+            except asyncio.TimeoutError:
+                raise DeviceTimeoutError(f'"{command}" timeout')
+
+        try:
+            return response.decode("utf-8")
+        except UnicodeDecodeError:
+            raise SyntaxError(f'unable to decode response of "{command}"')
+
+    async def pipelined_query(self, command: str, depth=4):
+        """
+        Repeat a command with requests pipelined ahead of their responses.
+
+        Meter has to be in full duplex mode, otherwise back-to-back commands are lost.
+        The meter is locked until the generator is closed, other queries wait until
+        then.
+
+        Args:
+            command (str): command to repeat
+            depth (int, optional): number of requests in flight
+
+        Yields:
+            (tuple): timestamp and decoded response
+        """
+        request = f"{command}\r".encode()
+        async with self._lock:
+            in_flight = 0
+            try:
+                while True:
+                    if in_flight < depth:
+                        self._writer.write(request * (depth - in_flight))
+                        await self._writer.drain()
+                        in_flight = depth
+
+                    response = await self._readline(b"\r")
+                    in_flight -= 1
+                    yield time.perf_counter(), response
+            finally:
+                # clear out responses still in flight
+                await self._discard_pending()
+
+    async def continuous_send(self):
+        """
+        Request the meter to report all measurements it makes, the stream stops on
+        next command. The meter is locked until the generator is closed, other queries
+        wait until then.
+
+        Yields:
+            (tuple): timestamp and decoded response
+        """
+        async with self._lock:
+            # every reading, standard format
+            self._writer.write(b"$CS 1 1 1\r")
+            await self._writer.drain()
+            try:
+                while True:
+                    response = await self._readline(b"\n")
+                    yield time.perf_counter(), response
+            finally:
+                self._writer.write(b"$CS 0\r")
+                await self._writer.drain()
+                await self._discard_pending()
 
     """
     Private helper functions and constants.
     """
 
-    def _set_full_duplex(self):
+    async def _readline(self, separator) -> str:
+        try:
+            response = await asyncio.wait_for(
+                self._reader.readuntil(separator), timeout=self._timeout
+            )
+        except asyncio.TimeoutError:
+            raise DeviceTimeoutError("readline timeout")
+        return response.decode("utf-8", errors="replace")
+
+    async def _discard_pending(self, timeout=0.1):
+        """Discard incoming data until the line is silent."""
+        while True:
+            try:
+                data = await asyncio.wait_for(self._reader.read(1024), timeout=timeout)
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                # EOF
+                break
+
+    async def _open_connection(self):
+        loop = asyncio.get_running_loop()
+
+        port = await self.driver.manager.request_port(self.port)
+        try:
+            reader, writer = await open_serial_connection(
+                loop=loop, url=port, baudrate=self.baudrate
+            )
+            self._reader = MeteredStreamReader(reader, port)
+            self._writer = MeteredStreamWriter(writer, port)
+        except Exception:
+            self.driver.manager.release_port(self.port)
+            raise
+
+    async def _close_connection(self):
+        if not self.is_opened:
+            return
+
+        self._writer.close()
+        await self._writer.wait_closed()
+
+        self.driver.manager.release_port(self.port)
+
+        self._reader, self._writer = None, None
+
+    async def _set_full_duplex(self):
         logger.debug("setting FULL duplex mode")
-        self.handle.write(b"$DU\r")
-        response = self.handle.read_until("\r").decode("utf-8")
+        response = await self.query("$DU")
         if "FULL DUPLEX" in response:
             return
         elif "RS232 SPECIFIC" in response:
             # V-USB, ignored
             return
 
-    def _save_configuration(self):
-        self.handle.write(b"$IC\r")
-        response = self.handle.read_until("\r").decode("utf-8")
+    async def _save_configuration(self):
+        response = await self.query("$IC")
         if response[0] == "?":
             raise RuntimeError("failed to save instrument configuration")
 
@@ -122,30 +279,10 @@ class Nova2(OphirMeter):
     Compatible with all standard Ophir Thermopile, BeamTrack, Pyroelectric and Photodiode sensors.
     """
 
-    @retry(UnsupportedClassError, logger=logger)
-    def test_open(self):
-        self.handle.open()
-        try:
-            logger.info(f".. {self.info}")
-        except SyntaxError:
-            raise UnsupportedClassError
-        finally:
-            # fast close
-            self.handle.close()
-
-    def open(self):
-        self.handle.open()
-        self._set_full_duplex()
-
-    def close(self):
-        # no more children
-        self._save_configuration()
-        self.handle.close()
+    STREAM_MODE = True
 
-    ##
-
-    def enumerate_properties(self):
-        return super().enumerate_properties()
+    async def enumerate_properties(self):
+        return await super().enumerate_properties()
 
     ##
 
@@ -153,12 +290,11 @@ class Nova2(OphirMeter):
 
     ##
 
-    def _get_lcd_scanlines(self):
+    async def _get_lcd_scanlines(self):
         """Returns an 80-character, 40-byte hex string."""
         for row in range(0, 240):
-            self.handle.write(f"$DI{row}\r".encode())
-            data = self.handle.read_until("\r")
-            if data[0] == b"*":
+            data = await self.query(f"$DI{row}")
+            if data[0] == "*":
                 yield bytearray.fromhex(data[1:])
             else:
                 raise RuntimeError(
@@ -166,81 +302,119 @@ class Nova2(OphirMeter):
                 )
 
 
-class Ophir(object):  # Driver):
+class Ophir(Driver):
+    BAUDRATES = (38400, 19200, 9600)
+
     def __init__(self):
         super().__init__()
+        self._manager = SerialPortManager()
 
     ##
 
-    def initialize(self):
-        super().initialize()
+    @property
+    def manager(self):
+        return self._manager
 
-    def shutdown(self):
-        super().shutdown()
+    ##
 
-    def enumerate_devices(self) -> Union[Photodiode, None]:
-        loop = asyncio.get_event_loop()
+    async def initialize(self):
+        self.manager.refresh()
 
-        async def test_device(device):
-            """Test each port using their own thread."""
+    ##
 
-            def _test_device(device):
-                logger.debug(f"testing {device.handle.name}...")
-                device.test_open()
+    async def iter_devices(self, ports=None) -> AsyncIterator[Photodiode]:
+        """
+        Enumerate sensors that are attached to Ophir meters.
+
+        Meters are probed concurrently across ports, while each port can only test 1
+        port-baudrate combination at once. Sensors are yielded as soon as their meter
+        is interrogated.
+
+        Args:
+            ports (list of str, optional): only probe these ports
+
+        Note:
+            Yielded devices are NOT active yet.
+        """
+        active_devices = [device for device in self._devices if device.is_opened]
+        logger.debug(
+            f"there are {len(active_devices)} active device(s) during enumeration"
+        )
+
+        # group the candidates by their port
+        candidates = defaultdict(list)
+        for meter in self._enumerate_device_candidates():
+            if ports is None or meter.port in ports:
+                candidates[meter.port].append(meter)
+
+        # refresh internal book-keeping as devices are found
+        self._devices = self._keep_devices(active_devices, ports)
+
+        async def probe(meters):
+            """Find the meter on a port, and interrogate it."""
+            try:
+                meter = await self._probe_port(meters)
+                if meter is None:
+                    return []
+                return await self._enumerate_sensors(meter)
+            except Exception as err:
+                # grace fully logged and ignored
+                logger.error(str(err))
+                return []
+
+        logger.info("looking for meters...")
+        tasks = [asyncio.ensure_future(probe(meters)) for meters in candidates.values()]
+        try:
+            for task in asyncio.as_completed(tasks):
+                for sensor in await task:
+                    self._devices.append(sensor)
+                    yield sensor
+        finally:
+            for task in tasks:
+                task.cancel()
 
-            return await loop.run_in_executor(device.executor, _test_device, device)
+    def _enumerate_device_candidates(self) -> Iterable[Union[OphirMeter, Photodiode]]:
+        # ports that are already in use by active devices are skipped
+        active_ports = [
+            device.parent.port for device in self._devices if device.is_opened
+        ]
+        ports = [port for port in self.manager.list_ports() if port not in active_ports]
 
         klasses = OphirMeter.__subclasses__()
-        baudrates = (38400, 19200, 9600)
-        ports = [info.device for info in list_ports.comports()]
-
-        logger.info("looking for controllers...")
-        # each port can only test 1 combination at once
-        controllers = []
-        for klass, baudrate in product(*[klasses, baudrates]):
-            logger.debug(f"combination {klass} ({baudrate} bps)")
-            _controllers = [klass(self, port, baudrate) for port in ports]
-            testers = asyncio.gather(
-                *[test_device(controller) for controller in _controllers],
-                return_exceptions=True,
-            )
-            results = loop.run_until_complete(testers)
-
-            for controller, result in zip(_controllers, results):
-                if isinstance(result, UnsupportedClassError):
-                    continue
-                elif result is None:
-                    # remove from test cycle
-                    ports.remove(controller.handle.port)
-                    controllers.append(controller)
-                else:
-                    # unknown exception occurred
-                    raise result
-
-        logger.info("interrogating controllers...")
-        valid_sensors = []
-        # scan each controller for their connected sensor
-        for controller in controllers:
-            # temporary open the controller
-            controller.open()
-            # retrieve sensor devices
-            _sensors = [klass(controller) for klass in controller.enumerate_sensors()]
-            # close the controller
-            controller.close()
-
-            # test the sensor candidates
-            testers = asyncio.gather(
-                *[test_device(sensor) for sensor in _sensors], return_exceptions=True
-            )
-            results = loop.run_until_complete(testers)
+        return [
+            klass(self, port, baudrate)
+            for port, klass, baudrate in product(ports, klasses, self.BAUDRATES)
+        ]
+
+    ##
 
-            for sensor, result in zip(_sensors, results):
-                if isinstance(result, UnsupportedClassError):
-                    continue
-                elif result is None:
+    async def _probe_port(self, meters):
+        """Test each port-baudrate combination until a meter responds."""
+        for meter in meters:
+            logger.debug(f"testing {meter.port} ({meter.baudrate} bps)...")
+            try:
+                await meter.test_open()
+                return meter
+            except UnsupportedClassError:
+                continue
+        return None
+
+    async def _enumerate_sensors(self, meter):
+        """Temporarily open the meter, and test the sensor candidates."""
+        await meter.open()
+        try:
+            sensors = [klass(meter) for klass in await meter.enumerate_sensors()]
+
+            tasks = [sensor.test_open() for sensor in sensors]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+            valid_sensors = []
+            for sensor, result in zip(sensors, results):
+                if result is None:
                     valid_sensors.append(sensor)
-                else:
+                elif not isinstance(result, UnsupportedClassError):
                     # unknown exception occurred
-                    raise result
-
-        return tuple(valid_sensors)
+                    logger.error(str(result))
+            return valid_sensors
+        finally:
+            await meter.close()
@@ -11,14 +11,15 @@ According to the manual, there are 8 types of head:
 - Pyroelectric
 - nanoJoule meter
 """
+import asyncio
 from enum import Enum
-from functools import lru_cache
 import logging
 
+import numpy as np
+
 from olive.devices import PowerSensor
-from olive.devices.base import DeviceInfo
-from olive.devices.error import UnsupportedClassError
-from olive.utils import retry
+from olive.devices.base import CachePolicy, DeviceInfo, property_cache
+from olive.devices.error import DeviceTimeoutError, UnsupportedClassError
 
 __all__ = ["Photodiode", "DiffuserSetting"]
 
@@ -39,74 +40,98 @@ class Photodiode(PowerSensor):  # TODO extract common scheme to OphirSensor
     """
     Photodiode sensors have a high degree of linearity over a large range of light
     power levels.
+
+    Note:
+        Sensor shares the connection with its parent meter.
+
+    Attributes:
+        PIPELINE_DEPTH (int): number of readout requests in flight when the meter does
+            not support stream mode
+        STREAM_TIMEOUT (float): time in seconds to wait for the first sample of a
+            stream
     """
 
+    PIPELINE_DEPTH = 4
+    STREAM_TIMEOUT = 5
+
     def __init__(self, parent):
         super().__init__(parent.driver, parent=parent)
-        self._handle = self.parent.handle
 
     ##
 
-    @retry(UnsupportedClassError, logger=logger)
-    def test_open(self):
-        self.handle.open()
+    @property
+    def is_busy(self):
+        return self.parent.is_busy
+
+    @property
+    def is_opened(self):
+        return self.parent.is_opened and (self in self.parent.children)
+
+    ##
+
+    async def test_open(self):
+        """Test the sensor head, its parent meter should be opened already."""
         try:
-            logger.info(f".. {self.info}")
-        except SyntaxError:
+            logger.info(f".. {await self.get_device_info()}")
+        except (DeviceTimeoutError, SyntaxError):
             raise UnsupportedClassError
-        finally:
-            self.handle.close()
 
-    def open(self):
+    async def _open(self):
         # using a power sensor, auto switch to 'Power screen'
-        self.handle.write(b"$FP\r")
-        self.handle.read_until("\r")
+        await self.query("$FP")
 
-        super().open()
+    async def _close(self):
+        await self.stop_streaming()
 
-    def close(self):
-        super().close()
+    ##
+
+    async def get_device_info(self) -> DeviceInfo:
+        response = await self.query("$HI")
+        try:
+            _, sn, name, _ = tuple(response.strip("* ").split())
+        except ValueError:
+            raise SyntaxError("unable to parse device info")
+        return DeviceInfo(vendor="Ophir", model=name, serial_number=sn)
 
     ##
 
-    def enumerate_properties(self):
+    async def enumerate_properties(self):
         return ("diffuser", "favorite_wavelengths", "valid_wavelengths")
 
     ##
 
-    def readout(self):
-        self.handle.write(b"$SP\r")
-        response = self.handle.read_until("\r").decode("utf-8")
-        try:
-            return float(response.strip("* "))
-        except ValueError:
-            if "OVER" in response:
-                raise ValueError("sensor reading out-of-range")
+    async def readout(self):
+        if self.is_streaming:
+            # meter is occupied by the stream, use its latest sample instead
+            if self.buffer.count == 0:
+                await asyncio.wait_for(self.buffer.wait(1), self.STREAM_TIMEOUT)
+            _, value = self.buffer.latest(1)
+            return float(value[0])
+
+        response = await self.query("$SP")
+        return self._parse_power(response)
 
-    def get_current_range(self):
-        valid_ranges = self.get_valid_ranges()
+    async def get_current_range(self):
+        valid_ranges = await self.get_valid_ranges()
 
-        self.handle.write(b"$RN\r")
-        response = self.handle.read_until("\r").decode("utf-8")
+        response = await self.query("$RN")
         # since index of AUTO is 1, and dBm is 2, subscript needs to be offset by 2
         index = int(response.strip("* ")) + 2
         return valid_ranges[index]
 
-    def set_current_range(self, value):
-        valid_ranges = self.get_valid_ranges()
+    async def set_current_range(self, value):
+        valid_ranges = await self.get_valid_ranges()
         try:
             # since index of AUTO is 1, and dBm is 2, subscript needs to be offset by 2
             index = valid_ranges.index(value) - 2
         except ValueError:
             raise ValueError("invalid range")
-        self.handle.write(f"$WN{index}\r".encode())
-        response = self.handle.read_until("\r").decode("utf-8")
+        response = await self.query(f"$WN{index}")
         if response[0] != "*":
             raise RuntimeError("unable to set range")
 
-    def get_unit(self):
-        self.handle.write(b"$SI\r")
-        response = self.handle.read_until("\r").decode("utf-8")
+    async def get_unit(self):
+        response = await self.query("$SI")
         unit = response.strip("* ").split()[0]
         try:
             # some units use abbreviations
@@ -114,101 +139,138 @@ class Photodiode(PowerSensor):  # TODO extract common scheme to OphirSensor
         except KeyError:
             return unit
 
-    @lru_cache(maxsize=1)
-    def get_valid_ranges(self):
-        logger.debug("get_valid_ranges(), probing")
-        self.handle.write(b"$AR\r")
-        response = self.handle.read_until("\r").decode("utf-8")
-        _, *options = tuple(response.strip("* ").split())
-        return tuple(options)
-
-    def set_wavelength(self, value):
-        mode, options = self._get_valid_wavelengths()
+    async def get_valid_ranges(self):
+        valid_ranges = self.get_record("valid_ranges")
+        if valid_ranges is None:
+            logger.debug("get_valid_ranges(), probing")
+            response = await self.query("$AR")
+            _, *valid_ranges = tuple(response.strip("* ").split())
+            self.set_record("valid_ranges", valid_ranges)
+        return tuple(valid_ranges)
+
+    async def set_wavelength(self, value):
+        mode, options = await self._get_valid_wavelengths()
         if mode == WavelengthSupport.CONTINUOUS:
             fmin, fmax = options
             if value < fmin or value > fmax:
                 raise ValueError(f"wavelength {value} out-of-range")
-            self.handle.write(f"$WL{value}\r".encode())
+            response = await self.query(f"$WL{value}")
         elif mode == WavelengthSupport.DISCRETE:
             if value not in options:
                 raise ValueError(f"unknown wavelength setting {value}")
-            self.handle.write(f"$WW{value}\r".encode())
-        response = self.handle.read_until("\r").decode("utf-8")
+            response = await self.query(f"$WW{value}")
         if response[0] != "*":
             raise RuntimeError("unable to set range")
 
     ##
 
-    @property
-    def busy(self):
-        return self.parent.busy
-
-    @property
-    def handle(self):
-        return self._handle
-
-    @property
-    def info(self) -> DeviceInfo:
-        self.handle.write(b"$HI\r")
-        try:
-            response = self.handle.read_until("\r").decode("utf-8")
-            _, sn, name, _ = tuple(response.strip("* ").split())
-        except (ValueError, UnicodeDecodeError):
-            raise SyntaxError("unable to parse device info")
-        return DeviceInfo(version=None, vendor="Ophir", model=name, serial_number=sn)
-
-    @property
-    def is_opened(self):
-        return self.parent.is_opened
+    async def query(self, command: str) -> str:
+        """
+        Sensor commands are relayed by the parent meter. The stream occupies the meter,
+        so it is paused until the response is received.
+        """
+        async with self.paused_stream():
+            return await self.parent.query(command)
 
     """
     Property accessors.
     """
 
-    def _get_diffuser(self):
-        self.handle.write(b"$FQ0\r")
-        response = self.handle.read_until("\r").decode("utf-8")
+    async def _query_properties(self, names):
+        """Favorite and valid wavelengths are listed by the same query."""
+        names = list(names)
+        values = dict()
+        if "favorite_wavelengths" in names and "valid_wavelengths" in names:
+            mode, args = self._parse_wavelengths(await self.query("$AW"))
+            values["favorite_wavelengths"] = self._to_favorite_wavelengths(mode, args)
+            values["valid_wavelengths"] = self._to_valid_wavelengths(mode, args)
+            self.set_record(
+                "valid_wavelengths", (mode.value, values["valid_wavelengths"][1])
+            )
+        names = [name for name in names if name not in values]
+        values.update(await super()._query_properties(names))
+        return values
+
+    @property_cache(CachePolicy.INVALIDATE_ON_SET)
+    async def _get_diffuser(self):
+        response = await self.query("$FQ0")
         mode, *options = tuple(response.strip("* ").split())
         return DiffuserSetting(mode)
 
-    def _set_diffuser(self, setting: DiffuserSetting):
-        self.handle.write(f"$FQ{setting.value}\r".encode())
-        response = self.handle.read_until("\r").decode("utf-8")
+    async def _set_diffuser(self, setting: DiffuserSetting):
+        response = await self.query(f"$FQ{setting.value}")
         mode = response.strip("* ").split()[0]
         try:
             DiffuserSetting(mode)
         except ValueError:
             raise ValueError(f"failed to set diffuser property ({setting})")
 
-    def _get_favorite_wavelengths(self):
-        self.handle.write(b"$AW\r")
-        response = self.handle.read_until("\r").decode("utf-8")
+    @property_cache(CachePolicy.TTL, ttl=1)
+    async def _get_favorite_wavelengths(self):
+        mode, args = self._parse_wavelengths(await self.query("$AW"))
+        return self._to_favorite_wavelengths(mode, args)
+
+    @property_cache(CachePolicy.STATIC)
+    async def _get_valid_wavelengths(self):
+        cached = self.get_record("valid_wavelengths")
+        if cached is not None:
+            mode, options = cached
+            return WavelengthSupport(mode), tuple(options)
+
+        mode, args = self._parse_wavelengths(await self.query("$AW"))
+        mode, options = self._to_valid_wavelengths(mode, args)
+        self.set_record("valid_wavelengths", (mode.value, options))
+        return mode, options
+
+    @staticmethod
+    def _parse_wavelengths(response):
         mode, *args = tuple(response.strip("* ").split())
         try:
-            mode = WavelengthSupport(mode)
-            if mode == WavelengthSupport.DISCRETE:
-                raise RuntimeError("DISCRETE head does not support favorite wavelength")
-            return tuple(args[3:])
+            return WavelengthSupport(mode), args
         except ValueError:
             raise ValueError(f'unknown mode "{mode}"')
 
-    @lru_cache(maxsize=1)
-    def _get_valid_wavelengths(self):
-        self.handle.write(b"$AW\r")
-        response = self.handle.read_until("\r").decode("utf-8")
-        mode, *args = tuple(response.strip("* ").split())
+    @staticmethod
+    def _to_favorite_wavelengths(mode, args):
+        if mode == WavelengthSupport.DISCRETE:
+            raise RuntimeError("DISCRETE head does not support favorite wavelength")
+        return tuple(args[3:])
+
+    @staticmethod
+    def _to_valid_wavelengths(mode, args):
+        if mode == WavelengthSupport.CONTINUOUS:
+            fmin, fmax, *options = tuple(args)
+            options = (int(fmin), int(fmax))
+        elif mode == WavelengthSupport.DISCRETE:
+            _, *options = tuple(args)
+        return mode, tuple(options)
+
+    async def _stream(self, buffer):
+        if self.parent.STREAM_MODE:
+            responses = self.parent.continuous_send()
+        else:
+            responses = self.parent.pipelined_query("$SP", depth=self.PIPELINE_DEPTH)
+
         try:
-            mode = WavelengthSupport(mode)
-            if mode == WavelengthSupport.CONTINUOUS:
-                fmin, fmax, *options = tuple(args)
-                options = (int(fmin), int(fmax))
-            elif mode == WavelengthSupport.DISCRETE:
-                _, *options = tuple(args)
-            return mode, options
-        except ValueError:
-            raise ValueError(f'unknown mode "{mode}"')
+            async for timestamp, response in responses:
+                try:
+                    value = self._parse_power(response)
+                except ValueError:
+                    # out-of-range
+                    value = np.nan
+                buffer.put(timestamp, value)
+        finally:
+            await responses.aclose()
 
     """
     Private helper functions and constants.
     """
 
+    @staticmethod
+    def _parse_power(response: str) -> float:
+        try:
+            return float(response.strip("* \r\n"))
+        except ValueError:
+            if "OVER" in response:
+                raise ValueError("sensor reading out-of-range")
+            raise SyntaxError(f'unable to parse readout "{response.strip()}"')
@@ -1,56 +1,167 @@
 from asyncio import Lock
 import logging
-from typing import Iterable
+import time
+from typing import Iterable, Tuple
 
 from serial.tools import list_ports
 
+from olive.metrics import Metrics
 from olive.utils import Singleton
 
-__all__ = ["SerialPortManager"]
+__all__ = ["MeteredStreamReader", "MeteredStreamWriter", "SerialPortManager"]
 
 logger = logging.getLogger(__name__)
 
 
 class SerialPortManager(metaclass=Singleton):
+    """
+    Serialize access to serial ports.
+
+    A port that is unplugged while it is held keeps its lock until the owner releases
+    it, so a replugged port is not handed out twice, and a stale owner cannot release
+    a lock of another.
+    """
+
     def __init__(self):
         self._ports = dict()
+        # port -> time of acquisition, ns
+        self._owned = dict()
+        # ports that the OS cannot find, but are still held
+        self._unplugged = set()
         self.refresh()
 
     ##
 
     def list_ports(self) -> Iterable[str]:
-        return tuple(self._ports.keys())
+        return tuple(port for port in self._ports if port not in self._unplugged)
 
-    def refresh(self):
+    def refresh(self) -> Tuple[Tuple[str], Tuple[str]]:
+        """
+        Synchronize the record with ports that the OS can find.
+
+        Returns:
+            (tuple): tuple containing
+                added (tuple of str): ports that are new to the record
+                removed (tuple of str): ports that are dropped from the record
+        """
         ports = [port.device for port in list_ports.comports()]
+        known_ports = set(self.list_ports())
 
         # remove old ports
-        old_ports = set(self._ports.keys()) - set(ports)
+        old_ports = tuple(known_ports - set(ports))
         for port in old_ports:
-            assert not self._ports[
-                port
-            ].locked(), "serial port still locked, but the OS cannot find it"
-            del self._ports[port]
+            if self._ports[port].locked():
+                # dropped once the owner releases it
+                logger.warning(f'"{port}" is still locked, but the OS cannot find it')
+                self._unplugged.add(port)
+            else:
+                del self._ports[port]
 
         # add new ports
-        new_ports = set(ports) - set(self._ports.keys())
+        new_ports = tuple(set(ports) - known_ports)
         for port in new_ports:
-            self._ports[port] = Lock()
+            if port in self._unplugged:
+                # replugged before release, wait for the previous owner
+                self._unplugged.remove(port)
+            else:
+                self._ports[port] = Lock()
 
         logger.debug(f"{len(self._ports)} serial port(s) discovered")
+        return new_ports, old_ports
 
     async def request_port(self, port):
-        assert port in self._ports, f'"{port}" is not in the record'
+        assert (
+            port in self._ports and port not in self._unplugged
+        ), f'"{port}" is not in the record'
 
         logger.debug(f'requesting "{port}"...')
         lock = self._ports[port]
+        t0 = time.perf_counter_ns()
         await lock.acquire()
+        self._owned[port] = t1 = time.perf_counter_ns()
+        Metrics().record("serial_port_wait", t1 - t0, port=port)
 
         return port
 
     def release_port(self, port):
-        assert port in self._ports, f'"{port}" is not in the record'
+        if port not in self._ports:
+            logger.debug(f'"{port}" is already removed')
+            return
 
         logger.debug(f'"{port}" released')
         lock = self._ports[port]
         lock.release()
+        try:
+            t0 = self._owned.pop(port)
+            Metrics().record("serial_port_hold", time.perf_counter_ns() - t0, port=port)
+        except KeyError:
+            pass
+
+        if port in self._unplugged:
+            logger.debug(f'"{port}" is unplugged, drop it from the record')
+            self._unplugged.remove(port)
+            del self._ports[port]
+
+
+class MeteredStreamReader(object):
+    """
+    Record bytes received and latency of read calls of a StreamReader.
+
+    Args:
+        reader (StreamReader): the reader to wrap
+        port (str): port name in the labels
+    """
+
+    def __init__(self, reader, port):
+        self._reader, self._port = reader, port
+
+    def __getattr__(self, name):
+        return getattr(self._reader, name)
+
+    ##
+
+    async def read(self, n=-1):
+        return await self._measure(self._reader.read(n))
+
+    async def readexactly(self, n):
+        return await self._measure(self._reader.readexactly(n))
+
+    async def readline(self):
+        return await self._measure(self._reader.readline())
+
+    async def readuntil(self, separator=b"\n"):
+        return await self._measure(self._reader.readuntil(separator))
+
+    ##
+
+    async def _measure(self, coro):
+        with Metrics().measure("serial_read", port=self._port) as extra:
+            data = await coro
+            extra["nbytes"] = len(data)
+        return data
+
+
+class MeteredStreamWriter(object):
+    """
+    Record bytes sent by a StreamWriter, and latency of its drain calls.
+
+    Args:
+        writer (StreamWriter): the writer to wrap
+        port (str): port name in the labels
+    """
+
+    def __init__(self, writer, port):
+        self._writer, self._port = writer, port
+
+    def __getattr__(self, name):
+        return getattr(self._writer, name)
+
+    ##
+
+    def write(self, data):
+        Metrics().record("serial_write", nbytes=len(data), port=self._port)
+        self._writer.write(data)
+
+    async def drain(self):
+        with Metrics().measure("serial_drain", port=self._port):
+            await self._writer.drain()
@@ -0,0 +1,323 @@
+"""
+Runtime instrumentation.
+
+Call counts, bytes transferred and latency histograms are recorded per metric name
+and labels. Each thread records into its own shard, shards are merged when metrics
+are queried, therefore, recording does not need a lock.
+"""
+from contextlib import contextmanager
+from functools import wraps
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from olive.utils import Singleton
+
+__all__ = ["Histogram", "Metrics", "instrumented"]
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram(object):
+    """
+    Log-linear histogram of integer values, similar to HdrHistogram.
+
+    Each power of 2 is split into 2^(SUB_BITS-1) linear sub-buckets, relative error of a
+    recorded value is bounded by 2^-(SUB_BITS-1).
+    """
+
+    SUB_BITS = 5
+
+    def __init__(self):
+        self._counts = dict()  # bucket index -> count
+        self._total, self._min, self._max = 0, None, None
+
+    ##
+
+    @property
+    def count(self):
+        return sum(self._counts.values())
+
+    @property
+    def max(self):
+        return self._max
+
+    @property
+    def min(self):
+        return self._min
+
+    @property
+    def total(self):
+        return self._total
+
+    ##
+
+    def record(self, value: int):
+        index = self._index(value)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self._total += value
+        if self._min is None or value < self._min:
+            self._min = value
+        if self._max is None or value > self._max:
+            self._max = value
+
+    def merge(self, other: "Histogram"):
+        # copied at once, other threads may still be recording
+        for index, count in list(other._counts.items()):
+            self._counts[index] = self._counts.get(index, 0) + count
+        self._total += other._total
+        for value in (other._min, other._max):
+            if value is None:
+                continue
+            if self._min is None or value < self._min:
+                self._min = value
+            if self._max is None or value > self._max:
+                self._max = value
+
+    def percentile(self, q: float) -> Optional[int]:
+        """
+        Estimate the value at a percentile.
+
+        Args:
+            q (float): percentile, in [0, 100]
+        """
+        n = self.count
+        if n == 0:
+            return None
+        rank = max(int(round(q / 100 * n)), 1)
+        for index, count in sorted(self._counts.items()):
+            rank -= count
+            if rank <= 0:
+                # upper bound of the bucket, but never beyond the maximum
+                return min(self._bounds(index)[1] - 1, self._max)
+        return self._max
+
+    def buckets(self) -> Iterable[Tuple[int, int]]:
+        """Iterate over non-empty buckets as (upper bound, cumulative count)."""
+        cumulative = 0
+        for index, count in sorted(self._counts.items()):
+            cumulative += count
+            yield self._bounds(index)[1], cumulative
+
+    ##
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        n_linear, n_sub = 1 << cls.SUB_BITS, 1 << (cls.SUB_BITS - 1)
+        if value < n_linear:
+            return value
+        shift = value.bit_length() - cls.SUB_BITS
+        return n_linear + (shift - 1) * n_sub + (value >> shift) - n_sub
+
+    @classmethod
+    def _bounds(cls, index: int) -> Tuple[int, int]:
+        n_linear, n_sub = 1 << cls.SUB_BITS, 1 << (cls.SUB_BITS - 1)
+        if index < n_linear:
+            return index, index + 1
+        shift, mantissa = divmod(index - n_linear, n_sub)
+        shift, mantissa = shift + 1, mantissa + n_sub
+        return mantissa << shift, (mantissa + 1) << shift
+
+
+class _Shard(object):
+    """Records of a metric from a single thread."""
+
+    __slots__ = ("calls", "nbytes", "latency")
+
+    def __init__(self):
+        self.calls, self.nbytes = 0, 0
+        self.latency = Histogram()
+
+
+class Metrics(metaclass=Singleton):
+    """
+    Registry of runtime metrics.
+
+    A metric is identified by its name and labels, e.g. `device_call` with labels
+    `device` and `method`. Latencies are recorded in nanoseconds.
+    """
+
+    def __init__(self):
+        self.enabled = True
+
+        self._local = threading.local()
+        # key -> shards from all threads, only locked when a new shard is created
+        self._shards, self._lock = dict(), threading.Lock()
+
+    ##
+
+    def record(self, name: str, latency: Optional[int] = None, nbytes=0, **labels):
+        """
+        Record a call.
+
+        Args:
+            name (str): name of the metric
+            latency (int, optional): latency in nanoseconds
+            nbytes (int, optional): bytes transferred by the call
+            labels : labels of the metric
+        """
+        if not self.enabled:
+            return
+        shard = self._get_shard(name, labels)
+        shard.calls += 1
+        shard.nbytes += nbytes
+        if latency is not None:
+            shard.latency.record(latency)
+
+    @contextmanager
+    def measure(self, name: str, **labels):
+        """
+        Measure the latency of a block.
+
+        The yielded dict can be updated with `nbytes` transferred in the block.
+        """
+        t0 = time.perf_counter_ns()
+        extra = {"nbytes": 0}
+        try:
+            yield extra
+        finally:
+            self.record(
+                name, time.perf_counter_ns() - t0, nbytes=extra["nbytes"], **labels
+            )
+
+    def reset(self):
+        with self._lock:
+            self._shards.clear()
+            self._local = threading.local()
+
+    ##
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Merge records from all threads.
+
+        Returns:
+            (dict): metric name -> list of records of each label set
+        """
+        with self._lock:
+            items = [(key, list(shards)) for key, shards in self._shards.items()]
+
+        result = dict()
+        for (name, labels), shards in sorted(items):
+            calls, nbytes, latency = self._merge(shards)
+            entry = {"labels": dict(labels), "calls": calls, "bytes": nbytes}
+            if latency.count > 0:
+                entry["latency_ns"] = {
+                    "count": latency.count,
+                    "min": latency.min,
+                    "mean": latency.total / latency.count,
+                    "p50": latency.percentile(50),
+                    "p90": latency.percentile(90),
+                    "p99": latency.percentile(99),
+                    "p999": latency.percentile(99.9),
+                    "max": latency.max,
+                }
+            result.setdefault(name, []).append(entry)
+        return result
+
+    def to_json(self, indent=None) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix="olive") -> str:
+        """Export in Prometheus text exposition format."""
+        with self._lock:
+            items = [(key, list(shards)) for key, shards in self._shards.items()]
+
+        # samples of a metric family have to be grouped together
+        families = dict()
+        for (name, labels), shards in sorted(items):
+            calls, nbytes, latency = self._merge(shards)
+            metric = f"{prefix}_{name}"
+            family = families.setdefault(metric, ([], [], []))
+
+            tag = self._format_labels(labels)
+            family[0].append(f"{metric}_calls_total{tag} {calls}")
+            family[1].append(f"{metric}_bytes_total{tag} {nbytes}")
+            if latency.count == 0:
+                continue
+            for upper, cumulative in latency.buckets():
+                le = self._format_labels(labels + (("le", f"{upper / 1e9:.9g}"),))
+                family[2].append(f"{metric}_seconds_bucket{le} {cumulative}")
+            le = self._format_labels(labels + (("le", "+Inf"),))
+            family[2].append(f"{metric}_seconds_bucket{le} {latency.count}")
+            family[2].append(f"{metric}_seconds_sum{tag} {latency.total / 1e9:.9g}")
+            family[2].append(f"{metric}_seconds_count{tag} {latency.count}")
+
+        lines = []
+        for metric, (calls, nbytes, seconds) in families.items():
+            lines.append(f"# TYPE {metric}_calls_total counter")
+            lines.extend(calls)
+            lines.append(f"# TYPE {metric}_bytes_total counter")
+            lines.extend(nbytes)
+            if seconds:
+                lines.append(f"# TYPE {metric}_seconds histogram")
+                lines.extend(seconds)
+        return "\n".join(lines) + "\n"
+
+    ##
+
+    def _get_shard(self, name, labels) -> _Shard:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        try:
+            shards = self._local.shards
+        except AttributeError:
+            shards = self._local.shards = dict()
+        try:
+            return shards[key]
+        except KeyError:
+            shard = shards[key] = _Shard()
+            with self._lock:
+                self._shards.setdefault(key, []).append(shard)
+            return shard
+
+    @staticmethod
+    def _merge(shards) -> Tuple[int, int, Histogram]:
+        calls, nbytes, latency = 0, 0, Histogram()
+        for shard in shards:
+            calls += shard.calls
+            nbytes += shard.nbytes
+            latency.merge(shard.latency)
+        return calls, nbytes, latency
+
+    @staticmethod
+    def _format_labels(labels) -> str:
+        if not labels:
+            return ""
+        tokens = []
+        for key, value in labels:
+            value = value.replace("\\", "\\\\").replace('"', '\\"')
+            tokens.append(f'{key}="{value}"')
+        return "{" + ",".join(tokens) + "}"
+
+
+def instrumented(name: str):
+    """
+    Record latency of a device coroutine method as `device_call`, labeled by the class
+    of the device and the method name.
+
+    Args:
+        name (str): method name in the labels
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            metrics = Metrics()
+            if not metrics.enabled:
+                return await func(self, *args, **kwargs)
+            t0 = time.perf_counter_ns()
+            try:
+                return await func(self, *args, **kwargs)
+            finally:
+                metrics.record(
+                    "device_call",
+                    time.perf_counter_ns() - t0,
+                    device=type(self).__name__,
+                    method=name,
+                )
+
+        return wrapper
+
+    return decorator
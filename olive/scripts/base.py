@@ -1,10 +1,18 @@
 from abc import ABCMeta, abstractmethod, ABC
+from dataclasses import dataclass
 import logging
+from typing import Any, Iterable, Optional, Tuple
 
 
 from olive.devices.base import DeviceType
 
-__all__ = ["Script", "ChannelsFeature", "TimeSeriesFeature", "ValueInspectorFeature"]
+__all__ = [
+    "Action",
+    "Script",
+    "ChannelsFeature",
+    "TimeSeriesFeature",
+    "ValueInspectorFeature",
+]
 
 logger = logging.getLogger(__name__)
 
@@ -31,15 +39,38 @@ class ScriptFeature(metaclass=ScriptFeatureType):
 
 
 class TimeSeriesFeature(ScriptFeature):
+    @property
+    def interval(self) -> float:
+        """Interval between the start of timepoints in seconds, 0 if free-running."""
+        return getattr(self, "_interval", 0.0)
+
+    @property
+    def timepoints(self) -> int:
+        return getattr(self, "_timepoints", 1)
+
+    ##
+
     def set_timepoints(self, n):
-        pass
+        if n < 1:
+            raise ValueError("requires at least 1 timepoint")
+        self._timepoints = int(n)
 
     def set_interval(self, interval):
-        pass
+        if interval < 0:
+            raise ValueError("interval cannot be negative")
+        self._interval = float(interval)
 
 
 class ChannelsFeature(ScriptFeature):
-    pass
+    @property
+    def channels(self) -> Tuple[Any]:
+        """Channels to acquire in each timepoint, in order."""
+        return getattr(self, "_channels", tuple())
+
+    ##
+
+    def set_channels(self, channels: Iterable[Any]):
+        self._channels = tuple(channels)
 
 
 class ValueInspectorFeature(ScriptFeature):
@@ -49,6 +80,31 @@ class ValueInspectorFeature(ScriptFeature):
 ##
 
 
+@dataclass(frozen=True)
+class Action:
+    """
+    A device action in an acquisition cycle.
+
+    Actions in a cycle run concurrently, unless they depend on each other.
+
+    Args:
+        device (str): alias of the device among script requirements
+        action (str): name of the coroutine method to call
+        args (tuple, optional): positional arguments of the call
+        duration (float, optional): expected duration in seconds
+        name (str, optional): name to reference this action in the cycle
+        after (tuple of str, optional): names of earlier actions in the cycle that
+            have to finish before this one starts
+    """
+
+    device: str
+    action: str
+    args: Tuple[Any] = tuple()
+    duration: float = 0.0
+    name: Optional[str] = None
+    after: Tuple[str] = tuple()
+
+
 class ScriptType(ScriptFeatureType):
     """
     All concrete script belong to this type.
@@ -104,3 +160,23 @@ class Script(metaclass=ScriptType):
     def loop(self):
         raise NotImplementedError
 
+    ##
+
+    @property
+    def is_compilable(self) -> bool:
+        """Can the script be compiled into a timeline ahead of time?"""
+        return type(self).cycle is not Script.cycle
+
+    def cycle(self, timepoint: int, channel: Any) -> Iterable[Action]:
+        """
+        Device actions of a single acquisition cycle.
+
+        Scripts that implement this are compiled ahead of time, instead of being
+        interpreted through loop().
+
+        Args:
+            timepoint (int): index of the timepoint
+            channel : current channel, None if the script has no channels
+        """
+        raise NotImplementedError
+
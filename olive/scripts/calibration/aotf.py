@@ -1,20 +1,145 @@
+import asyncio
+from dataclasses import asdict, dataclass
 import logging
+from typing import Tuple
 
-from scipy.optimize import minimize
+import numpy as np
 
-from olive.core.script import Script, ChannelsFeature
+from olive.scripts.base import Script, ChannelsFeature
 from olive.devices import AcustoOpticalModulator, PowerSensor, SoftwareSequencer
 
-__all__ = ["AOTFCalibration"]
+__all__ = ["AOTFCalibration", "FrequencySweep"]
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class SweepResult:
+    frequency: float  # MHz
+    readout: float  # sensor unit
+    frange: Tuple[float, float]  # MHz, swept range of the final stage
+
+
+class FrequencySweep(object):
+    """
+    Coarse-to-fine frequency sweep over an AOTF channel.
+
+    Each stage sweeps a uniform grid, and the peak is located by fitting a parabola
+    around the maximum readout. Next stage zooms in around the peak by a grid step.
+
+    Args:
+        aotf (AcustoOpticalModulator): the modulator
+        sensor (PowerSensor): sensor that measures the diffracted beam
+        n_points (int, optional): number of grid points per stage
+        n_stages (int, optional): number of stages
+        n_samples (int, optional): number of samples averaged per grid point
+        settle (float, optional): delay in seconds before sampling a new frequency
+        resolution (float, optional): frequency resolution of the modulator in MHz
+    """
+
+    def __init__(
+        self,
+        aotf: AcustoOpticalModulator,
+        sensor: PowerSensor,
+        n_points=21,
+        n_stages=3,
+        n_samples=8,
+        settle=0.01,
+        resolution=0.01,
+    ):
+        self.aotf, self.sensor = aotf, sensor
+        self.n_points, self.n_stages = n_points, n_stages
+        self.n_samples, self.settle = n_samples, settle
+        self.resolution = resolution
+
+    ##
+
+    async def run(self, alias, frange: Tuple[float, float]) -> SweepResult:
+        """
+        Sweep the channel.
+
+        Args:
+            alias (str): alias of the channel
+            frange (tuple of float): initial frequency range
+
+        Note:
+            Sensor has to be streaming.
+        """
+        fmin, fmax = frange
+        for i_stage in range(self.n_stages):
+            frequencies = self._grid(fmin, fmax)
+            readouts = np.empty_like(frequencies)
+            for i, frequency in enumerate(frequencies):
+                readouts[i] = await self._measure(alias, frequency)
+
+            fpeak, step = self._fit_peak(frequencies, readouts)
+            logger.debug(
+                f'"{alias}", stage {i_stage+1}, [{fmin:.2f}, {fmax:.2f}] MHz, '
+                f"peak at {fpeak:.2f} MHz"
+            )
+
+            # zoom in
+            fmin, fmax = max(fpeak - step, frange[0]), min(fpeak + step, frange[1])
+            if step <= self.resolution:
+                break
+
+        fpeak = float(self._snap(fpeak))
+        readout = await self._measure(alias, fpeak)
+        return SweepResult(frequency=fpeak, readout=readout, frange=(fmin, fmax))
+
+    ##
+
+    def _grid(self, fmin, fmax) -> np.ndarray:
+        frequencies = np.linspace(fmin, fmax, self.n_points)
+        # duplicates after snapping are removed
+        return np.unique(self._snap(frequencies))
+
+    def _snap(self, frequencies):
+        """Snap to the resolution of the modulator."""
+        frequencies = np.round(np.asarray(frequencies) / self.resolution)
+        return np.round(frequencies * self.resolution, 6)
+
+    async def _measure(self, alias, frequency) -> float:
+        await self.aotf.set_frequency(alias, float(frequency))
+        await asyncio.sleep(self.settle)
+        _, values = await self.sensor.collect(self.n_samples)
+        return float(np.nanmean(values))
+
+    @staticmethod
+    def _fit_peak(frequencies, readouts) -> Tuple[float, float]:
+        """
+        Locate the peak by a parabola fitted around the maximum.
+
+        Returns:
+            (tuple): tuple containing
+                peak (float): frequency of the peak
+                step (float): grid step around the peak
+        """
+        step = (frequencies[-1] - frequencies[0]) / max(len(frequencies) - 1, 1)
+
+        i = int(np.nanargmax(readouts))
+        i0, i1 = max(i - 2, 0), min(i + 3, len(frequencies))
+        fpeak = frequencies[i]
+        if i1 - i0 >= 3:
+            # center the frequencies to keep the fit well-conditioned
+            x, y = frequencies[i0:i1] - fpeak, readouts[i0:i1]
+            a, b, _ = np.polyfit(x, y, 2)
+            if a < 0:
+                # vertex has to reside in the window
+                fpeak += float(np.clip(-b / (2 * a), x[0], x[-1]))
+        return float(fpeak), float(step)
+
+
 class AOTFCalibration(Script, ChannelsFeature):
     """
     Automagically calibrate AOTF frequencies and power range.
 
-    This script will calibrate modulation frequencies for selected channels.
+    This script will calibrate modulation frequencies for all the created channels.
+    Channels are calibrated concurrently, but channels sharing the same sensor have to
+    take turns to sweep.
+
+    Calibrated frequencies are saved in the record of the AOTF, later calibrations will
+    only sweep around them.
     """
 
     sequencer = SoftwareSequencer
@@ -22,22 +147,78 @@ class AOTFCalibration(Script, ChannelsFeature):
     aotf = AcustoOpticalModulator
     power = PowerSensor
 
-    # TODO how to map functions?
+    WARM_START_SPAN = 2  # MHz
 
-    def setup(self):
-        fmin, fmax = self.aotf.get_frequency_range()
+    def __init__(self):
+        self._sensors, self._sensor_locks = dict(), dict()
+        self.results = dict()
 
-        # set to mid-power range
-        pmin, pmax = self.aotf.get_power_range()
-        self.aotf.set_power(1, (pmin + pmax) / 2)
+    ##
+
+    def get_sensor(self, alias) -> PowerSensor:
+        """Sensor that measures specified channel, default to the shared one."""
+        return self._sensors.get(alias, self.power)
+
+    def set_sensor(self, alias, sensor: PowerSensor):
+        """Assign a dedicated sensor to a channel."""
+        self._sensors[alias] = sensor
 
-        def func(f):
-            self.aotf.set_frequency(f)
-            return self.power.readout()
+    ##
 
-        res = minimize(func, (fmin + fmax) / 2, "Nelder-Mead")
-        opt_success = "SUCCESS" if res.success else "FAILED"
-        logger.info(f"minimize {opt_success}, f={res.x}")
+    async def setup(self):
+        sensors = set(self.get_sensor(alias) for alias in self.aotf.enumerate_channels())
+        self._sensor_locks = {sensor: asyncio.Lock() for sensor in sensors}
+        for sensor in sensors:
+            await sensor.start_streaming()
+
+        try:
+            aliases = self.aotf.enumerate_channels()
+            tasks = [self._calibrate(alias) for alias in aliases]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for sensor in sensors:
+                await sensor.stop_streaming()
+
+        for alias, result in zip(aliases, results):
+            if isinstance(result, Exception):
+                logger.error(f'unable to calibrate "{alias}", due to "{str(result)}"')
+            else:
+                logger.info(f'"{alias}" calibrated, f={result.frequency:.2f} MHz')
+                self.results[alias] = result
 
     def loop(self):
         pass
+
+    ##
+
+    async def _calibrate(self, alias) -> SweepResult:
+        # calibration belongs to the line, aliases are only known to this script
+        key = f"calibration/{self.aotf.get_channel_index(alias)}"
+
+        frange = await self.aotf.get_frequency_range(alias)
+        cached = self.aotf.get_record(key)
+        if cached is not None:
+            cached = SweepResult(**cached)
+            # warm start around previous result
+            frange = (
+                max(cached.frequency - self.WARM_START_SPAN, frange[0]),
+                min(cached.frequency + self.WARM_START_SPAN, frange[1]),
+            )
+            logger.debug(f'"{alias}" warm start, [{frange[0]:.2f}, {frange[1]:.2f}]')
+
+        # set to mid-power range
+        pmin, pmax = await self.aotf.get_power_range(alias)
+
+        sensor = self.get_sensor(alias)
+        async with self._sensor_locks[sensor]:
+            await self.aotf.configure_channel(
+                alias, power=(pmin + pmax) / 2, enable=True
+            )
+            try:
+                sweep = FrequencySweep(self.aotf, sensor)
+                result = await sweep.run(alias, frange)
+            finally:
+                await self.aotf.disable(alias)
+
+        self.aotf.set_record(key, asdict(result))
+        return result
@@ -1,6 +1,10 @@
 import logging
 import os
 
+from qtpy.QtCore import Qt
+from qtpy.QtWidgets import QTreeWidgetItem
+
+from olive.devices.base import DeviceRegistry
 from olive.ui.devicehub import DeviceHubView as _DeviceHubView
 from ..base import QWidgetViewBase
 
@@ -13,3 +17,41 @@ class DeviceHubView(_DeviceHubView, QWidgetViewBase):
     def __init__(self):
         path = os.path.join(os.path.dirname(__file__), "view.ui")
         super().__init__(path)
+
+        # device -> item in the device list
+        self._device_items = dict()
+
+    ##
+
+    def add_device(self, device):
+        if device in self._device_items:
+            return
+        label = type(device).__name__ if device.info is None else repr(device.info)
+        item = QTreeWidgetItem([label])
+        self._get_category_item(device).addChild(item)
+        self._device_items[device] = item
+
+    def remove_device(self, device):
+        try:
+            item = self._device_items.pop(device)
+        except KeyError:
+            return
+        category = item.parent()
+        category.removeChild(item)
+        if category.childCount() == 0:
+            index = self.device_list.indexOfTopLevelItem(category)
+            self.device_list.takeTopLevelItem(index)
+
+    ##
+
+    def _get_category_item(self, device) -> QTreeWidgetItem:
+        """Top-level item of the primitive device type, created on demand."""
+        primitives = DeviceRegistry().get_primitives(type(device))
+        name = ", ".join(sorted(klass.__name__ for klass in primitives))
+        items = self.device_list.findItems(name, Qt.MatchExactly)
+        if items:
+            return items[0]
+        item = QTreeWidgetItem([name])
+        self.device_list.addTopLevelItem(item)
+        item.setExpanded(True)
+        return item
@@ -1,6 +1,8 @@
 import logging
 from abc import abstractmethod
 
+from olive.core.managers import HotplugMonitor, InventoryDiff
+
 from ..base import PresenterBase
 from .view import DeviceHubView
 
@@ -12,11 +14,16 @@ logger = logging.getLogger(__name__)
 class DeviceHubPresenter(PresenterBase):
     def __init__(self, view: DeviceHubView):
         super().__init__(view)
+        HotplugMonitor().subscribe(self.update_inventory)
 
     ##
 
-    #def update()
-
+    def update_inventory(self, diff: InventoryDiff):
+        """Reflect hot-plug changes in the view."""
+        for device in diff.removed:
+            self.view.remove_device(device)
+        for device in diff.added:
+            self.view.add_device(device)
 
     ##
 
@@ -17,5 +17,10 @@ class DeviceHubView(ViewBase):
     def add_driver(self, driver):
         pass
 
-    # @abstractmethod
-    # def add_device(self, )
+    @abstractmethod
+    def add_device(self, device):
+        pass
+
+    @abstractmethod
+    def remove_device(self, device):
+        pass
@@ -1,3 +1,4 @@
+import asyncio
 from collections import deque
 from functools import wraps
 import importlib
@@ -6,7 +7,13 @@ import logging
 import pkgutil
 import time
 
-__all__ = ["DisjointSet", "enumerate_namespace_classes", "retry", "Singleton"]
+__all__ = [
+    "DisjointSet",
+    "enumerate_namespace_classes",
+    "maybe_await",
+    "retry",
+    "Singleton",
+]
 
 logger = logging.getLogger(__name__)
 
@@ -85,10 +92,25 @@ class Graph(object):
         return self._nodes
 
 
+async def maybe_await(result):
+    """
+    Await the result if it is awaitable, e.g. devices may implement an accessor as
+    either a function or a coroutine function.
+
+    Args:
+        result : return value of the call
+    """
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
 def retry(exception, n_trials=3, delay=1, backoff=2, logger=None):
     """
     Retry calling the decorated function using an exponential backoff.
 
+    Coroutine functions are supported as well, their delay will not block the loop.
+
     Args:
         exception (Exception or tuple): the exception(s) to check
         n_trials (int): number of trials
@@ -100,6 +122,26 @@ def retry(exception, n_trials=3, delay=1, backoff=2, logger=None):
     def retry_func(func):
         """Create a retry decorator according to requirement."""
 
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapped(*args, **kwargs):
+                """The wrapped coroutine function."""
+                remain, next_delay = n_trials, delay
+                while remain > 1:
+                    try:
+                        return await func(*args, **kwargs)
+                    except exception:
+                        if logger:
+                            logger.warning(f"retry in {next_delay} seconds...")
+                        await asyncio.sleep(next_delay)
+                        next_delay *= backoff
+                    remain -= 1
+                # last run
+                return await func(*args, **kwargs)
+
+            return async_wrapped
+
         @wraps(func)
         def wrapped(*args, **kwargs):
             """The wrapped function."""
@@ -38,10 +38,13 @@ setup(
         "pyzmq",
         "qtpy",
     ],
+    # hot-plug notifications from udev, ports are polled otherwise
+    extras_require={"udev": ["pyudev"]},
     #
     # Package Structure
     #
     packages=find_packages(),
+    package_data={"olive.drivers": ["*/manifest.json"]},
     #
     # Build Instruction
     #
@@ -44,7 +44,7 @@ async def run(device: AcustoOpticalModulator):
 async def main():
     driver_mgmt = DriverManager()
 
-    aom_drivers = driver_mgmt.query_drivers(AcustoOpticalModulator)
+    aom_drivers = await driver_mgmt.query_drivers(AcustoOpticalModulator)
     print(aom_drivers)
 
     aom_driver = aom_drivers[0]
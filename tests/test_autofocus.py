@@ -0,0 +1,85 @@
+import asyncio
+import logging
+
+import coloredlogs
+import numpy as np
+
+from olive.core.autofocus import Autofocus, FocusMetric, focus_score
+from olive.drivers.dummy import PseudoAxis
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BlurryCamera(object):
+    """Images of a random texture, blurred as the axis leaves the focus."""
+
+    def __init__(self, axis, focus, shape=(128, 128), depth=0.5):
+        self._axis, self._focus, self._depth = axis, focus, depth
+        self._shape = shape
+
+        texture = np.random.default_rng(0).uniform(0, 1000, size=shape)
+        self._spectrum = np.fft.rfft2(texture)
+        fy = np.fft.fftfreq(shape[0])[:, np.newaxis]
+        fx = np.fft.rfftfreq(shape[1])[np.newaxis]
+        self._f2 = fx ** 2 + fy ** 2
+
+    async def snap(self):
+        # gaussian blur, sigma grows with the defocus
+        defocus = self._axis.get_position() - self._focus
+        sigma = 0.5 + 4 * abs(defocus) / self._depth
+        otf = np.exp(-2 * (np.pi * sigma) ** 2 * self._f2)
+        return np.fft.irfft2(self._spectrum * otf, s=self._shape).astype(np.uint16)
+
+
+async def main():
+    axis = PseudoAxis(time_scale=0.001)
+    await axis.open()
+
+    focus = 1.234
+    camera = BlurryCamera(axis, focus)
+    for metric in FocusMetric:
+        scores = []
+        for z in (focus - 1, focus - 0.2, focus):
+            await axis.move_absolute(z)
+            scores.append(focus_score(await camera.snap(), metric))
+        logger.info(f"{metric.name}, {', '.join(f'{s:.1f}' for s in scores)}")
+        assert scores[0] < scores[1] < scores[2], "sharpest in focus"
+
+    autofocus = Autofocus(axis, camera)
+    for steps in (7, 6):
+        await axis.move_absolute(0.0)
+        result = await autofocus.run(span=4.0, steps=steps, levels=4)
+
+        z = [iteration.z for iteration in result.iterations]
+        scores = [iteration.score for iteration in result.iterations]
+        logger.info(
+            f"{steps} steps, focus at {result.z:.4f}, {len(z)} image(s), "
+            f"{len(set(iteration.level for iteration in result.iterations))} level(s)"
+        )
+        # no position is sampled twice
+        assert len(np.unique(np.round(z, 9))) == len(z)
+        # score is the sharpest sample, refined focus stays around it
+        assert result.score == max(scores)
+        best = z[int(np.argmax(scores))]
+        # each level spans 2 steps of the previous one
+        step = 4.0 * 2 ** 3 / (steps - 1) ** 4
+        assert abs(result.z - best) <= step
+        assert abs(result.z - focus) < 0.02
+        assert np.isclose(axis.get_position(), result.z)
+
+    try:
+        await autofocus.run(span=1.0, steps=2)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("2 samples cannot refine a peak")
+
+    await axis.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
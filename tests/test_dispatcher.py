@@ -0,0 +1,181 @@
+import asyncio
+import logging
+
+import coloredlogs
+
+from olive.core import Dispatcher
+from olive.devices import LinearAxis
+from olive.drivers.dummy import PseudoAxis
+from olive.scripts.base import Action, Script, TimeSeriesFeature
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SyncScript(Script):
+    """Baseline protocol, loop() raises StopIteration to end the script."""
+
+    def __init__(self, n_loops):
+        self.n_loops, self.count = n_loops, 0
+
+    def setup(self):
+        self.count = 0
+
+    def loop(self):
+        if self.count == self.n_loops:
+            raise StopIteration
+        self.count += 1
+
+
+class AsyncScript(SyncScript):
+    """A coroutine cannot raise StopIteration, it raises StopAsyncIteration."""
+
+    async def setup(self):
+        self.count = 0
+
+    async def loop(self):
+        await asyncio.sleep(0.001)
+        if self.count == self.n_loops:
+            raise StopAsyncIteration
+        self.count += 1
+
+
+class EndlessScript(SyncScript):
+    async def loop(self):
+        await asyncio.sleep(0.001)
+        self.count += 1
+
+
+class StageScript(Script, TimeSeriesFeature):
+    """Both axes move concurrently, then the z axis moves back."""
+
+    def __init__(self):
+        self.set_timepoints(3)
+
+    def setup(self):
+        pass
+
+    def loop(self):
+        pass
+
+    def cycle(self, timepoint, channel):
+        return [
+            Action("x", "move_absolute", (timepoint + 1,), name="x"),
+            Action("z", "move_absolute", (1,), name="z"),
+            Action("z", "move_absolute", (0,), after=("x", "z")),
+        ]
+
+
+class IntervalScript(Script, TimeSeriesFeature):
+    """Two quick moves, far apart."""
+
+    def __init__(self, interval):
+        self.set_timepoints(2)
+        self.set_interval(interval)
+
+    def setup(self):
+        pass
+
+    def loop(self):
+        pass
+
+    def cycle(self, timepoint, channel):
+        return [Action("x", "move_absolute", (timepoint,))]
+
+
+async def interpret():
+    for klass in (SyncScript, AsyncScript):
+        script = klass(5)
+        await Dispatcher(script).run()
+        logger.info(f"{klass.__name__} stopped after {script.count} loop(s)")
+        assert script.count == 5
+
+    # abort takes effect before the next loop
+    script = EndlessScript(0)
+    dispatcher = Dispatcher(script)
+    task = asyncio.ensure_future(dispatcher.run())
+    await asyncio.sleep(0.05)
+    dispatcher.abort()
+    await asyncio.wait_for(task, 1)
+    logger.info(f"{type(script).__name__} aborted after {script.count} loop(s)")
+    assert dispatcher.is_aborted and script.count > 0
+
+
+async def execute():
+    script = StageScript()
+    dispatcher = Dispatcher(script)
+
+    device_manager = dispatcher.device_manager
+    device_manager.update_requirements({"x": LinearAxis, "z": LinearAxis})
+    device_manager.link("x", PseudoAxis(time_scale=0.01))
+    device_manager.link("z", PseudoAxis(time_scale=0.01))
+    await dispatcher.initialize()
+
+    try:
+        await dispatcher.run()
+    finally:
+        await dispatcher.shutdown()
+
+    # required devices are closed as well, and reopened by the next initialize
+    axes = [device_manager.requirements[alias] for alias in ("x", "z")]
+    assert not any(axis.is_opened for axis in axes)
+    await dispatcher.initialize()
+    assert all(axis.is_opened for axis in axes)
+    await dispatcher.shutdown()
+
+    timings = dispatcher.timings
+    assert [timing.step for timing in timings] == [0, 1, 2]
+    for timing in timings:
+        x, z, back = sorted(timing.actions, key=lambda action: action.start)
+        logger.info(
+            f"step {timing.step}, "
+            + ", ".join(
+                f"{action.device}.{action.action} "
+                f"[{action.start * 1000:.1f}, {action.end * 1000:.1f}] ms"
+                for action in (x, z, back)
+            )
+        )
+        # independent actions overlap, the dependent one waits for both
+        assert max(x.start, z.start) < min(x.end, z.end)
+        assert back.start >= max(x.end, z.end)
+
+
+async def pause():
+    """A pause that begins while waiting for a step postpones the step."""
+    interval, t_pause, t_resume = 0.2, 0.1, 0.25
+    dispatcher = Dispatcher(IntervalScript(interval))
+
+    # same requirements as the previous run, with a faster axis
+    device_manager = dispatcher.device_manager
+    for alias in ("x", "z"):
+        device_manager.unlink(alias)
+        device_manager.link(alias, PseudoAxis(time_scale=1e-4))
+    await dispatcher.initialize()
+
+    loop = asyncio.get_running_loop()
+    loop.call_later(t_pause, dispatcher.pause)
+    loop.call_later(t_resume, dispatcher.resume)
+    t0 = loop.time()
+    try:
+        await dispatcher.run()
+    finally:
+        await dispatcher.shutdown()
+    elapsed = loop.time() - t0
+
+    logger.info(f"paused {(t_resume - t_pause) * 1000:.0f} ms, {elapsed * 1000:.1f} ms")
+    # step 1 keeps its remaining offset after the resume
+    assert elapsed >= interval + (t_resume - t_pause) - 0.01
+    assert dispatcher.timings[1].lag < 0.05
+
+
+async def main():
+    await interpret()
+    await execute()
+    await pause()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
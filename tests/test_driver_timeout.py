@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+from typing import Iterable
+
+import coloredlogs
+
+from olive.core.managers import DriverManager
+from olive.core.managers.drivers import DriverEntry
+from olive.devices import LinearAxis
+from olive.drivers.base import Driver
+from olive.drivers.dummy import PseudoAxis
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = 0.1  # s
+
+
+class HangingDriver(Driver):
+    """Waits for a library that never responds."""
+
+    async def initialize(self):
+        await asyncio.sleep(60)
+
+    def _enumerate_device_candidates(self) -> Iterable[PseudoAxis]:
+        return []
+
+
+class StallingDriver(Driver):
+    """Loads a vendor library in its constructor, which blocks."""
+
+    def __init__(self):
+        super().__init__()
+        time.sleep(3 * TIMEOUT)
+
+    def _enumerate_device_candidates(self) -> Iterable[PseudoAxis]:
+        return []
+
+
+class SlowDriver(Driver):
+    """Takes a while to initialize, but finishes within the timeout."""
+
+    async def initialize(self):
+        await asyncio.sleep(TIMEOUT / 2)
+
+    def _enumerate_device_candidates(self) -> Iterable[PseudoAxis]:
+        return []
+
+
+async def main():
+    entries = [
+        DriverEntry(klass.__name__, __name__, klass.enumerate_supported_device_types())
+        for klass in (HangingDriver, StallingDriver, SlowDriver)
+    ]
+    # only the simulated drivers
+    driver_manager = DriverManager()
+    driver_manager._entries = entries
+
+    t0 = time.perf_counter()
+    await driver_manager.initialize(LinearAxis, timeout=TIMEOUT)
+    elapsed = time.perf_counter() - t0
+    logger.info(f"initialized in {elapsed * 1000:.1f} ms")
+    assert elapsed < 2 * TIMEOUT, "hanging driver holds back the others"
+
+    hanging, stalling, slow = entries
+    for entry in (hanging, stalling):
+        assert entry.is_quarantined and not entry.is_loaded
+        assert "timeout" in entry.error
+    assert slow.is_loaded and not slow.is_quarantined
+    assert slow.init_time < TIMEOUT
+
+    # quarantined drivers are not retried
+    drivers = await driver_manager.query_drivers(LinearAxis)
+    assert drivers == (slow.instance,)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,28 @@
+import asyncio
+import logging
+import time
+
+import coloredlogs
+
+from olive.core.managers import DriverManager
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    drv_mgr = DriverManager()
+
+    t0 = time.perf_counter()
+    async for device in drv_mgr.enumerate_all():
+        dt = time.perf_counter() - t0
+        logger.info(f"[{dt*1000:8.1f} ms] found {device} by {device.driver}")
+
+    logger.info(f"{len(drv_mgr.inventory)} device(s) in the inventory")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+
+import coloredlogs
+import numpy as np
+
+from olive.core.focus import FocusMap
+from olive.drivers.dummy import PseudoAxis
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+
+def tilted(x, y):
+    """Sample mounted at a slight tilt."""
+    return 10.0 + 0.02 * x - 0.01 * y
+
+
+def warped(x, y):
+    """Tilted, and sagging towards the center."""
+    return tilted(x, y) - 0.5 * np.exp(-((x - 50) ** 2 + (y - 50) ** 2) / 1000)
+
+
+def interpolate():
+    focus_map = FocusMap()
+    try:
+        focus_map(0, 0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("focus map has no measurement")
+
+    # too few points for a spline, constant then plane
+    focus_map.add(0, 0, tilted(0, 0))
+    assert np.isclose(focus_map(100, 100), tilted(0, 0))
+    focus_map.add(100, 0, tilted(100, 0))
+    assert np.isclose(focus_map(50, 0), tilted(50, 0))
+
+    # a plane is reproduced exactly
+    focus_map.add(0, 100, tilted(0, 100))
+    focus_map.add(100, 100, tilted(100, 100))
+    x, y = np.meshgrid(np.linspace(-20, 120, 15), np.linspace(-20, 120, 15))
+    assert np.allclose(focus_map(x, y), tilted(x, y))
+
+    # a smooth surface from a sparse grid
+    focus_map.clear()
+    for xi in np.linspace(0, 100, 5):
+        for yi in np.linspace(0, 100, 5):
+            focus_map.add(xi, yi, warped(xi, yi))
+    assert len(focus_map) == 25
+    points = focus_map.points
+    assert np.allclose(focus_map.evaluate(points), points[:, 2]), "misses the points"
+    x, y = np.meshgrid(np.linspace(0, 100, 41), np.linspace(0, 100, 41))
+    error = np.abs(focus_map(x, y) - warped(x, y)).max()
+    logger.info(f"{len(focus_map)} point(s), max error {error:.4f}")
+    assert error < 0.05
+
+    # a new measurement at the same spot replaces the old one
+    version = focus_map.version
+    focus_map.add(50, 50, 9.0)
+    assert len(focus_map) == 25 and focus_map.version > version
+    assert np.isclose(focus_map(50, 50), 9.0)
+    focus_map.add(50, 50, warped(50, 50))
+
+    # tabulated surface agrees at the nodes, and is clamped beyond them
+    grid = focus_map.tabulate(np.linspace(0, 100, 21), np.linspace(0, 100, 21))
+    xx, yy = np.meshgrid(grid.x, grid.y)
+    assert np.allclose(grid(xx, yy), focus_map(xx, yy))
+    error = np.abs(grid(x, y) - focus_map(x, y)).max()
+    logger.info(f"tabulated over {grid.z.shape}, max error {error:.4f}")
+    assert error < 0.01
+    assert np.isclose(grid(-50, -50), grid(0, 0))
+
+    # stacks are relative to the focus
+    positions = np.array([(10.0, 20.0), (70.0, 40.0)])
+    z = focus_map.stack(positions, [-1.0, 0.0, 1.0])
+    assert z.shape == (2, 3)
+    assert np.allclose(z[:, 1], focus_map.evaluate(positions))
+    assert np.allclose(np.diff(z, axis=1), 1.0)
+
+    return focus_map
+
+
+async def main():
+    focus_map = interpolate()
+
+    axis = PseudoAxis(time_scale=0.01)
+    await axis.open()
+
+    await focus_map.move(axis, 30, 60)
+    assert np.isclose(axis.get_position(), focus_map(30, 60))
+
+    # measure the focus found at a new spot
+    await axis.move_absolute(12.5)
+    await focus_map.measure(axis, 125, 125)
+    assert len(focus_map) == 26 and np.isclose(focus_map(125, 125), 12.5)
+
+    positions = np.array([(0.0, 0.0), (50.0, 50.0), (100.0, 100.0)])
+    progress = await focus_map.follow(axis, positions, layers=[-0.5, 0.5])
+    await progress.wait()
+    assert progress.n_points == 6
+    assert np.isclose(axis.get_position(), focus_map(100, 100) + 0.5)
+
+    await axis.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+
+import coloredlogs
+import numpy as np
+
+from olive.devices import Waveform, WaveformShape
+from olive.drivers.dummy import PseudoGalvo
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    galvo = PseudoGalvo(table_size=256, amplitude_range=(-5.0, 5.0))
+    await galvo.open()
+
+    waveform = Waveform(WaveformShape.Flyback, amplitude=2.0, flyback=0.25)
+    assert await galvo.set_waveform(waveform)
+    assert len(galvo.uploads) == 1
+    table = galvo.uploads[-1]
+    logger.info(f"table spans [{table.min():.3f}, {table.max():.3f}]")
+    assert len(table) == 256
+
+    # same table, e.g. planes that only differ in frequency
+    for frequency in (100.0, 200.0, 400.0):
+        await galvo.set_frequency(frequency)
+        assert not await galvo.set_waveform(waveform)
+    # a new but identical waveform synthesizes the same table
+    assert not await galvo.set_waveform(Waveform(**vars(waveform)))
+    assert not await galvo.set_waveform(amplitude=2.0)
+    logger.info(f"{len(galvo.uploads)} upload(s) after unchanged waveforms")
+    assert len(galvo.uploads) == 1
+
+    # changes are uploaded
+    await galvo.set_amplitude(3.0)
+    assert len(galvo.uploads) == 2 and await galvo.get_amplitude() == 3.0
+    await galvo.set_phase_shift(0.5)
+    assert len(galvo.uploads) == 3
+    assert not np.array_equal(galvo.uploads[-1], galvo.uploads[-2])
+
+    # out of range tables are rejected before they reach the device
+    try:
+        await galvo.set_amplitude(10.0)
+    except ValueError as err:
+        logger.info(f"rejected, {err}")
+    else:
+        raise AssertionError("table exceeds the amplitude range")
+    assert len(galvo.uploads) == 3 and await galvo.get_amplitude() == 3.0
+
+    # table on the device is unknown after reconnect
+    await galvo.close()
+    await galvo.open()
+    assert await galvo.set_waveform()
+    assert len(galvo.uploads) == 4
+    assert np.array_equal(galvo.uploads[-1], galvo.uploads[-2])
+
+    await galvo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+from typing import Iterable
+
+import coloredlogs
+
+from olive.core.managers import DriverManager, HotplugMonitor
+from olive.core.managers.drivers import DriverEntry
+from olive.devices import Camera
+from olive.drivers.base import Driver
+from olive.drivers.dummy import PseudoAxis
+from olive.drivers.utils import SerialPortManager, list_ports
+from olive.ui.devicehub import DeviceHubPresenter, DeviceHubView
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+# ports the OS can find, modified to simulate hot-plug
+ports = []
+list_ports.comports = lambda: [SimpleNamespace(device=port) for port in ports]
+
+
+class SerialPseudoAxis(PseudoAxis):
+    def __init__(self, driver, port):
+        super().__init__(driver)
+        self.port = port
+
+
+class SerialPseudoDriver(Driver):
+    def _enumerate_device_candidates(self) -> Iterable[SerialPseudoAxis]:
+        return [SerialPseudoAxis(self, port) for port in SerialPortManager().list_ports()]
+
+
+class RecordingView(DeviceHubView):
+    def __init__(self):
+        self.devices = []
+
+    def add_category(self, category):
+        pass
+
+    def add_driver(self, driver):
+        pass
+
+    def add_device(self, device):
+        self.devices.append(device)
+
+    def remove_device(self, device):
+        self.devices.remove(device)
+
+
+class Presenter(DeviceHubPresenter):
+    def _register_view_callbacks(self):
+        pass
+
+
+async def main():
+    driver = SerialPseudoDriver()
+    entry = DriverEntry(
+        "SerialPseudoDriver",
+        __name__,
+        SerialPseudoDriver.enumerate_supported_device_types(),
+        instance=driver,
+    )
+    # a manifest driver that is not required, it should never be imported
+    unrelated = DriverEntry("UnrelatedDriver", "olive.drivers.unrelated", (Camera,))
+    # only the simulated drivers
+    DriverManager()._entries = [entry, unrelated]
+
+    view = RecordingView()
+    Presenter(view)
+
+    monitor = HotplugMonitor()
+    assert await monitor.update() is None, "nothing is plugged"
+
+    ports.extend(["/dev/ttyFAKE0", "/dev/ttyFAKE1"])
+    diff = await monitor.update()
+    logger.info(f"plugged, {diff}")
+    assert sorted(diff.added_ports) == ["/dev/ttyFAKE0", "/dev/ttyFAKE1"]
+    assert len(diff.added) == 2 and len(view.devices) == 2
+    assert not unrelated.is_loaded and unrelated.init_time is None, "driver loaded"
+
+    ports.remove("/dev/ttyFAKE0")
+    diff = await monitor.update()
+    logger.info(f"unplugged, {diff}")
+    assert diff.removed_ports == ("/dev/ttyFAKE0",)
+    assert [device.port for device in view.devices] == ["/dev/ttyFAKE1"]
+    assert [device.port for device in driver.devices] == ["/dev/ttyFAKE1"]
+
+    assert await monitor.update() is None, "nothing has changed"
+
+    await replug_held_port()
+
+
+async def replug_held_port():
+    """A port replugged before its stale owner releases it is not handed out twice."""
+    port_manager = SerialPortManager()
+    await port_manager.request_port("/dev/ttyFAKE1")
+
+    ports.remove("/dev/ttyFAKE1")
+    assert port_manager.refresh() == ((), ("/dev/ttyFAKE1",))
+    assert "/dev/ttyFAKE1" not in port_manager.list_ports()
+    ports.append("/dev/ttyFAKE1")
+    assert port_manager.refresh() == (("/dev/ttyFAKE1",), ())
+
+    # the new owner waits for the stale one
+    request = asyncio.ensure_future(port_manager.request_port("/dev/ttyFAKE1"))
+    await asyncio.sleep(0.01)
+    assert not request.done(), "port is handed out twice"
+    port_manager.release_port("/dev/ttyFAKE1")
+    await asyncio.wait_for(request, 1)
+    port_manager.release_port("/dev/ttyFAKE1")
+
+    # released after unplugged, the port is dropped
+    await port_manager.request_port("/dev/ttyFAKE1")
+    ports.remove("/dev/ttyFAKE1")
+    port_manager.refresh()
+    port_manager.release_port("/dev/ttyFAKE1")
+    port_manager.release_port("/dev/ttyFAKE1")
+    assert port_manager.list_ports() == ()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
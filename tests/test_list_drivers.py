@@ -14,9 +14,11 @@ drv_mgr = DriverManager()
 dev_mgr = DeviceManager()
 
 print("\n** categorized drivers **")
-pprint(drv_mgr._drivers)
+pprint(drv_mgr.drivers)
 
-drivers = drv_mgr.query_drivers(Camera)
+loop = asyncio.get_event_loop()
+
+drivers = loop.run_until_complete(drv_mgr.query_drivers(Camera))
 pprint(drivers)
 assert len(drivers) > 0, "no driver"
 
@@ -25,8 +27,6 @@ driver = drivers[0]
 print("\n** before instantiation")
 pprint(dev_mgr.devices)
 
-loop = asyncio.get_event_loop()
-
 devs = loop.run_until_complete(driver.enumerate_devices())
 pprint(devs)
 assert len(devs) > 0, "no device"
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from pprint import pprint
 
@@ -12,41 +13,41 @@ coloredlogs.install(
 logger = logging.getLogger(__name__)
 
 
-def select_device():
+async def select_device():
     ophir = Ophir()
-    ophir.initialize()
-    valid_devices = ophir.enumerate_devices()
+    await ophir.initialize()
+    valid_devices = await ophir.enumerate_devices()
     logger.info(f"found {len(valid_devices)} device(s)")
     return valid_devices[0]
 
 
-def main():
-    device = select_device()
+async def main():
+    device = await select_device()
 
-    device.open()
+    await device.open()
 
-    valid_wavelength = device.get_property("valid_wavelengths")
+    valid_wavelength = await device.get_property("valid_wavelengths")
     logger.info(f"valid wavelength: {valid_wavelength}")
 
-    valid_ranges = device.get_valid_ranges()
+    valid_ranges = await device.get_valid_ranges()
 
-    current_range = device.get_current_range()
+    current_range = await device.get_current_range()
     logger.info(f"ranges: {valid_ranges} (current: {current_range})")
 
-    device.set_current_range(valid_ranges[-1])
-    current_range = device.get_current_range()
+    await device.set_current_range(valid_ranges[-1])
+    current_range = await device.get_current_range()
     logger.info(f"ranges: {valid_ranges} (current: {current_range})")
 
-    fw = device.get_property('favorite_wavelengths')
-    logger.info(f'favorites: {fw}')
-    device.set_wavelength(600)
+    fw = await device.get_property("favorite_wavelengths")
+    logger.info(f"favorites: {fw}")
+    await device.set_wavelength(600)
 
-    unit = device.get_unit()
+    unit = await device.get_unit()
     for i in range(5):
-        print(f"{device.readout()}{unit}")
+        print(f"{await device.readout()}{unit}")
 
-    device.close()
+    await device.close()
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+
+import coloredlogs
+import numpy as np
+
+from olive.core import Dispatcher
+from olive.core.analysis import OverlapAnalyzer, TimingModel
+from olive.devices import LinearAxis
+from olive.drivers.dummy import PseudoAxis
+from olive.scripts.base import Action, Script, TimeSeriesFeature
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+MOVE, EXPOSE, READOUT = 0.02, 0.03, 0.04  # s
+
+
+class PseudoDetector(PseudoAxis):
+    """Exposes and reads out for a fixed time."""
+
+    async def expose(self):
+        await asyncio.sleep(EXPOSE)
+
+    async def readout(self):
+        await asyncio.sleep(READOUT)
+
+
+class MosaicScript(Script, TimeSeriesFeature):
+    """
+    Stage moves to a tile, camera exposes then reads out. The stage has to stay until
+    the exposure is finished, but it can move during the readout.
+    """
+
+    def __init__(self, timepoints):
+        self.set_timepoints(timepoints)
+
+    def setup(self):
+        pass
+
+    def loop(self):
+        pass
+
+    def cycle(self, timepoint, channel):
+        return [
+            Action("stage", "move_absolute", (timepoint + 1,), MOVE, name="move"),
+            Action("camera", "expose", (), EXPOSE, name="expose", after=("move",)),
+            Action("camera", "readout", (), READOUT, after=("expose",)),
+        ]
+
+
+def by_action(timeline):
+    """Rows of each action, in order of the steps."""
+    rows = dict()
+    for step, instructions in timeline.steps():
+        for instruction in instructions:
+            rows.setdefault(instruction.action, []).append(instruction)
+    return rows
+
+
+def analyze(n_cycles):
+    """Without any timing samples, durations declared by the script are expected."""
+    dispatcher = Dispatcher(MosaicScript(n_cycles))
+    assert len(dispatcher.timing_model) == 0
+    report = dispatcher.analyze()
+    logger.info(f"without samples, {report}")
+
+    # stage of the next cycle moves during the readout
+    cycle = max(MOVE + EXPOSE, EXPOSE + READOUT)
+    assert np.isclose(report.naive, n_cycles * (MOVE + EXPOSE + READOUT))
+    assert np.isclose(report.predicted, MOVE + (n_cycles - 1) * cycle + EXPOSE + READOUT)
+    assert report.speedup > 1
+
+    timeline = report.timeline
+    assert timeline.is_pipelined
+    rows = by_action(timeline)
+    for instruction in timeline:
+        for row in instruction.after:
+            dependency = timeline[row]
+            assert instruction.time >= dependency.time + dependency.duration - 1e-9
+
+    # the stage waits for the exposure of the previous cycle, not its readout
+    moves, exposures = rows["move_absolute"], rows["expose"]
+    for move, exposure in zip(moves[1:], exposures[:-1]):
+        assert exposure.row in move.after
+        assert np.isclose(move.time, exposure.time + exposure.duration)
+
+    # measured durations take precedence
+    model = TimingModel()
+    for _ in range(3):
+        model.record("camera", "readout", 2 * READOUT)
+    report = OverlapAnalyzer(model).analyze(dispatcher.compile())
+    cycle = max(MOVE + EXPOSE, EXPOSE + 2 * READOUT)
+    assert np.isclose(report.predicted_cycle * n_cycles, report.predicted)
+    assert np.isclose(
+        report.predicted, MOVE + (n_cycles - 1) * cycle + EXPOSE + 2 * READOUT
+    )
+
+
+async def execute(n_cycles):
+    dispatcher = Dispatcher(MosaicScript(n_cycles))
+
+    device_manager = dispatcher.device_manager
+    device_manager.update_requirements({"stage": LinearAxis, "camera": LinearAxis})
+    # a move of 1 takes 20 ms
+    device_manager.link("stage", PseudoAxis(time_scale=0.1))
+    device_manager.link("camera", PseudoDetector())
+    await dispatcher.initialize()
+
+    loop = asyncio.get_running_loop()
+    try:
+        # learn the durations, then overlap by them
+        t0 = loop.time()
+        await dispatcher.run()
+        serial = loop.time() - t0
+        assert set(dispatcher.timing_model.durations) == {
+            ("stage", "move_absolute"),
+            ("camera", "expose"),
+            ("camera", "readout"),
+        }
+
+        report = dispatcher.analyze()
+        t0 = loop.time()
+        await dispatcher.run(overlap=True)
+        overlapped = loop.time() - t0
+    finally:
+        await dispatcher.shutdown()
+
+    logger.info(
+        f"serial {serial * 1000:.1f} ms, overlapped {overlapped * 1000:.1f} ms, "
+        f"predicted {report.predicted * 1000:.1f} ms"
+    )
+    assert overlapped < serial
+    assert abs(overlapped - report.predicted) < 0.25 * report.predicted
+
+    # dependencies hold across cycles
+    timings = dispatcher.timings
+    assert [timing.step for timing in timings] == list(range(n_cycles))
+    actions = [
+        {action.action: action for action in timing.actions} for timing in timings
+    ]
+    for previous, current in zip(actions[:-1], actions[1:]):
+        assert current["move_absolute"].start >= previous["expose"].end
+        assert current["expose"].start >= previous["readout"].end
+        # the stage moves during the readout
+        assert current["move_absolute"].start < previous["readout"].end
+    for current in actions:
+        assert current["expose"].start >= current["move_absolute"].end
+
+
+async def main():
+    analyze(5)
+    await execute(5)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
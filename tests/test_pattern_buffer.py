@@ -0,0 +1,91 @@
+import asyncio
+import logging
+
+import coloredlogs
+import numpy as np
+
+from olive.drivers.dummy import PseudoSequencer
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+
+def build_pattern(sequencer, exposure):
+    pattern = sequencer.create_pattern()
+    pattern.resize(int(sequencer.rate * 0.1))
+
+    # 10 planes, camera exposes after the laser is on
+    starts = np.arange(10) * 0.01
+    pattern.set_levels("aotf", starts, np.linspace(1.0, 2.0, 10))
+    pattern.add_pulses("laser", starts, np.full(10, exposure + 1e-3))
+    pattern.add_pulses("camera", starts + 1e-3, np.full(10, exposure))
+
+    return pattern
+
+
+async def main():
+    for run_length in (False, True):
+        sequencer = PseudoSequencer(
+            rate=1e5,
+            lines=("camera", "laser"),
+            channels=("aotf",),
+            run_length=run_length,
+        )
+
+        pattern = build_pattern(sequencer, 5e-3)
+        lengths, _, _ = pattern.compress()
+        logger.info(f"{len(pattern)} samples, {len(lengths)} runs")
+
+        n = await sequencer.upload(pattern)
+        logger.info(f"{n} entries uploaded")
+
+        pattern = build_pattern(sequencer, 6e-3)
+        n = await sequencer.upload(pattern)
+        logger.info(f"{n} entries uploaded after exposure changed")
+
+        digital, analog = sequencer.play()
+        assert np.array_equal(digital, pattern.digital)
+        assert np.array_equal(analog, pattern.analog)
+
+        await interrupted_upload(sequencer)
+
+
+class FlakyLink(Exception):
+    pass
+
+
+async def interrupted_upload(sequencer):
+    """A failed upload leaves the memory half-written, next upload has to repair it."""
+    original = build_pattern(sequencer, 5e-3)
+    await sequencer.upload(original)
+
+    write_pattern, n_writes = sequencer._write_pattern, 0
+
+    async def flaky_write(offset, *data):
+        nonlocal n_writes
+        n_writes += 1
+        if n_writes > 1:
+            raise FlakyLink("link dropped")
+        await write_pattern(offset, *data)
+
+    sequencer._write_pattern = flaky_write
+    try:
+        await sequencer.upload(build_pattern(sequencer, 8e-3))
+    except FlakyLink:
+        logger.info("upload interrupted")
+    finally:
+        sequencer._write_pattern = write_pattern
+
+    n = await sequencer.upload(original)
+    logger.info(f"{n} entries uploaded to repair the memory")
+    digital, analog = sequencer.play()
+    assert n > 0
+    assert np.array_equal(digital, original.digital)
+    assert np.array_equal(analog, original.analog)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+
+import coloredlogs
+import numpy as np
+
+from olive.core.planner import grid_positions, PathOrder, TilePlanner
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+
+def assert_permutation(path, positions):
+    assert np.array_equal(np.sort(path.order), np.arange(len(positions)))
+    assert np.array_equal(path.positions, positions[path.order])
+    assert len(path.move_times) == len(positions)
+
+
+async def main():
+    planner = TilePlanner(velocity=(10.0, 5.0), acceleration=(100.0, 50.0), settle=0.01)
+
+    # wells scattered over a plate
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(0, 100, size=(200, 2))
+    start = (0.0, 0.0)
+    paths = dict()
+    for order in PathOrder:
+        path = planner.plan(positions, order=order, start=start)
+        assert_permutation(path, positions)
+        paths[order] = path
+    times = {order.name: path.total_time for order, path in paths.items()}
+    logger.info(", ".join(f"{name} {t:.2f} s" for name, t in times.items()))
+    # refined from the nearest neighbor path, never longer
+    nearest = paths[PathOrder.NearestNeighbor].total_time
+    assert paths[PathOrder.TwoOpt].total_time <= nearest
+
+    # tiles of a mosaic, rows alternate their direction
+    tiles = grid_positions((0, 0), (10, 6), (2, 2), overlap=0.0)
+    path = planner.plan(tiles, order=PathOrder.Serpentine)
+    assert_permutation(path, tiles)
+    x = path.positions[:, 0].reshape(3, 5)
+    assert np.all(np.diff(x[0]) > 0) and np.all(np.diff(x[1]) < 0)
+
+    # a single axis, and a single point
+    path = planner.plan([3.0, 1.0, 2.0], order=PathOrder.TwoOpt, start=(0.0,))
+    assert path.order.tolist() == [1, 2, 0]
+    path = planner.plan([(1.0, 1.0)])
+    assert path.order.tolist() == [0] and path.total_time == 0.0
+
+    try:
+        planner.plan([])
+    except ValueError as err:
+        logger.info(f"rejected, {err}")
+    else:
+        raise AssertionError("planned a path without positions")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
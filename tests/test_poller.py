@@ -0,0 +1,92 @@
+import asyncio
+import logging
+
+import coloredlogs
+
+from olive.devices.base import Device, DeviceInfo
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PseudoMeter(Device):
+    """Properties take a while to query, like a serial device."""
+
+    QUERY_TIME = 0.05  # s
+
+    def __init__(self):
+        super().__init__(None)
+        self.power, self.temperature = 0.0, 25.0
+        self.polling = asyncio.Event()
+
+    @property
+    def is_opened(self):
+        return True
+
+    async def test_open(self):
+        pass
+
+    async def get_device_info(self):
+        return DeviceInfo(vendor="olive", model="PseudoMeter")
+
+    async def enumerate_properties(self):
+        return ("power", "temperature")
+
+    async def _get_power(self):
+        self.polling.set()
+        await asyncio.sleep(self.QUERY_TIME)
+        return self.power
+
+    async def _get_temperature(self):
+        await asyncio.sleep(self.QUERY_TIME)
+        return self.temperature
+
+
+async def main():
+    meter = PseudoMeter()
+
+    # subscribe, starts with the current value
+    power = meter.subscribe(["power"], interval=0.1)
+    change = await asyncio.wait_for(power.get(), 1)
+    logger.info(f"subscribed, {change}")
+    assert change.value == 0.0 and change.previous is None
+
+    # change
+    meter.power = 1.0
+    change = await asyncio.wait_for(power.get(), 1)
+    logger.info(f"changed, {change}")
+    assert change.value == 1.0 and change.previous == 0.0
+
+    # unsubscribe during a poll, the poller keeps serving the others
+    both = meter.subscribe(["power", "temperature"], interval=0.02)
+    meter.polling.clear()
+    await asyncio.wait_for(meter.polling.wait(), 1)
+    both.close()
+    assert both.is_closed
+
+    meter.power = 2.0
+    change = await asyncio.wait_for(power.get(), 1)
+    logger.info(f"changed after unsubscribe, {change}")
+    assert change.value == 2.0
+    assert meter._poller.is_running, "poller is terminated"
+
+    # close wakes up consumers
+    received = []
+
+    async def consume():
+        async for change in power:
+            received.append(change)
+
+    consumer = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.2)
+    power.close()
+    await asyncio.wait_for(consumer, 1)
+    logger.info(f"closed, {len(received)} change(s) received by the consumer")
+    assert not meter._poller.is_running, "poller still runs without subscribers"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
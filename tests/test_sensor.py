@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+
+import coloredlogs
+import numpy as np
+
+from olive.devices import PowerSensor
+from olive.devices.base import DeviceInfo
+from olive.devices.sensor import SampleBuffer
+from olive.drivers.ophir.sensors import Photodiode
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PseudoPowerSensor(PowerSensor):
+    """Reads out 0, 1, 2... every millisecond, queries pause the stream."""
+
+    def __init__(self):
+        super().__init__(None)
+        self._count, self.queries = 0, 0
+
+    @property
+    def is_opened(self):
+        return True
+
+    async def test_open(self):
+        pass
+
+    async def get_device_info(self):
+        return DeviceInfo(vendor="olive", model="PseudoPowerSensor")
+
+    async def enumerate_properties(self):
+        return tuple()
+
+    async def readout(self):
+        assert not self.is_streaming or asyncio.current_task() is self._stream_task
+        await asyncio.sleep(0.001)
+        self._count += 1
+        return float(self._count - 1)
+
+    async def get_current_range(self):
+        async with self.paused_stream():
+            self.queries += 1
+            return "AUTO"
+
+    async def set_current_range(self, value):
+        pass
+
+    async def get_unit(self):
+        return "W"
+
+    async def get_valid_ranges(self):
+        return ("AUTO",)
+
+    async def set_wavelength(self, value):
+        pass
+
+
+class PseudoMeter(object):
+    """Parent of a photodiode, its stream never delivers a sample."""
+
+    driver = None
+    STREAM_MODE = False
+    is_opened, children = True, ()
+
+    def __init__(self, is_unplugged):
+        self._is_unplugged = is_unplugged
+
+    async def pipelined_query(self, command, depth=4):
+        await asyncio.sleep(0.01)
+        if self._is_unplugged:
+            raise ConnectionError("meter is unplugged")
+        # stuck
+        await asyncio.sleep(10)
+        yield
+
+
+def ring():
+    buffer = SampleBuffer(8)
+    for i in range(5):
+        buffer.put(i, float(i))
+    t, v = buffer.read()
+    assert v.tolist() == [0, 1, 2, 3, 4] and buffer.size == 5
+
+    # overrun, only the latest samples survive
+    for i in range(5, 20):
+        buffer.put(i, float(i))
+    assert buffer.count == 20 and buffer.size == buffer.capacity == 8
+    t, v = buffer.read()
+    assert v.tolist() == list(range(12, 20)), "overwritten samples are returned"
+    assert np.array_equal(t, v)
+    assert buffer.read()[1].size == 0, "samples are read twice"
+
+    # a batch larger than the ring
+    buffer.put_many(np.arange(20, 30), np.arange(20, 30, dtype=np.float64))
+    assert buffer.latest(3)[1].tolist() == [27, 28, 29]
+    assert buffer.since(25)[1].tolist() == [25, 26, 27, 28, 29]
+    assert buffer.since(0)[1].tolist() == list(range(22, 30))
+
+
+async def stream():
+    sensor = PseudoPowerSensor()
+    await sensor.start_streaming(n_samples=16)
+
+    # exactly n consecutive samples, even if they wrap around the ring
+    for n in (10, 40):
+        t0 = time.perf_counter()
+        timestamps, values = await sensor.collect(n, timeout=1)
+        logger.info(f"{n} sample(s) in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        assert len(values) == min(n, sensor.buffer.capacity)
+        assert np.all(np.diff(values) == 1) and np.all(np.diff(timestamps) > 0)
+
+    # other queries pause the stream, it resumes into the same buffer
+    buffer, count = sensor.buffer, sensor.buffer.count
+    assert await sensor.get_current_range() == "AUTO"
+    assert sensor.is_streaming and sensor.buffer is buffer
+    await sensor.collect(5, timeout=1)
+    assert buffer.count > count
+
+    await sensor.stop_streaming()
+    assert not sensor.is_streaming
+
+    try:
+        await sensor.collect(1)
+    except AssertionError:
+        pass
+    else:
+        raise AssertionError("collect without a stream")
+
+
+async def terminated():
+    """Readout does not hang on a stream that dies before the first sample."""
+    photodiode = Photodiode(PseudoMeter(is_unplugged=True))
+    await photodiode.start_streaming()
+    assert photodiode.is_streaming
+    try:
+        await asyncio.wait_for(photodiode.readout(), 1)
+    except RuntimeError as err:
+        logger.info(f"readout failed, {err}")
+    else:
+        raise AssertionError("readout without samples")
+
+    # a stream that is stuck times out
+    photodiode = Photodiode(PseudoMeter(is_unplugged=False))
+    photodiode.STREAM_TIMEOUT = 0.05
+    await photodiode.start_streaming()
+    t0 = time.perf_counter()
+    try:
+        await photodiode.readout()
+    except asyncio.TimeoutError:
+        elapsed = time.perf_counter() - t0
+        logger.info(f"readout timed out after {elapsed * 1000:.1f} ms")
+    else:
+        raise AssertionError("readout without samples")
+    finally:
+        await photodiode.stop_streaming()
+
+
+async def main():
+    ring()
+    await stream()
+    await terminated()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
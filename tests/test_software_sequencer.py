@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+
+import coloredlogs
+import numpy as np
+
+from olive.core import TimelineCompiler
+from olive.devices import SoftwareSequencer
+from olive.devices.error import SequencerError
+from olive.scripts.base import Action, Script, TimeSeriesFeature
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Recorder(object):
+    """Records the order and time of the calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def trigger(self, tag):
+        self.calls.append((tag, time.perf_counter_ns()))
+
+    async def settle(self, tag):
+        self.calls.append((tag, time.perf_counter_ns()))
+        await asyncio.sleep(0.001)
+
+    async def jam(self, tag):
+        self.calls.append((tag, time.perf_counter_ns()))
+        raise RuntimeError("stage is jammed")
+
+
+class PulseScript(Script, TimeSeriesFeature):
+    """Camera follows the laser, the stage settles after the exposure."""
+
+    def __init__(self, timepoints, interval):
+        self.set_timepoints(timepoints)
+        self.set_interval(interval)
+
+    def setup(self):
+        pass
+
+    def loop(self):
+        pass
+
+    def cycle(self, timepoint, channel):
+        return [
+            Action("laser", "trigger", (f"laser{timepoint}",), 2e-3, name="laser"),
+            Action(
+                "camera",
+                "trigger",
+                (f"camera{timepoint}",),
+                5e-3,
+                name="camera",
+                after=("laser",),
+            ),
+            Action("stage", "settle", (f"stage{timepoint}",), after=("camera",)),
+        ]
+
+
+class JammedScript(Script):
+    """Stage fails to settle, camera should never expose."""
+
+    def __init__(self):
+        pass
+
+    def setup(self):
+        pass
+
+    def loop(self):
+        pass
+
+    def cycle(self, timepoint, channel):
+        return [
+            Action("stage", "jam", ("stage",), 5e-3, name="stage"),
+            Action("laser", "trigger", ("laser",), name="laser", after=("stage",)),
+            Action("camera", "trigger", ("camera",), after=("laser",)),
+        ]
+
+
+def compile_timeline(timepoints, interval):
+    return TimelineCompiler().compile(PulseScript(timepoints, interval))
+
+
+async def fire():
+    timeline = compile_timeline(5, 0.01)
+    recorder = Recorder()
+    devices = {alias: recorder for alias in timeline.devices}
+
+    sequencer = SoftwareSequencer()
+    records = await sequencer.run(timeline, devices)
+
+    # fired in order of the timeline
+    tags = [tag for tag, _ in recorder.calls]
+    expected = [instruction.args[0] for instruction in timeline]
+    logger.info(f"{len(tags)} call(s), {tags[:3]}...")
+    assert tags == expected
+
+    assert np.array_equal(records["row"], np.arange(len(timeline)))
+    assert np.all(records["fired"] >= records["scheduled"])
+    assert np.all(records["actual"] >= records["fired"])
+    lateness = sequencer.lateness
+    assert len(lateness) == len(timeline) and np.all(lateness >= 0)
+
+    # synchronous actions start as they fire, coroutines start on the loop
+    is_sync = np.array([instruction.action == "trigger" for instruction in timeline])
+    assert np.array_equal(records["actual"][is_sync], records["fired"][is_sync])
+    delay = records["actual"][~is_sync] - records["fired"][~is_sync]
+    logger.info(f"coroutines start {delay.mean() / 1e3:.1f} us after they are fired")
+
+
+async def stop():
+    timeline = compile_timeline(50, 0.01)
+    recorder = Recorder()
+    devices = {alias: recorder for alias in timeline.devices}
+
+    sequencer = SoftwareSequencer()
+    sequencer.start(timeline, devices)
+    await asyncio.sleep(0.05)
+    sequencer.stop()
+    await asyncio.wait_for(sequencer.wait(), 1)
+    assert not sequencer.is_running
+
+    records = sequencer.records
+    fired = records["fired"] >= 0
+    n = int(fired.sum())
+    logger.info(f"stopped after {n}/{len(timeline)} instruction(s)")
+    assert 0 < n < len(timeline)
+    # nothing is skipped before the stop, nothing fires after it
+    assert fired[:n].all() and not fired[n:].any()
+    assert len(recorder.calls) == n
+
+    # coroutines cannot be submitted without a loop
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, SoftwareSequencer().start, timeline, devices)
+    except SequencerError:
+        pass
+    else:
+        raise AssertionError("sequencer starts without an event loop")
+
+
+async def fail():
+    timeline = TimelineCompiler().compile(JammedScript())
+    recorder = Recorder()
+    devices = {alias: recorder for alias in timeline.devices}
+
+    sequencer = SoftwareSequencer()
+    try:
+        await sequencer.run(timeline, devices)
+    except SequencerError as err:
+        logger.info(f"failed, {err}")
+    else:
+        raise AssertionError("failed action is not reported")
+
+    # nothing fires after the failure
+    assert [tag for tag, _ in recorder.calls] == ["stage"]
+    assert sequencer.records["fired"].tolist()[1:] == [-1, -1]
+
+
+async def main():
+    await fire()
+    await stop()
+    await fail()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
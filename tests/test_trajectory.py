@@ -0,0 +1,43 @@
+import asyncio
+import logging
+import time
+
+import coloredlogs
+import numpy as np
+
+from olive.drivers.dummy import PseudoAxis
+
+coloredlogs.install(
+    level="DEBUG", fmt="%(asctime)s %(levelname)s %(message)s", datefmt="%H:%M:%S"
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    positions = np.linspace(0, 10, 1000)
+    triggers = np.zeros(len(positions), dtype=bool)
+    triggers[::100] = True
+
+    for capacity in (0, 64):
+        axis = PseudoAxis(capacity=capacity, time_scale=0.01)
+        await axis.open()
+
+        t0 = time.perf_counter()
+        progress = await axis.move_trajectory(positions, triggers=triggers)
+        reported = 0
+        async for n in progress:
+            if n - reported >= 100 or n == progress.n_points:
+                dt = time.perf_counter() - t0
+                logger.info(f"[{dt*1000:8.1f} ms] {n} / {progress.n_points}")
+                reported = n
+        logger.info(f"{len(axis.triggers)} trigger(s), at {axis.get_position():.3f}")
+        # with or without a buffer, every trigger fires once the point is reached
+        assert axis.triggers == np.flatnonzero(triggers).tolist()
+        assert axis.get_position() == positions[-1]
+
+        await axis.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())